@@ -12,18 +12,23 @@ from unfold.forms import AdminPasswordChangeForm, UserChangeForm, UserCreationFo
 from unfold.sections import TableSection
 from unfold.contrib.import_export.forms import ExportForm, ImportForm, SelectableFieldsExportForm
 from import_export.admin import ImportExportModelAdmin
-from import_export import resources
+from import_export import resources, widgets
 from import_export.formats.base_formats import XLSX, CSV, XLS
+from import_export.utils import get_related_model
 from django.db import models
 from django.db.models import Q
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ValidationError
+from django.core.exceptions import PermissionDenied, ValidationError
 from django import forms
 from django.contrib import messages
 from django.http import HttpResponseRedirect
 from datetime import date
+import functools
 
-from .models import User, UIK, Workplace, Voter, UIKResults, UIKAnalysis, UIKResultsDaily, Analytics, VotingDateBlock
+from .models import User, UIK, Workplace, Voter, UIKResults, UIKAnalysis, UIKResultsDaily, Analytics, VotingDateBlock, BackgroundJob, VoterAggregate, deferred_fact_recalculation
+from . import bulk, exports
+from .dashboard_cache import bump_data_version
+from .imports import ImportLookups, BOOLEAN_FIELDS, DATE_FIELDS, normalize_columns
 
 
 # Кастомные фильтры для VoterAdmin
@@ -88,6 +93,26 @@ class AgitatorFilter(RelatedOnlyFieldListFilter):
 
 
 # Форма для массового обновления избирателей
+class VoterStreamImportForm(forms.Form):
+    """Форма загрузки файла для потокового импорта избирателей"""
+    
+    file = forms.FileField(
+        label='Файл XLSX',
+        help_text='Заголовки столбцов - имена полей, как в шаблоне импорта избирателей',
+    )
+    dry_run = forms.BooleanField(
+        label='Только проверить',
+        required=False,
+        help_text='Проверить файл и получить отчет об ошибках без сохранения',
+    )
+    
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith('.xlsx'):
+            raise forms.ValidationError('Поддерживаются только файлы XLSX')
+        return upload
+
+
 class BulkUpdateVotersForm(forms.Form):
     """Форма для массового обновления избирателей по ID"""
     
@@ -151,12 +176,8 @@ class BulkUpdateVotersForm(forms.Form):
                 raise ValidationError('Дата голосования должна быть 12, 13 или 14 сентября 2025 года')
             
             # Проверяем, не заблокирована ли дата
-            try:
-                date_block = VotingDateBlock.objects.get(voting_date=voting_date)
-                if date_block.is_blocked:
-                    raise ValidationError(f'Дата {voting_date.strftime("%d.%m.%Y")} заблокирована для голосования')
-            except VotingDateBlock.DoesNotExist:
-                pass  # Дата не заблокирована
+            if VotingDateBlock.is_date_blocked(voting_date):
+                raise ValidationError(f'Дата {voting_date.strftime("%d.%m.%Y")} заблокирована для голосования')
         return voting_date
     
     def clean(self):
@@ -193,7 +214,77 @@ class GroupAdmin(BaseGroupAdmin, ModelAdmin):
 
 
 # Ресурсы для импорта-экспорта
-class UserResource(resources.ModelResource):
+class LookupForeignKeyWidget(widgets.ForeignKeyWidget):
+    """ForeignKeyWidget, пропускающий объект, уже найденный в справочниках импорта"""
+
+    def clean(self, value, row=None, **kwargs):
+        if isinstance(value, self.model):
+            return value.pk if self.key_is_id else value
+        return super().clean(value, row=row, **kwargs)
+
+
+class LookupManyToManyWidget(widgets.ManyToManyWidget):
+    """ManyToManyWidget, пропускающий список объектов, уже найденных в справочниках импорта"""
+
+    def clean(self, value, row=None, **kwargs):
+        if isinstance(value, (list, tuple)):
+            return value
+        return super().clean(value, row=row, **kwargs)
+
+
+class ImportLookupsMixin:
+    """Ссылки в строках импорта разрешаются по справочникам ImportLookups,
+    загруженным один раз на импорт, а не запросом на каждую строку.
+
+    before_import_row подставляет в строку найденные объекты, а виджеты связей
+    принимают их без повторного поиска в БД.
+    """
+
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        self.lookups = kwargs.get('lookups') or ImportLookups()
+
+    def import_instance(self, instance, row, **kwargs):
+        super().import_instance(instance, row, **kwargs)
+        # Поля связей импортируются как <поле>_id: найденные объекты кладем в
+        # кэш экземпляра, чтобы save() (сигналы агрегата) и __str__ не читали их снова
+        for field in instance._meta.concrete_fields:
+            obj = row.get(field.name)
+            if field.many_to_one and isinstance(obj, field.related_model) and getattr(instance, field.attname) == obj.pk:
+                field.set_cached_value(instance, obj)
+
+    @classmethod
+    def get_fk_widget(cls, field):
+        return functools.partial(LookupForeignKeyWidget, model=get_related_model(field))
+
+    @classmethod
+    def get_m2m_widget(cls, field):
+        return functools.partial(LookupManyToManyWidget, model=get_related_model(field))
+
+    def resolve_users(self, value, error, **filters):
+        """Пользователи из значения через запятую (ID или логины); error - шаблон
+        ошибки для ненайденного значения с плейсхолдерами {kind} и {value}"""
+        users = []
+        for identifier in [x.strip() for x in str(value).split(',') if x.strip()]:
+            user = self.lookups.user(identifier, **filters)
+            if user is None:
+                kind = 'ID' if identifier.isdigit() else 'логином'
+                raise ValidationError(error.format(kind=kind, value=identifier))
+            users.append(user)
+        return users
+
+    def resolve_references(self, row, fields):
+        """Подставляет в row найденные объекты для полей fields ({поле: функция поиска});
+        ненайденные значения остаются как есть и проверяются виджетом"""
+        for field, lookup in fields.items():
+            value = row.get(field)
+            if value not in (None, ''):
+                obj = lookup(value)
+                if obj is not None:
+                    row[field] = obj
+
+
+class UserResource(ImportLookupsMixin, resources.ModelResource):
     """Ресурс для импорта-экспорта пользователей"""
     
     class Meta:
@@ -245,20 +336,13 @@ class UserResource(resources.ModelResource):
         # Обработка места работы
         workplace_value = row.get('workplace', '')
         if workplace_value:
-            # Если это число (ID), оставляем как есть
-            if str(workplace_value).isdigit():
-                try:
-                    workplace = Workplace.objects.get(id=int(workplace_value))
-                    row['workplace'] = workplace.id
-                except Workplace.DoesNotExist:
+            # ID или название
+            workplace = self.lookups.workplace(workplace_value)
+            if workplace is None:
+                if str(workplace_value).isdigit():
                     raise ValidationError(f"Место работы с ID '{workplace_value}' не найдено в базе данных")
-            else:
-                # Если это строка (название), ищем по названию
-                try:
-                    workplace = Workplace.objects.get(name=workplace_value)
-                    row['workplace'] = workplace.id
-                except Workplace.DoesNotExist:
-                    raise ValidationError(f"Место работы '{workplace_value}' не найдено в базе данных")
+                raise ValidationError(f"Место работы '{workplace_value}' не найдено в базе данных")
+            row['workplace'] = workplace
         
         # Обработка булевых полей
         for bool_field in ['is_active_participant', 'is_active', 'is_staff', 'is_superuser']:
@@ -328,7 +412,7 @@ class WorkplaceResource(resources.ModelResource):
         return instance
 
 
-class UIKResource(resources.ModelResource):
+class UIKResource(ImportLookupsMixin, resources.ModelResource):
     """Ресурс для импорта-экспорта УИК"""
     
     class Meta:
@@ -348,111 +432,37 @@ class UIKResource(resources.ModelResource):
         if not row.get('address'):
             raise ValidationError("Адрес обязателен")
         
-        # Обработка бригадира
+        # Обработка бригадира (ID или логин)
         brigadier_value = row.get('brigadier', '')
         if brigadier_value:
-            # Если это число (ID), оставляем как есть
-            if str(brigadier_value).isdigit():
-                try:
-                    brigadier = User.objects.get(id=int(brigadier_value), role='brigadier')
-                    row['brigadier'] = brigadier.id
-                except User.DoesNotExist:
-                    raise ValidationError(f"Бригадир с ID '{brigadier_value}' не найден или не является бригадиром")
-            else:
-                # Если это строка (логин), ищем по логину
-                try:
-                    brigadier = User.objects.get(username=brigadier_value, role='brigadier')
-                    row['brigadier'] = brigadier.id
-                except User.DoesNotExist:
-                    raise ValidationError(f"Бригадир с логином '{brigadier_value}' не найден или не является бригадиром")
+            brigadier = self.lookups.user(brigadier_value, role='brigadier')
+            if brigadier is None:
+                kind = 'ID' if str(brigadier_value).isdigit() else 'логином'
+                raise ValidationError(f"Бригадир с {kind} '{brigadier_value}' не найден или не является бригадиром")
+            row['brigadier'] = brigadier
         
-        # Обработка агитаторов (через запятую)
+        # Обработка агитаторов (через запятую); связи сохраняются после УИК
         agitators_value = row.get('agitators', '')
         if agitators_value:
-            agitator_ids = []
-            # Разделяем по запятой
-            agitator_identifiers = [x.strip() for x in str(agitators_value).split(',') if x.strip()]
-            
-            for identifier in agitator_identifiers:
-                # Если это число (ID), ищем по ID
-                if str(identifier).isdigit():
-                    try:
-                        agitator = User.objects.get(id=int(identifier), role='agitator')
-                        agitator_ids.append(agitator.id)
-                    except User.DoesNotExist:
-                        raise ValidationError(f"Агитатор с ID '{identifier}' не найден или не является агитатором")
-                else:
-                    # Если это строка (логин), ищем по логину
-                    try:
-                        agitator = User.objects.get(username=identifier, role='agitator')
-                        agitator_ids.append(agitator.id)
-                    except User.DoesNotExist:
-                        raise ValidationError(f"Агитатор с логином '{identifier}' не найден или не является агитатором")
-            
-            row['agitators'] = ','.join(map(str, agitator_ids))
+            row['agitators'] = self.resolve_users(
+                agitators_value, "Агитатор с {kind} '{value}' не найден или не является агитатором",
+                role='agitator',
+            )
         
         # Обработка дополнительных бригадиров (через запятую)
         additional_brigadiers_value = row.get('additional_brigadiers', '')
         if additional_brigadiers_value:
-            brigadier_ids = []
-            # Разделяем по запятой
-            brigadier_identifiers = [x.strip() for x in str(additional_brigadiers_value).split(',') if x.strip()]
-            
-            for identifier in brigadier_identifiers:
-                # Если это число (ID), ищем по ID
-                if str(identifier).isdigit():
-                    try:
-                        brigadier = User.objects.get(id=int(identifier), role='brigadier', can_be_additional=True)
-                        brigadier_ids.append(brigadier.id)
-                    except User.DoesNotExist:
-                        raise ValidationError(f"Дополнительный бригадир с ID '{identifier}' не найден или не может быть дополнительным")
-                else:
-                    # Если это строка (логин), ищем по логину
-                    try:
-                        brigadier = User.objects.get(username=identifier, role='brigadier', can_be_additional=True)
-                        brigadier_ids.append(brigadier.id)
-                    except User.DoesNotExist:
-                        raise ValidationError(f"Дополнительный бригадир с логином '{identifier}' не найден или не может быть дополнительным")
-            
-            row['additional_brigadiers'] = ','.join(map(str, brigadier_ids))
-    
-    def before_save_instance(self, instance, row, **kwargs):
-        """Обработка перед сохранением"""
-        # Обрабатываем агитаторов после создания/обновления УИК
-        agitators_value = row.get('agitators', '')
-        if agitators_value:
-            agitator_ids = [int(x) for x in str(agitators_value).split(',') if x.strip()]
-            instance.agitators.set(agitator_ids)
-        
-        # Обрабатываем дополнительных бригадиров после создания/обновления УИК
-        additional_brigadiers_value = row.get('additional_brigadiers', '')
-        if additional_brigadiers_value:
-            brigadier_ids = [int(x) for x in str(additional_brigadiers_value).split(',') if x.strip()]
-            instance.additional_brigadiers.set(brigadier_ids)
-        
-        # Обрабатываем created_by и updated_by
-        created_by_value = row.get('created_by', '')
-        if created_by_value:
-            if str(created_by_value).isdigit():
-                try:
-                    created_by = User.objects.get(id=int(created_by_value))
-                    instance.created_by = created_by
-                except User.DoesNotExist:
-                    pass  # Игнорируем если пользователь не найден
-        
-        updated_by_value = row.get('updated_by', '')
-        if updated_by_value:
-            if str(updated_by_value).isdigit():
-                try:
-                    updated_by = User.objects.get(id=int(updated_by_value))
-                    instance.updated_by = updated_by
-                except User.DoesNotExist:
-                    pass  # Игнорируем если пользователь не найден
+            row['additional_brigadiers'] = self.resolve_users(
+                additional_brigadiers_value,
+                "Дополнительный бригадир с {kind} '{value}' не найден или не может быть дополнительным",
+                role='brigadier', can_be_additional=True,
+            )
         
-        return instance
+        # Обрабатываем created_by и updated_by (ID)
+        self.resolve_references(row, {'created_by': self.lookups.user, 'updated_by': self.lookups.user})
 
 
-class VoterResource(resources.ModelResource):
+class VoterResource(ImportLookupsMixin, resources.ModelResource):
     """Ресурс для импорта-экспорта избирателей"""
     
     class Meta:
@@ -471,10 +481,16 @@ class VoterResource(resources.ModelResource):
         skip_unchanged = True
         report_skipped = True
     
+    def before_import(self, dataset, **kwargs):
+        """Даты и булевы поля разбираются для всего файла сразу (см. normalize_columns)"""
+        super().before_import(dataset, **kwargs)
+        fields = [field for field in DATE_FIELDS + BOOLEAN_FIELDS if field in dataset.headers]
+        self.normalized_rows, self.normalize_errors = normalize_columns(
+            [{field: row[field] for field in fields} for row in dataset.dict]
+        )
+    
     def before_import_row(self, row, **kwargs):
         """Валидация перед импортом строки"""
-        from datetime import date
-        
         # Проверяем обязательные поля
         if not row.get('last_name') or not str(row.get('last_name')).strip():
             raise ValidationError("Фамилия обязательна")
@@ -485,149 +501,20 @@ class VoterResource(resources.ModelResource):
         if not row.get('uik'):
             raise ValidationError("УИК обязателен")
         
-        # Обработка дат
-        planned_date_value = row.get('planned_date', '')
-        if planned_date_value:
-            try:
-                # Пробуем разные форматы дат
-                if isinstance(planned_date_value, str):
-                    # Если строка, пробуем распарсить
-                    from datetime import datetime
-                    try:
-                        # Пробуем формат YYYY-MM-DD HH:MM:SS
-                        planned_date = datetime.strptime(planned_date_value, '%Y-%m-%d %H:%M:%S').date()
-                    except ValueError:
-                        try:
-                            # Пробуем формат YYYY-MM-DD
-                            planned_date = datetime.strptime(planned_date_value, '%Y-%m-%d').date()
-                        except ValueError:
-                            try:
-                                # Пробуем формат DD.MM.YYYY
-                                planned_date = datetime.strptime(planned_date_value, '%d.%m.%Y').date()
-                            except ValueError:
-                                try:
-                                    # Пробуем формат DD/MM/YYYY
-                                    planned_date = datetime.strptime(planned_date_value, '%d/%m/%Y').date()
-                                except ValueError:
-                                    raise ValidationError(f"Некорректный формат даты планирования: {planned_date_value}")
-                else:
-                    # Если это уже объект datetime, извлекаем дату
-                    if hasattr(planned_date_value, 'date'):
-                        planned_date = planned_date_value.date()
-                    else:
-                        planned_date = planned_date_value
-                
-                # Проверяем, что дата входит в разрешенные
-                allowed_dates = [date(2025, 9, 12), date(2025, 9, 13), date(2025, 9, 14)]
-                if planned_date not in allowed_dates:
-                    raise ValidationError(f"Планируемая дата должна быть 12, 13 или 14 сентября 2025 года, получена: {planned_date}")
-                
-                row['planned_date'] = planned_date
-            except Exception as e:
-                raise ValidationError(f"Ошибка обработки даты планирования: {str(e)}")
-        
-        # Обработка даты голосования
-        voting_date_value = row.get('voting_date', '')
-        if voting_date_value:
-            try:
-                if isinstance(voting_date_value, str):
-                    from datetime import datetime
-                    try:
-                        # Пробуем формат YYYY-MM-DD HH:MM:SS
-                        voting_date = datetime.strptime(voting_date_value, '%Y-%m-%d %H:%M:%S').date()
-                    except ValueError:
-                        try:
-                            # Пробуем формат YYYY-MM-DD
-                            voting_date = datetime.strptime(voting_date_value, '%Y-%m-%d').date()
-                        except ValueError:
-                            try:
-                                # Пробуем формат DD.MM.YYYY
-                                voting_date = datetime.strptime(voting_date_value, '%d.%m.%Y').date()
-                            except ValueError:
-                                try:
-                                    # Пробуем формат DD/MM/YYYY
-                                    voting_date = datetime.strptime(voting_date_value, '%d/%m/%Y').date()
-                                except ValueError:
-                                    raise ValidationError(f"Некорректный формат даты голосования: {voting_date_value}")
-                else:
-                    # Если это уже объект datetime, извлекаем дату
-                    if hasattr(voting_date_value, 'date'):
-                        voting_date = voting_date_value.date()
-                    else:
-                        voting_date = voting_date_value
-                
-                # Проверяем, что дата входит в разрешенные
-                allowed_dates = [date(2025, 9, 12), date(2025, 9, 13), date(2025, 9, 14)]
-                if voting_date not in allowed_dates:
-                    raise ValidationError(f"Дата голосования должна быть 12, 13 или 14 сентября 2025 года, получена: {voting_date}")
-                
-                row['voting_date'] = voting_date
-            except Exception as e:
-                raise ValidationError(f"Ошибка обработки даты голосования: {str(e)}")
-        
-        # Обработка даты рождения
-        birth_date_value = row.get('birth_date', '')
-        if birth_date_value:
-            try:
-                if isinstance(birth_date_value, str):
-                    from datetime import datetime
-                    try:
-                        # Пробуем формат YYYY-MM-DD HH:MM:SS
-                        birth_date = datetime.strptime(birth_date_value, '%Y-%m-%d %H:%M:%S').date()
-                    except ValueError:
-                        try:
-                            # Пробуем формат YYYY-MM-DD
-                            birth_date = datetime.strptime(birth_date_value, '%Y-%m-%d').date()
-                        except ValueError:
-                            try:
-                                # Пробуем формат DD.MM.YYYY
-                                birth_date = datetime.strptime(birth_date_value, '%d.%m.%Y').date()
-                            except ValueError:
-                                try:
-                                    # Пробуем формат DD/MM/YYYY
-                                    birth_date = datetime.strptime(birth_date_value, '%d/%m/%Y').date()
-                                except ValueError:
-                                    raise ValidationError(f"Некорректный формат даты рождения: {birth_date_value}")
-                else:
-                    # Если это уже объект datetime, извлекаем дату
-                    if hasattr(birth_date_value, 'date'):
-                        birth_date = birth_date_value.date()
-                    else:
-                        birth_date = birth_date_value
-                
-                row['birth_date'] = birth_date
-            except Exception as e:
-                raise ValidationError(f"Ошибка обработки даты рождения: {str(e)}")
-        
-        # Обработка булевых полей
-        confirmed_value = row.get('confirmed_by_brigadier', '')
-        if confirmed_value:
-            if str(confirmed_value).lower() in ['true', '1', 'да', 'yes']:
-                row['confirmed_by_brigadier'] = True
-            elif str(confirmed_value).lower() in ['false', '0', 'нет', 'no']:
-                row['confirmed_by_brigadier'] = False
-            else:
-                row['confirmed_by_brigadier'] = bool(confirmed_value)
-        
-        # Обработка поля is_agitator
-        is_agitator_value = row.get('is_agitator', '')
-        if is_agitator_value:
-            if str(is_agitator_value).lower() in ['true', '1', 'да', 'yes']:
-                row['is_agitator'] = True
-            elif str(is_agitator_value).lower() in ['false', '0', 'нет', 'no']:
-                row['is_agitator'] = False
-            else:
-                row['is_agitator'] = bool(is_agitator_value)
-        
-        # Обработка поля is_home_voting
-        is_home_voting_value = row.get('is_home_voting', '')
-        if is_home_voting_value:
-            if str(is_home_voting_value).lower() in ['true', '1', 'да', 'yes']:
-                row['is_home_voting'] = True
-            elif str(is_home_voting_value).lower() in ['false', '0', 'нет', 'no']:
-                row['is_home_voting'] = False
-            else:
-                row['is_home_voting'] = bool(is_home_voting_value)
+        # Даты и булевы поля из пред-прохода before_import
+        index = kwargs['row_number'] - 1
+        if self.normalize_errors[index]:
+            raise ValidationError(self.normalize_errors[index])
+        row.update(self.normalized_rows[index])
+        
+        # Ссылки по справочникам импорта
+        self.resolve_references(row, {
+            'workplace': self.lookups.workplace,
+            'uik': self.lookups.uik,
+            'agitator': self.lookups.user,
+            'created_by': self.lookups.user,
+            'updated_by': self.lookups.user,
+        })
         
         # Валидация: нельзя подтвердить голосование без даты голосования
         if row.get('confirmed_by_brigadier') and not row.get('voting_date'):
@@ -1188,7 +1075,7 @@ class VoterAdmin(ImportExportModelAdmin, ModelAdmin):
     formats = [XLSX, CSV]
     
     # Changelist actions (кнопки в верхней части списка)
-    actions_list = ['bulk_confirm_voters', 'export_to_excel']
+    actions_list = ['bulk_confirm_voters', 'import_voters_stream', 'export_to_excel', 'export_to_csv']
     
     
     @admin.display(description='Дата рождения', ordering='birth_date')
@@ -1204,111 +1091,13 @@ class VoterAdmin(ImportExportModelAdmin, ModelAdmin):
         extra_context['title'] = 'Избиратели'
         extra_context['subtitle'] = 'Управление избирателями'
         
-        # Обработка POST запроса для массового редактирования
-        if request.method == 'POST':
-            # Получаем данные из POST
-            form_data = request.POST
-            
-            # Собираем все записи для обновления
-            records_to_update = {}
-            
-            # Сначала собираем все данные
-            for key, value in form_data.items():
-                if key.startswith('form-') and '-id' in key:
-                    record_id = value
-                    if record_id:
-                        prefix = key.replace('-id', '')
-                        if record_id not in records_to_update:
-                            records_to_update[record_id] = {'prefix': prefix}
-                        
-                        # Собираем все поля для этой записи
-                        for field_name in ['planned_date', 'voting_date', 'voting_method', 'confirmed_by_brigadier']:
-                            field_key = f'{prefix}-{field_name}'
-                            if field_key in form_data:
-                                records_to_update[record_id][field_name] = form_data[field_key]
-            
-            # Счетчики для уведомлений
-            updated_count = 0
-            error_count = 0
-            
-            # Теперь обновляем записи
-            for record_id, data in records_to_update.items():
-                try:
-                    voter = Voter.objects.get(id=record_id)
-                    
-                    # Обновляем все поля
-                    if 'planned_date' in data:
-                        planned_date_str = data['planned_date']
-                        if planned_date_str:
-                            from datetime import datetime
-                            try:
-                                # Пробуем разные форматы дат
-                                try:
-                                    voter.planned_date = datetime.strptime(planned_date_str, '%d.%m.%Y').date()
-                                except ValueError:
-                                    try:
-                                        voter.planned_date = datetime.strptime(planned_date_str, '%Y-%m-%d').date()
-                                    except ValueError:
-                                        pass
-                            except Exception:
-                                pass
-                    
-                    if 'voting_date' in data:
-                        voting_date_str = data['voting_date']
-                        if voting_date_str:
-                            from datetime import datetime
-                            try:
-                                # Пробуем разные форматы дат
-                                try:
-                                    voter.voting_date = datetime.strptime(voting_date_str, '%d.%m.%Y').date()
-                                except ValueError:
-                                    try:
-                                        voter.voting_date = datetime.strptime(voting_date_str, '%Y-%m-%d').date()
-                                    except ValueError:
-                                        voter.voting_date = None
-                            except Exception:
-                                voter.voting_date = None
-                        else:
-                            voter.voting_date = None
-                    
-                    if 'voting_method' in data:
-                        voter.voting_method = data['voting_method']
-                    
-                    if 'confirmed_by_brigadier' in data:
-                        voter.confirmed_by_brigadier = True
-                    else:
-                        voter.confirmed_by_brigadier = False
-                    
-                    # Сохраняем запрос для валидации
-                    voter._request = request
-                    
-                    # Вызываем валидацию и сохраняем
-                    try:
-                        voter.clean()
-                        voter.save()
-                        updated_count += 1
-                    except ValidationError as e:
-                        error_count += 1
-                        from django.contrib import messages
-                        for field, errors in e.message_dict.items():
-                            for error in errors:
-                                messages.error(request, f"Запись {voter.get_full_name()}: {field}: {error}")
-                    
-                except Voter.DoesNotExist:
-                    error_count += 1
-                except Exception as e:
-                    error_count += 1
-                    from django.contrib import messages
-                    messages.error(request, f"Ошибка при сохранении записи: {str(e)}")
-            
-            # Показываем итоговые уведомления
-            from django.contrib import messages
-            if updated_count > 0:
-                messages.success(request, f"Успешно обновлено записей: {updated_count}")
-            if error_count > 0:
-                messages.warning(request, f"Записей с ошибками: {error_count}")
-            if updated_count == 0 and error_count == 0:
-                messages.info(request, "Нет изменений для сохранения")
+        # Сохранение строк списка (list_editable) одним пакетом вместо
+        # поштучных save() и стандартной обработки formset
+        if request.method == 'POST' and '_save' in request.POST and self.list_editable:
+            if not self.has_change_permission(request):
+                raise PermissionDenied
+            self.save_changelist_rows(request)
+            return HttpResponseRedirect(request.get_full_path())
         
         try:
             return super().changelist_view(request, extra_context)
@@ -1335,6 +1124,69 @@ class VoterAdmin(ImportExportModelAdmin, ModelAdmin):
     
     
 
+    def save_changelist_rows(self, request):
+        """Сохраняет отредактированные в списке строки.
+
+        Все строки загружаются одним запросом (in_bulk), значения разбираются
+        формой списка и проверяются Voter.clean() в памяти, а изменившиеся
+        строки записываются одним bulk_update с пересчетом фактов один раз на
+        каждый затронутый УИК (см. elections.bulk).
+        """
+        # Форма строки с полями list_editable, как у стандартного formset списка
+        form_class = self.get_changelist_formset(request).form
+        prefixes = {}
+        try:
+            total_forms = int(request.POST.get('form-TOTAL_FORMS', 0))
+        except ValueError:
+            total_forms = 0
+        for index in range(total_forms):
+            record_id = request.POST.get(f'form-{index}-id', '')
+            if record_id.isdigit():
+                prefixes[f'form-{index}'] = int(record_id)
+
+        voters = self.get_queryset(request).select_related('workplace', 'agitator').in_bulk(prefixes.values())
+
+        to_save = []
+        error_count = 0
+        for prefix, record_id in prefixes.items():
+            voter = voters.get(record_id)
+            if voter is None:
+                error_count += 1
+                messages.error(request, f"Запись с ID {record_id} не найдена")
+                continue
+
+            form = form_class(request.POST, instance=voter, prefix=prefix)
+            if not form.has_changed():
+                continue
+            if form.is_valid():
+                # Как в Voter.save(): УИК избирателя берется из УИК агитатора
+                if voter.assign_agitator_uik():
+                    try:
+                        voter.clean()
+                    except ValidationError as e:
+                        form.add_error(None, e)
+            if form.errors:
+                error_count += 1
+                for field, errors in form.errors.items():
+                    for error in errors:
+                        messages.error(request, f"Запись {voter.get_full_name()}: {field}: {error}")
+                continue
+            to_save.append(voter)
+
+        try:
+            bulk.bulk_save_voters(to_save, list(self.list_editable) + ['uik'], user=request.user)
+        except Exception as e:
+            messages.error(request, f"Ошибка при сохранении записей: {str(e)}")
+            return
+
+        # Показываем итоговые уведомления
+        if to_save:
+            messages.success(request, f"Успешно обновлено записей: {len(to_save)}")
+        if error_count > 0:
+            messages.warning(request, f"Записей с ошибками: {error_count}")
+        if not to_save and error_count == 0:
+            messages.info(request, "Нет изменений для сохранения")
+
     def get_fieldsets(self, request, obj=None):
         """Динамические поля в зависимости от роли"""
         base_fields = (
@@ -1411,8 +1263,8 @@ class VoterAdmin(ImportExportModelAdmin, ModelAdmin):
         # Сохраняем запрос для валидации
         obj._request = request
         
-        # Проверяем, что у агитатора есть УИК
-        if obj.agitator and not obj.agitator.assigned_uiks_as_agitator.exists():
+        # Проверяем, что у агитатора есть УИК (кэш назначений, без запроса)
+        if obj.agitator_id and not UIK.get_agitator_uik(obj.agitator_id):
             from django.contrib import messages
             messages.error(
                 request, 
@@ -1422,18 +1274,7 @@ class VoterAdmin(ImportExportModelAdmin, ModelAdmin):
             return
         
         # Автоматически заполняем УИК из агитатора ПЕРЕД сохранением
-        if obj.agitator:
-            try:
-                # Проверяем, есть ли уже УИК
-                if not obj.uik:
-                    agitator_uik = obj.agitator.assigned_uiks_as_agitator.first()
-                    if agitator_uik:
-                        obj.uik = agitator_uik
-            except:
-                # Если УИК еще не заполнен, заполняем его
-                agitator_uik = obj.agitator.assigned_uiks_as_agitator.first()
-                if agitator_uik:
-                    obj.uik = agitator_uik
+        obj.assign_agitator_uik()
         
         # Вызываем валидацию модели
         try:
@@ -1500,19 +1341,21 @@ class VoterAdmin(ImportExportModelAdmin, ModelAdmin):
         
         from django.db import transaction
         
-        for obj in queryset:
-            try:
-                with transaction.atomic():
-                    obj.delete()
-                    deleted_count += 1
-            except Exception as e:
-                error_count += 1
-                from django.contrib import messages
-                error_msg = str(e)
-                if "FOREIGN KEY constraint failed" in error_msg:
-                    messages.error(request, f"Нельзя удалить запись '{obj.get_full_name()}': есть связанные данные")
-                else:
-                    messages.error(request, f"Ошибка при удалении записи '{obj.get_full_name()}': {error_msg}")
+        # Факты УИК пересчитываются один раз после всех удалений
+        with deferred_fact_recalculation():
+            for obj in queryset:
+                try:
+                    with transaction.atomic():
+                        obj.delete()
+                        deleted_count += 1
+                except Exception as e:
+                    error_count += 1
+                    from django.contrib import messages
+                    error_msg = str(e)
+                    if "FOREIGN KEY constraint failed" in error_msg:
+                        messages.error(request, f"Нельзя удалить запись '{obj.get_full_name()}': есть связанные данные")
+                    else:
+                        messages.error(request, f"Ошибка при удалении записи '{obj.get_full_name()}': {error_msg}")
         
         # Показываем итоговые уведомления
         from django.contrib import messages
@@ -1789,118 +1632,23 @@ class VoterAdmin(ImportExportModelAdmin, ModelAdmin):
                 voting_method = form.cleaned_data['voting_method']
                 confirmed_by_brigadier = form.cleaned_data['confirmed_by_brigadier']
                 
-                # Получаем избирателей для обновления
-                voters = Voter.objects.filter(id__in=voter_ids)
-                
-                updated_count = 0
-                skipped_count = 0
-                error_count = 0
-                errors = []
-                updated_voters = []
-                skipped_voters = []
-                
-                for voter in voters:
-                    try:
-                        # Проверяем, какие поля нужно обновить
-                        needs_update = False
-                        changes = []
-                        
-                        # Проверяем дату голосования
-                        if not voter.voting_date and voting_date:
-                            # Блокируем установку дат для подтвержденных голосований
-                            if voter.confirmed_by_brigadier:
-                                skipped_voters.append(f"ID {voter.id} ({voter.get_full_name()}) - нельзя установить дату для подтвержденного голосования")
-                            else:
-                                voter.voting_date = voting_date
-                                needs_update = True
-                                changes.append("дата голосования")
-                        elif voter.voting_date:
-                            # Если пытаемся изменить дату у подтвержденного голосования
-                            if voter.confirmed_by_brigadier:
-                                skipped_voters.append(f"ID {voter.id} ({voter.get_full_name()}) - дата голосования {voter.voting_date.strftime('%d.%m.%Y')} заблокирована (подтверждено)")
-                            else:
-                                # Проверяем, пытаемся ли изменить дату на другую
-                                if voting_date and voting_date != voter.voting_date:
-                                    skipped_voters.append(f"ID {voter.id} ({voter.get_full_name()}) - дата голосования уже заполнена ({voter.voting_date.strftime('%d.%m.%Y')})")
-                                # Если дата не меняется, то ничего не делаем (не добавляем в skipped_voters)
-                        
-                        # Проверяем способ голосования
-                        if not voter.voting_method and voting_method:
-                            # Блокируем установку способа голосования для подтвержденных голосований
-                            if voter.confirmed_by_brigadier:
-                                skipped_voters.append(f"ID {voter.id} ({voter.get_full_name()}) - нельзя установить способ голосования для подтвержденного голосования")
-                            else:
-                                voter.voting_method = voting_method
-                                needs_update = True
-                                changes.append("способ голосования")
-                        elif voter.voting_method:
-                            # Если пытаемся изменить способ голосования у подтвержденного голосования
-                            if voter.confirmed_by_brigadier:
-                                skipped_voters.append(f"ID {voter.id} ({voter.get_full_name()}) - способ голосования заблокирован (подтверждено)")
-                            else:
-                                # Проверяем, пытаемся ли изменить способ голосования на другой
-                                if voting_method and voting_method != voter.voting_method:
-                                    skipped_voters.append(f"ID {voter.id} ({voter.get_full_name()}) - способ голосования уже заполнен ({voter.get_voting_method_display()})")
-                                # Если способ голосования не меняется, то ничего не делаем (не добавляем в skipped_voters)
-                        
-                        # Проверяем подтверждение бригадиром
-                        if confirmed_by_brigadier and not voter.confirmed_by_brigadier:
-                            voter.confirmed_by_brigadier = True
-                            needs_update = True
-                            changes.append("подтверждение бригадиром")
-                        elif voter.confirmed_by_brigadier and not confirmed_by_brigadier:
-                            # Пытаемся снять подтверждение - проверяем, не заблокирована ли дата
-                            if voter.voting_date:
-                                try:
-                                    from elections.models import VotingDateBlock
-                                    date_block = VotingDateBlock.objects.get(voting_date=voter.voting_date)
-                                    if date_block.is_blocked:
-                                        skipped_voters.append(f"ID {voter.id} ({voter.get_full_name()}) - нельзя снять подтверждение, дата {voter.voting_date.strftime('%d.%m.%Y')} заблокирована")
-                                    else:
-                                        voter.confirmed_by_brigadier = False
-                                        needs_update = True
-                                        changes.append("снятие подтверждения бригадиром")
-                                except VotingDateBlock.DoesNotExist:
-                                    # Дата не заблокирована
-                                    voter.confirmed_by_brigadier = False
-                                    needs_update = True
-                                    changes.append("снятие подтверждения бригадиром")
-                            else:
-                                voter.confirmed_by_brigadier = False
-                                needs_update = True
-                                changes.append("снятие подтверждения бригадиром")
-                        elif voter.confirmed_by_brigadier:
-                            skipped_voters.append(f"ID {voter.id} ({voter.get_full_name()}) - уже подтверждено бригадиром")
-                        
-                        if needs_update:
-                            # Сохраняем запрос для валидации
-                            voter._request = request
-                            
-                            # Вызываем валидацию и сохраняем
-                            voter.clean()
-                            voter.save()
-                            updated_count += 1
-                            updated_voters.append(f"ID {voter.id} ({voter.get_full_name()}) - обновлено: {', '.join(changes)}")
-                        else:
-                            skipped_count += 1
-                        
-                    except ValidationError as e:
-                        error_count += 1
-                        for field, field_errors in e.message_dict.items():
-                            for error in field_errors:
-                                errors.append(f"ID {voter.id} ({voter.get_full_name()}): {field}: {error}")
-                    except Exception as e:
-                        error_count += 1
-                        errors.append(f"ID {voter.id} ({voter.get_full_name()}): {str(e)}")
+                # Проверка в памяти и запись пачками в одной транзакции (см. elections.bulk)
+                result = bulk.bulk_confirm_voters(
+                    voter_ids,
+                    voting_date=voting_date,
+                    voting_method=voting_method,
+                    confirmed_by_brigadier=confirmed_by_brigadier,
+                    user=request.user,
+                )
                 
-                # Подготавливаем данные для модального окна
+                # Подготавливаем данные для модального окна (полные списки)
                 result_data = {
-                    'updated': updated_count,
-                    'skipped': skipped_count,
-                    'errors': error_count,
-                    'updated_list': updated_voters[:10],  # Показываем первые 10
-                    'skipped_list': skipped_voters[:10],  # Показываем первые 10
-                    'error_list': errors[:10],  # Показываем первые 10
+                    'updated': result['updated'],
+                    'skipped': result['skipped'],
+                    'errors': result['errors'],
+                    'updated_list': result['updated_list'],
+                    'skipped_list': result['skipped_list'],
+                    'error_list': result['error_list'],
                     'show_modal': True
                 }
                 
@@ -1966,44 +1714,78 @@ class VoterAdmin(ImportExportModelAdmin, ModelAdmin):
         return (request.user.is_superuser or 
                 request.user.role in ['admin', 'operator', 'brigadier'])
     
+    @action(description="Быстрый импорт", url_path="import-stream", permissions=["import_voters_stream"])
+    def import_voters_stream(self, request):
+        """Загрузка XLSX для потокового импорта в фоновой задаче (см. elections.imports)"""
+        if request.method == 'POST':
+            form = VoterStreamImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                from django.core.files.storage import default_storage
+                
+                upload = form.cleaned_data['file']
+                path = default_storage.save(f'imports/{upload.name}', upload)
+                job = BackgroundJob.enqueue(
+                    'import_voters',
+                    params={'path': path, 'dry_run': form.cleaned_data['dry_run']},
+                    user=request.user,
+                )
+                messages.success(request, f"Импорт поставлен в очередь: {job}. Отчет об ошибках по строкам - в результате задачи.")
+                return HttpResponseRedirect(reverse('admin:elections_backgroundjob_change', args=[job.pk]))
+        else:
+            form = VoterStreamImportForm()
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Быстрый импорт избирателей',
+            'form': form,
+            'opts': self.model._meta,
+        }
+        return render(request, 'admin/import_voters.html', context)
+    
+    def has_import_voters_stream_permission(self, request):
+        """Проверка прав на потоковый импорт"""
+        return request.user.has_perm('elections.add_voter') and request.user.has_perm('elections.change_voter')
+    
+    def get_export_queryset(self, request):
+        """Избиратели для выгрузки: ограничения по роли и фильтры УИК/агитатора/места работы из URL"""
+        # Получаем queryset с учетом ролей
+        queryset = self.get_queryset(request)
+        
+        # Применяем фильтры из URL параметров
+        for key, value in request.GET.items():
+            if key.startswith('uik__') or key.startswith('agitator__') or key.startswith('workplace__'):
+                if value:
+                    queryset = queryset.filter(**{key: value})
+        return queryset
+    
     @action(description="Выгрузка в Excel", url_path="export-to-excel", permissions=["export_to_excel"])
     def export_to_excel(self, request):
-        """Выгрузка избирателей в Excel с русскими названиями и человекочитаемыми данными"""
-        from django.http import HttpResponse
-        from import_export.formats.base_formats import XLSX
+        """Выгрузка избирателей в Excel с русскими названиями и человекочитаемыми данными.
+
+        Книга пишется построчно по пачкам избирателей и отдается потоком
+        (см. elections.exports), поэтому подходит и для сотен тысяч строк.
+        """
         from datetime import datetime
         
-        # Получаем queryset с учетом фильтров
-        queryset = self.get_queryset(request)
-        
-        # Применяем фильтры из request
-        if hasattr(request, 'GET') and request.GET:
-            # Применяем фильтры из URL параметров
-            for key, value in request.GET.items():
-                if key.startswith('uik__') or key.startswith('agitator__') or key.startswith('workplace__'):
-                    if value:
-                        queryset = queryset.filter(**{key: value})
+        queryset = self.get_export_queryset(request)
         
-        # Создаем ресурс для экспорта
+        # Ресурс задает столбцы и форматирование значений
         resource = VoterExcelExportResource()
-        
-        # Экспортируем данные
-        dataset = resource.export(queryset)
-        
-        # Создаем Excel файл
-        xlsx_format = XLSX()
-        response = HttpResponse(
-            xlsx_format.export_data(dataset),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        rows = (resource.export_resource(voter) for voter in exports.iter_voters(queryset))
         
         # Генерируем имя файла с текущей датой
         current_date = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f'izbirateli_{current_date}.xlsx'
         
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return exports.xlsx_response(filename, resource.get_export_headers(), rows)
+    
+    @action(description="Выгрузка в CSV", url_path="export-to-csv", permissions=["export_to_excel"])
+    def export_to_csv(self, request):
+        """Потоковая выгрузка избирателей в CSV с теми же столбцами и фильтрами, что и в Excel"""
+        from datetime import datetime
         
-        return response
+        current_date = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return exports.csv_response(f'izbirateli_{current_date}.csv', self.get_export_queryset(request))
     
     def has_export_to_excel_permission(self, request):
         """Проверка прав на выгрузку в Excel"""
@@ -2323,6 +2105,31 @@ def is_operators_user(user):
     return user.groups.filter(name=OPERATORS_GROUP).exists()
 
 
+class PlanExecutionFilter(SimpleListFilter):
+    """Фильтр по выполнению общего плана (аннотация execution_percentage)"""
+    title = 'Выполнение плана'
+    parameter_name = 'execution'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('done', '100% и выше'),
+            ('warning', 'От 80% до 100%'),
+            ('behind', 'Ниже 80%'),
+            ('no_plan', 'План не задан'),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'done':
+            return queryset.filter(plan_total__gt=0, execution_percentage__gte=100)
+        elif self.value() == 'warning':
+            return queryset.filter(plan_total__gt=0, execution_percentage__gte=80, execution_percentage__lt=100)
+        elif self.value() == 'behind':
+            return queryset.filter(plan_total__gt=0, execution_percentage__lt=80)
+        elif self.value() == 'no_plan':
+            return queryset.filter(plan_total=0)
+        return queryset
+
+
 @admin.register(UIKResultsDaily)
 class UIKResultsDailyAdmin(ImportExportModelAdmin, ModelAdmin):
     """Админка для результатов по дням УИК с редактированием в списке"""
@@ -2344,7 +2151,7 @@ class UIKResultsDailyAdmin(ImportExportModelAdmin, ModelAdmin):
         'fact_12_sep', 'fact_13_sep', 'fact_14_sep',
         'fact_12_sep_locked', 'fact_13_sep_locked', 'fact_14_sep_locked'
     ]  # Редактирование прямо в списке
-    list_filter = ['uik__number', 'updated_at']
+    list_filter = ['uik__number', PlanExecutionFilter, 'updated_at']
     search_fields = ['uik__number', 'uik__address']
     ordering = ['uik__number']
     readonly_fields = ['total_fact', 'plan_execution_percentage', 'plan_12_percent', 'plan_13_percent', 'plan_14_percent', 'fact_12_sep_calculated', 'fact_13_sep_calculated', 'fact_14_sep_calculated', 'separator_1', 'separator_2', 'separator_3', 'created_by', 'updated_by', 'created_at', 'updated_at']
@@ -2434,15 +2241,15 @@ class UIKResultsDailyAdmin(ImportExportModelAdmin, ModelAdmin):
         return format_html('<strong style="color: orange;">{}</strong>', obj.plan_14_sep)
     
     
-    @display(description='План')
+    @display(description='План', ordering='plan_total')
     def total_plan(self, obj):
         return format_html('<strong style="color: orange;">{}</strong>', obj.total_plan)
     
-    @display(description='Факт')
+    @display(description='Факт', ordering='fact_total')
     def total_fact(self, obj):
         return format_html('<strong style="color: green;">{}</strong>', obj.total_fact)
     
-    @display(description='%')
+    @display(description='%', ordering='execution_percentage')
     def plan_execution_percentage(self, obj):
         percent = obj.plan_execution_percentage
         if percent >= 100:
@@ -2473,7 +2280,7 @@ class UIKResultsDailyAdmin(ImportExportModelAdmin, ModelAdmin):
     def separator_3(self, obj):
         return format_html('<div style="border-left: 3px solid #ddd; height: 30px; margin: 0 8px; background: #f8f9fa;"></div>')
     
-    @display(description='% 12.09')
+    @display(description='% 12.09', ordering='plan_12_percentage')
     def plan_12_percent(self, obj):
         effective_fact = obj.get_effective_fact_12_sep()
         percent = round((effective_fact / obj.plan_12_sep * 100), 1) if obj.plan_12_sep > 0 else 0
@@ -2485,7 +2292,7 @@ class UIKResultsDailyAdmin(ImportExportModelAdmin, ModelAdmin):
             color = 'red'
         return format_html('<span style="color: {};"><strong>{}%</strong></span>', color, percent)
     
-    @display(description='% 13.09')
+    @display(description='% 13.09', ordering='plan_13_percentage')
     def plan_13_percent(self, obj):
         effective_fact = obj.get_effective_fact_13_sep()
         percent = round((effective_fact / obj.plan_13_sep * 100), 1) if obj.plan_13_sep > 0 else 0
@@ -2497,7 +2304,7 @@ class UIKResultsDailyAdmin(ImportExportModelAdmin, ModelAdmin):
             color = 'red'
         return format_html('<span style="color: {};"><strong>{}%</strong></span>', color, percent)
     
-    @display(description='% 14.09')
+    @display(description='% 14.09', ordering='plan_14_percentage')
     def plan_14_percent(self, obj):
         effective_fact = obj.get_effective_fact_14_sep()
         percent = round((effective_fact / obj.plan_14_sep * 100), 1) if obj.plan_14_sep > 0 else 0
@@ -2536,7 +2343,8 @@ class UIKResultsDailyAdmin(ImportExportModelAdmin, ModelAdmin):
     
     def get_queryset(self, request):
         """Фильтруем записи в зависимости от роли пользователя"""
-        qs = super().get_queryset(request)
+        # Итоги, эффективные факты и проценты считаются в БД для сортировки и фильтров
+        qs = super().get_queryset(request).with_totals()
         
         # Админы видят все записи
         if request.user.is_superuser or request.user.role == 'admin':
@@ -2592,8 +2400,12 @@ class UIKResultsDailyAdmin(ImportExportModelAdmin, ModelAdmin):
     @admin.action(description='Пересчитать факты для выбранных УИК')
     def recalculate_daily_facts(self, request, queryset):
         """Пересчитать расчетные факты для выбранных УИК"""
+        instances = list(queryset)
+        # Факты считаются по агрегату избирателей - сначала пересобираем его по избирателям
+        VoterAggregate.rebuild({instance.uik_id for instance in instances})
+        bump_data_version()
         updated = 0
-        for instance in queryset:
+        for instance in instances:
             instance.recalculate_all()
             updated += 1
         
@@ -2604,24 +2416,14 @@ class UIKResultsDailyAdmin(ImportExportModelAdmin, ModelAdmin):
     
     @admin.action(description='Пересчитать все факты в системе')
     def recalculate_all_daily_facts(self, request, queryset):
-        """Пересчитать все расчетные факты в системе"""
-        from django.core.management import call_command
-        from io import StringIO
-        import sys
-        
-        # Перенаправляем вывод команды
-        old_stdout = sys.stdout
-        sys.stdout = StringIO()
-        
-        try:
-            call_command('recalculate_all_daily_facts')
-            output = sys.stdout.getvalue()
-        finally:
-            sys.stdout = old_stdout
-        
+        """Поставить пересчет всех расчетных фактов в очередь фоновых задач"""
+        job = BackgroundJob.enqueue('recalculate_all_daily_facts', user=request.user)
         self.message_user(
-            request, 
-            f'Выполнен пересчет всех фактов: {output}'
+            request,
+            format_html(
+                'Пересчет всех фактов поставлен в очередь. Ход выполнения: <a href="{}">{}</a>',
+                reverse('admin:elections_backgroundjob_change', args=[job.pk]), job,
+            )
         )
     
     @admin.action(description='Синхронизировать вписанные значения с расчетными')
@@ -2696,3 +2498,66 @@ class VotingDateBlockAdmin(ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         """Разрешение на удаление"""
         return request.user.has_perm('elections.delete_votingdateblock')
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(ModelAdmin):
+    """Просмотр фоновых задач (выполняются командой run_jobs)"""
+    
+    list_display = ['id', 'title_display', 'status_display', 'progress_display', 'message', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'name', 'created_at']
+    ordering = ['-created_at']
+    actions = ['requeue_jobs']
+    readonly_fields = [
+        'name', 'params', 'status', 'progress_current', 'progress_total', 'message',
+        'result', 'error', 'worker', 'created_by', 'created_at', 'started_at', 'finished_at',
+    ]
+    
+    fieldsets = (
+        ('Задача', {
+            'fields': ('name', 'params', 'status', 'message')
+        }),
+        ('Ход выполнения', {
+            'fields': ('progress_current', 'progress_total', 'worker', 'started_at', 'finished_at')
+        }),
+        ('Результат', {
+            'fields': ('result', 'error')
+        }),
+        ('Системная информация', {
+            'fields': ('created_by', 'created_at'),
+            'classes': ('collapse',)
+        }),
+    )
+    
+    @display(description='Задача')
+    def title_display(self, obj):
+        return obj.title
+    
+    @display(description='Статус')
+    def status_display(self, obj):
+        colors = {'pending': 'gray', 'running': '#d97706', 'done': 'green', 'failed': 'red'}
+        return format_html('<span style="color: {};">{}</span>', colors[obj.status], obj.get_status_display())
+    
+    @display(description='Выполнено')
+    def progress_display(self, obj):
+        percent = obj.progress_percent
+        if percent is None:
+            return '—'
+        return f'{percent}% ({obj.progress_current} из {obj.progress_total})' if obj.progress_total else f'{percent}%'
+    
+    @admin.action(description='Повторить выбранные задачи')
+    def requeue_jobs(self, request, queryset):
+        """Снова поставить в очередь завершившиеся ошибкой задачи"""
+        requeued = queryset.filter(status='failed').update(
+            status='pending', error='', message='', progress_current=0, progress_total=None,
+            worker='', started_at=None, finished_at=None,
+        )
+        self.message_user(request, f'Поставлено в очередь задач: {requeued}')
+    
+    def has_add_permission(self, request):
+        """Задачи создаются только действиями админки"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Задачи доступны только для просмотра"""
+        return False
@@ -0,0 +1,609 @@
+"""Агрегация планов и фактов для дашбордов набором групповых запросов.
+
+Все счетчики считаются в БД одним GROUP BY (по агрегату VoterAggregate, где это
+возможно), а строки таблиц собираются в памяти, поэтому количество запросов
+не зависит от числа УИК и агитаторов.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, Q, Sum
+
+from .models import UIK, User, Voter, VoterAggregate, UIKResultsDaily, Workplace, VOTING_DATES
+
+
+def percent(fact, plan):
+    """Процент выполнения плана с округлением до десятых"""
+    return round((fact / plan * 100), 1) if plan > 0 else 0
+
+
+def confirmed_fact_counts():
+    """Подтвержденные голоса по (УИК, агитатор, дата голосования) одним запросом.
+
+    Возвращает словарь {(uik_id, agitator_id): {дата: количество}}.
+    """
+    counts = defaultdict(dict)
+    rows = (
+        VoterAggregate.objects
+        .filter(confirmed_by_brigadier=True, voting_date__in=VOTING_DATES)
+        .values('uik_id', 'agitator_id', 'voting_date')
+        .annotate(count=Sum('count'))
+        .order_by()
+    )
+    for row in rows:
+        counts[(row['uik_id'], row['agitator_id'])][row['voting_date']] = row['count']
+    return counts
+
+
+def _managing_brigadier(agitator):
+    """Первый (по id) руководитель агитатора из предзагруженных assigned_brigadiers"""
+    return min(agitator.assigned_brigadiers.all(), key=lambda brigadier: brigadier.pk, default=None)
+
+
+def _table_row(row_type, **values):
+    """Строка табличного дашборда: незаполненные колонки остаются пустыми"""
+    row = dict.fromkeys((
+        'uik_number', 'brigadier', 'agitators', 'managing_brigadier',
+        'plan_total', 'fact_total', 'plan_execution_percent',
+        'plan_12_sep', 'fact_12_sep', 'plan_12_percent',
+        'plan_13_sep', 'fact_13_sep', 'plan_13_percent',
+        'plan_14_sep', 'fact_14_sep', 'plan_14_percent',
+        'row_color', 'row_key',
+    ), '')
+    row['row_type'] = row_type
+    row.update(values)
+    return row
+
+
+def results_table_data():
+    """Строки и итоги дашборда «Результаты по агитаторам».
+
+    Структура: УИК -> Основной бригадир -> Агитаторы с указанием руководителя.
+    """
+    uiks = list(
+        UIK.objects
+        .select_related('brigadier')
+        .prefetch_related('agitators__assigned_brigadiers')
+        .order_by('number')
+    )
+    daily_map = {d.uik_id: d for d in UIKResultsDaily.objects.all()}
+    fact_counts = confirmed_fact_counts()
+
+    # Факты УИК включают всех избирателей участка, в том числе без агитатора
+    uik_facts = defaultdict(lambda: defaultdict(int))
+    for (uik_id, _agitator_id), by_date in fact_counts.items():
+        for voting_date, count in by_date.items():
+            uik_facts[uik_id][voting_date] += count
+
+    rows = []
+    plan_totals = dict.fromkeys(VOTING_DATES, 0)
+    fact_totals = dict.fromkeys(VOTING_DATES, 0)
+
+    for i, uik in enumerate(uiks):
+        daily = daily_map.get(uik.id)
+
+        # План берем из UIKResultsDaily (если нет — нули)
+        plans = dict(zip(VOTING_DATES, (
+            (daily.plan_12_sep, daily.plan_13_sep, daily.plan_14_sep) if daily else (0, 0, 0)
+        )))
+        facts = {d: uik_facts[uik.id][d] for d in VOTING_DATES}
+        plan_total = sum(plans.values())
+        fact_total = sum(facts.values())
+        total_percent = percent(fact_total, plan_total)
+
+        # Логика раскрашивания
+        if plan_total == 0:
+            row_color = 'yellow'  # Желтая строка если план = 0
+        elif total_percent >= 100:
+            row_color = 'success'
+        elif total_percent >= 80:
+            row_color = 'warning'
+        else:
+            row_color = 'danger-light'
+
+        main_brigadier_name = uik.brigadier.get_short_name() if uik.brigadier else '-'
+        d12, d13, d14 = VOTING_DATES
+
+        # Строка «Итого по УИК» (сначала)
+        rows.append(_table_row(
+            'total',
+            row_key=f'uik-{uik.number}',
+            uik_number=uik.number,
+            brigadier=main_brigadier_name,
+            agitators='Итого по УИК',
+            plan_total=plan_total,
+            fact_total=fact_total,
+            plan_execution_percent=total_percent,
+            plan_12_sep=plans[d12], fact_12_sep=facts[d12], plan_12_percent=percent(facts[d12], plans[d12]),
+            plan_13_sep=plans[d13], fact_13_sep=facts[d13], plan_13_percent=percent(facts[d13], plans[d13]),
+            plan_14_sep=plans[d14], fact_14_sep=facts[d14], plan_14_percent=percent(facts[d14], plans[d14]),
+            row_color=row_color,
+        ))
+
+        # Строки по каждому агитатору с указанием руководителя
+        for ag in uik.agitators.all():
+            managing_brigadier = _managing_brigadier(ag)
+            ag_facts = fact_counts.get((uik.id, ag.id), {})
+            a12, a13, a14 = (ag_facts.get(d, 0) for d in VOTING_DATES)
+
+            rows.append(_table_row(
+                'agitator',
+                row_key=f'uik-{uik.number}-agitator-{ag.id}',
+                uik_number=uik.number,
+                brigadier=main_brigadier_name,
+                agitators=ag.get_short_name(),
+                managing_brigadier=managing_brigadier.get_short_name() if managing_brigadier else '-',
+                fact_total=a12 + a13 + a14,
+                fact_12_sep=a12,
+                fact_13_sep=a13,
+                fact_14_sep=a14,
+            ))
+
+        # Добавляем разделитель между УИК (кроме последнего)
+        if i < len(uiks) - 1:
+            rows.append(_table_row('separator'))
+
+        for d in VOTING_DATES:
+            plan_totals[d] += plans[d]
+            fact_totals[d] += facts[d]
+
+    total_plan = sum(plan_totals.values())
+    total_fact = sum(fact_totals.values())
+    d12, d13, d14 = VOTING_DATES
+
+    return {
+        'uik_table_rows': rows,
+        'total_plan': total_plan,
+        'total_fact': total_fact,
+        'plan_execution_percent': percent(total_fact, total_plan),
+        'total_plan_12_sep': plan_totals[d12],
+        'total_plan_13_sep': plan_totals[d13],
+        'total_plan_14_sep': plan_totals[d14],
+        'total_12_sep': fact_totals[d12],
+        'total_13_sep': fact_totals[d13],
+        'total_14_sep': fact_totals[d14],
+        'plan_12_percent': percent(fact_totals[d12], plan_totals[d12]),
+        'plan_13_percent': percent(fact_totals[d13], plan_totals[d13]),
+        'plan_14_percent': percent(fact_totals[d14], plan_totals[d14]),
+    }
+
+
+class PlanFact:
+    """Счетчики плана (по planned_date) и факта (по voting_date) для строки дашборда"""
+
+    def __init__(self):
+        self.plan_total = 0
+        self.fact_total = 0
+        self.plan = dict.fromkeys(VOTING_DATES, 0)
+        self.fact = dict.fromkeys(VOTING_DATES, 0)
+
+    def add(self, other):
+        self.plan_total += other.plan_total
+        self.fact_total += other.fact_total
+        for d in VOTING_DATES:
+            self.plan[d] += other.plan[d]
+            self.fact[d] += other.fact[d]
+
+    @property
+    def is_empty(self):
+        return self.plan_total == 0 and self.fact_total == 0
+
+    def columns(self):
+        """Колонки план/факт/процент в формате шаблонов дашбордов"""
+        d12, d13, d14 = VOTING_DATES
+        return {
+            'fact_total': self.fact_total,
+            'plan_total': self.plan_total,
+            'plan_execution_percent': percent(self.fact_total, self.plan_total),
+            'plan_12_sep': self.plan[d12],
+            'fact_12_sep': self.fact[d12],
+            'plan_12_percent': percent(self.fact[d12], self.plan[d12]),
+            'plan_13_sep': self.plan[d13],
+            'fact_13_sep': self.fact[d13],
+            'plan_13_percent': percent(self.fact[d13], self.plan[d13]),
+            'plan_14_sep': self.plan[d14],
+            'fact_14_sep': self.fact[d14],
+            'plan_14_percent': percent(self.fact[d14], self.plan[d14]),
+        }
+
+
+def agitator_plan_facts():
+    """План и факт по парам (УИК, агитатор) одним групповым запросом по агрегату.
+
+    План — все избиратели агитатора (по planned_date), факт — подтвержденные
+    (по voting_date). Возвращает словарь {(uik_id, agitator_id): PlanFact}.
+    """
+    stats = defaultdict(PlanFact)
+    rows = (
+        VoterAggregate.objects
+        .filter(agitator__isnull=False)
+        .values('uik_id', 'agitator_id', 'planned_date', 'voting_date', 'confirmed_by_brigadier')
+        .annotate(count=Sum('count'))
+        .order_by()
+    )
+    for row in rows:
+        item = stats[(row['uik_id'], row['agitator_id'])]
+        count = row['count']
+        item.plan_total += count
+        if row['planned_date'] in item.plan:
+            item.plan[row['planned_date']] += count
+        if row['confirmed_by_brigadier']:
+            item.fact_total += count
+            if row['voting_date'] in item.fact:
+                item.fact[row['voting_date']] += count
+    return stats
+
+
+def brigadier_attribution():
+    """Распределение бригадир -> УИК -> агитаторы, рассчитанное в памяти.
+
+    Бригадир попадает в дашборд, если он основной бригадир УИК, дополнительный
+    бригадир (can_be_additional) или за ним закреплены агитаторы. УИК бригадира —
+    где он основной, дополнительный или работает закрепленный за ним агитатор.
+    Основному бригадиру достаются агитаторы УИК без руководителя и закрепленные
+    за ним, дополнительному — только закрепленные за ним.
+
+    Возвращает список [(бригадир, [(uik_id, номер УИК, [агитаторы]), ...]), ...].
+    """
+    uiks = list(UIK.objects.order_by('number').values_list('id', 'number', 'brigadier_id'))
+
+    additional_by_uik = defaultdict(set)
+    for uik_id, user_id in UIK.additional_brigadiers.through.objects.values_list('uik_id', 'user_id'):
+        additional_by_uik[uik_id].add(user_id)
+
+    agitators_by_uik = defaultdict(set)
+    for uik_id, user_id in UIK.agitators.through.objects.values_list('uik_id', 'user_id'):
+        agitators_by_uik[uik_id].add(user_id)
+
+    agitators_by_brigadier = defaultdict(set)
+    brigadiers_by_agitator = defaultdict(set)
+    for brigadier_id, agitator_id in User.assigned_agitators.through.objects.values_list('from_user_id', 'to_user_id'):
+        agitators_by_brigadier[brigadier_id].add(agitator_id)
+        brigadiers_by_agitator[agitator_id].add(brigadier_id)
+
+    users = list(
+        User.objects
+        .filter(Q(role='brigadier') | Q(assigned_uiks_as_agitator__isnull=False))
+        .distinct()
+        .order_by('last_name', 'first_name', 'middle_name')
+    )
+    # Порядок пользователей из БД сохраняется для сортировки агитаторов
+    position = {user.id: i for i, user in enumerate(users)}
+
+    main_ids = {brigadier_id for _, _, brigadier_id in uiks if brigadier_id}
+    additional_ids = set().union(*additional_by_uik.values())
+
+    result = []
+    for brigadier in users:
+        if brigadier.role != 'brigadier':
+            continue
+        if not (brigadier.id in main_ids
+                or (brigadier.can_be_additional and brigadier.id in additional_ids)
+                or agitators_by_brigadier[brigadier.id]):
+            continue
+
+        own_agitators = agitators_by_brigadier[brigadier.id]
+        brigadier_uiks = []
+        for uik_id, number, main_brigadier_id in uiks:
+            uik_agitators = agitators_by_uik[uik_id]
+            if not (main_brigadier_id == brigadier.id
+                    or brigadier.id in additional_by_uik[uik_id]
+                    or uik_agitators & own_agitators):
+                continue
+
+            if main_brigadier_id == brigadier.id:
+                agitator_ids = [a for a in uik_agitators
+                                if not brigadiers_by_agitator[a] or brigadier.id in brigadiers_by_agitator[a]]
+            else:
+                agitator_ids = [a for a in uik_agitators if brigadier.id in brigadiers_by_agitator[a]]
+
+            agitator_ids.sort(key=position.__getitem__)
+            brigadier_uiks.append((uik_id, number, [users[position[a]] for a in agitator_ids]))
+
+        result.append((brigadier, brigadier_uiks))
+    return result
+
+
+def results_by_brigadiers_data():
+    """Строки и итоги дашборда «Результаты по руководителям»"""
+    stats = agitator_plan_facts()
+    rows = []
+    grand_total = PlanFact()
+
+    for brigadier, brigadier_uiks in brigadier_attribution():
+        brigadier_total = PlanFact()
+        uik_rows = []
+
+        for uik_id, number, agitators in brigadier_uiks:
+            uik_total = PlanFact()
+            agitator_rows = []
+            for agitator in agitators:
+                agitator_stats = stats.get((uik_id, agitator.id), PlanFact())
+                uik_total.add(agitator_stats)
+                agitator_rows.append({
+                    'row_type': 'agitator',
+                    'row_key': f'brigadier-{brigadier.id}-uik-{number}-agitator-{agitator.id}',
+                    'brigadier': '',  # ПУСТАЯ ячейка для агитатора
+                    'uik_number': '|____',  # Символ для агитатора
+                    'agitator_name': agitator.get_short_name(),
+                    **agitator_stats.columns(),
+                })
+
+            # Сохраняем данные по УИК (если есть план или факт)
+            if uik_total.is_empty:
+                continue
+            uik_rows.append({
+                'row_type': 'uik_total',
+                'row_key': f'brigadier-{brigadier.id}-uik-{number}',
+                'brigadier': '|_______',  # Символ для УИК
+                'uik_number': f'L{number}',  # Галка в УИК
+                'agitator_name': f'Итого по УИК {number}',
+                **uik_total.columns(),
+            })
+            uik_rows.extend(agitator_rows)
+            brigadier_total.add(uik_total)
+
+        # Добавляем строку бригадира (если есть план или факт)
+        if brigadier_total.is_empty:
+            continue
+        rows.append({
+            'row_type': 'brigadier_total',
+            'row_key': f'brigadier-{brigadier.id}',
+            'brigadier': brigadier.get_short_name(),
+            'uik_number': '',
+            'agitator_name': f'ИТОГО по {brigadier.get_short_name()}',
+            **brigadier_total.columns(),
+        })
+        rows.extend(uik_rows)
+        grand_total.add(brigadier_total)
+
+    d12, d13, d14 = VOTING_DATES
+    return {
+        'brigadier_rows': rows,
+        'total_plan': grand_total.plan_total,
+        'total_fact': grand_total.fact_total,
+        'plan_execution_percent': percent(grand_total.fact_total, grand_total.plan_total),
+        'total_plan_12_sep': grand_total.plan[d12],
+        'total_12_sep': grand_total.fact[d12],
+        'plan_12_percent': percent(grand_total.fact[d12], grand_total.plan[d12]),
+        'total_plan_13_sep': grand_total.plan[d13],
+        'total_13_sep': grand_total.fact[d13],
+        'plan_13_percent': percent(grand_total.fact[d13], grand_total.plan[d13]),
+        'total_plan_14_sep': grand_total.plan[d14],
+        'total_14_sep': grand_total.fact[d14],
+        'plan_14_percent': percent(grand_total.fact[d14], grand_total.plan[d14]),
+    }
+
+
+# Группы агитаторов для фильтров дашборда результатов
+DMITRIEV_SURNAMES = [
+    'Дмитриев', 'Беруашвили', 'Горюнова', 'Гуличева',
+    'Косинова', 'Масленникова', 'Пахомова', 'Ситникова', 'Солодовникова'
+]
+GUTOROVA_SURNAME = 'Гуторова'
+
+# Организация с отдельной диаграммой на дашборде результатов
+VGKP3_WORKPLACE_NAME = 'БУЗ ВО "ВГКП № 3"'
+
+
+def compile_voter_filters(filters_data):
+    """Преобразует фильтры дашборда (из localStorage) в Q по избирателям.
+
+    Возвращает (Q, есть ли активные фильтры). Без активных фильтров Q пустой.
+    """
+    voter_filters = Q()
+
+    # Фильтруем агитаторов по группам
+    include_dmitriev = filters_data.get('includeDmitriev', True)
+    include_gutorova = filters_data.get('includeGutorova', True)
+    include_others = filters_data.get('includeOthers', True)
+    has_group_filter = not (include_dmitriev and include_gutorova and include_others)
+
+    if has_group_filter:
+        dmitriev_q = Q()
+        for surname in DMITRIEV_SURNAMES:
+            dmitriev_q |= Q(agitator__last_name__icontains=surname)
+
+        group_filters = Q()
+        if include_dmitriev:
+            group_filters |= dmitriev_q
+        if include_gutorova:
+            group_filters |= Q(agitator__last_name__icontains=GUTOROVA_SURNAME)
+        if include_others:
+            # Прочие - те, кто не относится к Дмитриеву и Гуторовой
+            others_q = Q()
+            for surname in DMITRIEV_SURNAMES:
+                others_q &= ~Q(agitator__last_name__icontains=surname)
+            others_q &= ~Q(agitator__last_name__icontains=GUTOROVA_SURNAME)
+            group_filters |= others_q
+        voter_filters &= group_filters
+
+    # Фильтр по группам мест работы активен только если выбраны не все группы
+    workplace_groups = filters_data.get('workplaceGroups', [])
+    all_groups = [choice[0] for choice in Workplace.GROUP_CHOICES]
+    has_workplace_filter = bool(workplace_groups) and len(workplace_groups) < len(all_groups)
+
+    if has_workplace_filter:
+        group_conditions = Q()
+        for group in workplace_groups:
+            if group == 'other':
+                # Для "Прочие" включаем избирателей с пустым workplace
+                group_conditions |= Q(workplace__isnull=True)
+            else:
+                group_conditions |= Q(workplace__group=group)
+        voter_filters &= group_conditions
+
+    return voter_filters, has_group_filter or has_workplace_filter
+
+
+def _chart_groups():
+    """Группы мест работы для диаграммы (без 'other')"""
+    return [choice[0] for choice in Workplace.GROUP_CHOICES if choice[0] != 'other']
+
+
+def voter_counts_by_uik(voter_filters):
+    """Все счетчики дашборда результатов одним запросом с GROUP BY uik.
+
+    Каждый показатель — отдельная колонка Count(..., filter=Q(...)).
+    Возвращает словарь {uik_id: {колонка: количество}}.
+    """
+    voted = Q(confirmed_by_brigadier=True, voting_date__isnull=False)
+    columns = {
+        'at_uik': Count('id', filter=voted & Q(voting_method='at_uik')),
+        'agitators_total': Count('id', filter=Q(is_agitator=True)),
+        'agitators_voted': Count('id', filter=voted & Q(is_agitator=True)),
+        'vgkp3_total': Count('id', filter=Q(workplace__name=VGKP3_WORKPLACE_NAME)),
+        'vgkp3_voted': Count('id', filter=voted & Q(workplace__name=VGKP3_WORKPLACE_NAME)),
+    }
+    for i, d in enumerate(VOTING_DATES):
+        confirmed_on_day = Q(confirmed_by_brigadier=True, voting_date=d)
+        columns[f'fact_{i}'] = Count('id', filter=confirmed_on_day)
+        columns[f'at_uik_{i}'] = Count('id', filter=confirmed_on_day & Q(voting_method='at_uik'))
+    for group in _chart_groups():
+        columns[f'group_{group}_total'] = Count('id', filter=Q(workplace__group=group))
+        columns[f'group_{group}_voted'] = Count('id', filter=voted & Q(workplace__group=group))
+
+    rows = Voter.objects.filter(voter_filters).values('uik_id').annotate(**columns).order_by()
+    return {row.pop('uik_id'): row for row in rows}
+
+
+def _execution_row_color(plan, execution_percent):
+    """Цвет строки по проценту выполнения плана"""
+    if plan == 0:
+        return 'yellow'  # Желтый для плана = 0
+    if execution_percent >= 100:
+        return 'success'  # Зеленый
+    if execution_percent >= 80:
+        return 'warning'  # Оранжевый
+    if execution_percent >= 60:
+        return 'danger-light'  # Светло-красный
+    return 'danger'  # Красный
+
+
+def results_dashboard_data(filters_data):
+    """KPI, диаграммы и таблица дашборда «Результаты голосования».
+
+    Фильтры компилируются в один запрос (см. voter_counts_by_uik); без фильтров
+    факты берутся из UIKResultsDaily с учетом блокировок.
+    """
+    daily_data = list(
+        UIKResultsDaily.objects
+        .select_related('uik__brigadier')
+        .prefetch_related('uik__agitators')
+    )
+    if not daily_data:
+        return None
+
+    voter_filters, has_active_filters = compile_voter_filters(filters_data)
+    counts = voter_counts_by_uik(voter_filters)
+
+    # Учитываем только УИК, для которых есть UIKResultsDaily
+    totals = defaultdict(int)
+    for item in daily_data:
+        for column, value in counts.get(item.uik_id, {}).items():
+            totals[column] += value
+
+    uik_table_data = []
+    plan_by_day = [0, 0, 0]
+    fact_by_day = [0, 0, 0]
+    for item in daily_data:
+        plans = (item.plan_12_sep, item.plan_13_sep, item.plan_14_sep)
+        if has_active_filters:
+            uik_counts = counts.get(item.uik_id, {})
+            facts = tuple(uik_counts.get(f'fact_{i}', 0) for i in range(len(VOTING_DATES)))
+        else:
+            # Нет фильтров - используем эффективные факты (учитывают блокировки)
+            facts = (item.get_effective_fact_12_sep(), item.get_effective_fact_13_sep(), item.get_effective_fact_14_sep())
+        for i in range(len(VOTING_DATES)):
+            plan_by_day[i] += plans[i]
+            fact_by_day[i] += facts[i]
+
+        fact_total = sum(facts)
+        execution_percent = percent(fact_total, item.total_plan)
+
+        # Информация о бригадире и агитаторах для tooltip
+        brigadier = item.uik.brigadier
+        if brigadier:
+            brigadier_phone = f" - {brigadier.phone_number}" if brigadier.phone_number else ""
+            brigadier_info = f"{brigadier.get_short_name()}{brigadier_phone}"
+        else:
+            brigadier_info = 'Не назначен'
+
+        agitators_info = []
+        for agitator in item.uik.agitators.all():
+            agitator_phone = f" - {agitator.phone_number}" if agitator.phone_number else ""
+            agitators_info.append(f"{agitator.get_short_name()}{agitator_phone}")
+
+        uik_table_data.append({
+            'uik_number': item.uik.number,
+            'plan_total': item.total_plan,
+            'fact_total': fact_total,
+            'plan_execution_percent': execution_percent,
+            'row_color': _execution_row_color(item.total_plan, execution_percent),
+            'plan_12_sep': plans[0],
+            'fact_12_sep': facts[0],
+            'plan_12_percent': percent(facts[0], plans[0]),
+            'plan_13_sep': plans[1],
+            'fact_13_sep': facts[1],
+            'plan_13_percent': percent(facts[1], plans[1]),
+            'plan_14_sep': plans[2],
+            'fact_14_sep': facts[2],
+            'plan_14_percent': percent(facts[2], plans[2]),
+            'brigadier': brigadier_info,
+            'agitators': ', '.join(agitators_info) if agitators_info else 'Не назначены',
+            'agitators_list': agitators_info,  # Список для отдельного отображения
+        })
+
+    uik_table_data.sort(key=lambda x: x['uik_number'])
+
+    total_plan = sum(plan_by_day)
+    total_fact = sum(fact_by_day)
+    at_uik_by_day = [totals[f'at_uik_{i}'] for i in range(len(VOTING_DATES))]
+
+    # Голосование по группам мест работы (без 'other') + агитаторы
+    groups = _chart_groups()
+    group_names = dict(Workplace.GROUP_CHOICES)
+    workplace_groups_data = {
+        'labels': [group_names.get(group, group) for group in groups] + ['Агитаторы'],
+        'total_data': [totals[f'group_{group}_total'] for group in groups] + [totals['agitators_total']],
+        'voted_data': [totals[f'group_{group}_voted'] for group in groups] + [totals['agitators_voted']],
+        'colors': ['#3b82f6', '#8b5cf6', '#f59e0b', '#ef4444', '#10b981', '#f97316', '#84cc16', '#06b6d4']
+    }
+
+    return {
+        'total_plan': total_plan,
+        'total_fact': total_fact,
+        'plan_execution_percent': percent(total_fact, total_plan),
+        'total_at_uik': totals['at_uik'],
+        # На дому = общий факт - В УИК
+        'total_at_home': total_fact - totals['at_uik'],
+        'total_plan_12_sep': plan_by_day[0],
+        'total_12_sep': fact_by_day[0],
+        'total_12_sep_uik': at_uik_by_day[0],
+        'total_12_sep_home': fact_by_day[0] - at_uik_by_day[0],
+        'plan_12_percent': percent(fact_by_day[0], plan_by_day[0]),
+        'total_plan_13_sep': plan_by_day[1],
+        'total_13_sep': fact_by_day[1],
+        'total_13_sep_uik': at_uik_by_day[1],
+        'total_13_sep_home': fact_by_day[1] - at_uik_by_day[1],
+        'plan_13_percent': percent(fact_by_day[1], plan_by_day[1]),
+        'total_plan_14_sep': plan_by_day[2],
+        'total_14_sep': fact_by_day[2],
+        'total_14_sep_uik': at_uik_by_day[2],
+        'total_14_sep_home': fact_by_day[2] - at_uik_by_day[2],
+        'plan_14_percent': percent(fact_by_day[2], plan_by_day[2]),
+        'uik_table_data': uik_table_data,
+        'last_update_time': max(item.updated_at for item in daily_data),
+        # Данные для диаграмм
+        'voting_status_data': {
+            'labels': ['Проголосовали', 'Осталось по плану'],
+            'data': [total_fact, total_plan - total_fact],
+            'colors': ['#10b981', '#f59e0b']
+        },
+        'workplace_groups_data': workplace_groups_data,
+        'vgkp3_data': {
+            'labels': ['Проголосовали', 'Осталось по плану'],
+            'data': [totals['vgkp3_voted'], totals['vgkp3_total'] - totals['vgkp3_voted']],
+            'colors': ['#10b981', '#f59e0b'],
+            'title': VGKP3_WORKPLACE_NAME
+        },
+    }
@@ -0,0 +1,229 @@
+"""Массовые изменения избирателей без поштучных save().
+
+Избиратели проверяются в памяти (Voter.clean() по снимку загруженных значений,
+кэшу блокировок дат и кэшу УИК агитаторов), а изменения
+записываются bulk_update пачками в одной транзакции. Сигналы при этом не
+срабатывают, поэтому агрегат избирателей, факты УИК, версия дашбордов и
+живые дашборды обновляются здесь же: агрегат пересобирается, а факты
+пересчитываются один раз для каждого затронутого УИК.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .dashboard_cache import bump_data_version
+from .live import publish_fact_changes
+from .models import Voter, VoterAggregate, UIKResultsDaily, VotingDateBlock
+
+# Размер пачки для чтения и bulk_update
+CHUNK_SIZE = 500
+
+
+def load_voters(voter_ids):
+    """Избиратели по списку ID (пачками) вместе с местом работы и агитатором"""
+    voter_ids = list(voter_ids)
+    voters = []
+    for start in range(0, len(voter_ids), CHUNK_SIZE):
+        voters.extend(
+            Voter.objects
+            .filter(id__in=voter_ids[start:start + CHUNK_SIZE])
+            .select_related('workplace', 'agitator')
+        )
+    # Порядок как у Voter.objects (по ФИО)
+    voters.sort(key=lambda voter: (voter.last_name, voter.first_name))
+    return voters
+
+
+def bulk_save_voters(voters, fields, user=None):
+    """Сохраняет измененных в памяти избирателей пачками в одной транзакции.
+
+    Снимок get_stored_values() у избирателей должен описывать их состояние в
+    БД до изменений: по нему определяются затронутые УИК и изменения фактов.
+    Возвращает множество ID УИК, факты которых пересчитаны.
+    """
+    if not voters:
+        return set()
+
+    now = timezone.now()
+    aggregate_uik_ids = set()
+    fact_changes = []
+    dirty_uik_ids = set()
+    for voter in voters:
+        old_key = VoterAggregate.stored_key_for_voter(voter)
+        new_key = VoterAggregate.key_for_voter(voter)
+        if old_key != new_key:
+            aggregate_uik_ids.update(key[0] for key in (old_key, new_key) if key)
+            old_fact, new_fact = VoterAggregate.fact_of(old_key), VoterAggregate.fact_of(new_key)
+            if old_fact != new_fact:
+                fact_changes.append((old_fact, new_fact))
+                dirty_uik_ids.update(fact[0] for fact in (old_fact, new_fact) if fact)
+        voter.updated_at = now
+        if user is not None:
+            voter.updated_by = user
+
+    fields = list(fields) + ['updated_at'] + (['updated_by'] if user is not None else [])
+    with transaction.atomic():
+        for start in range(0, len(voters), CHUNK_SIZE):
+            Voter.objects.bulk_update(voters[start:start + CHUNK_SIZE], fields)
+        # Пачка затрагивает много ячеек агрегата: пересборка по УИК дешевле дельт
+        if aggregate_uik_ids:
+            VoterAggregate.rebuild(aggregate_uik_ids)
+        if dirty_uik_ids:
+            UIKResultsDaily.recalculate_uiks(dirty_uik_ids)
+        bump_data_version()
+        if fact_changes:
+            transaction.on_commit(lambda: publish_fact_changes(fact_changes))
+
+    for voter in voters:
+        voter._remember_stored_values(voter._tracked_values())
+    return dirty_uik_ids
+
+
+def reassign_voters(voters, uik_id, agitator_id=None, user=None):
+    """Переводит избирателей выборки voters в УИК uik_id (и к агитатору
+    agitator_id, если он указан; иначе агитатор не меняется).
+
+    Одним UPDATE (с updated_at/updated_by) без поштучных save(): проверки
+    Voter.clean(), зависящие от агитатора, выполняет вызывающий код, остальные
+    поля избирателей не меняются. Агрегат пересобирается, а факты
+    пересчитываются один раз для старых и нового УИК (только если УИК
+    меняется). Возвращает количество перенесенных избирателей.
+    """
+    with transaction.atomic():
+        old_uik_ids = set(voters.order_by().values_list('uik_id', flat=True).distinct())
+        # Подтвержденные голоса переходят к новому агитатору и УИК
+        confirmed = list(
+            voters
+            .filter(confirmed_by_brigadier=True, voting_date__isnull=False)
+            .values_list('uik_id', 'agitator_id', 'voting_date')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+
+        values = {'uik_id': uik_id, 'updated_at': timezone.now()}
+        if agitator_id is not None:
+            values['agitator_id'] = agitator_id
+        if user is not None:
+            values['updated_by'] = user
+        updated = voters.update(**values)
+        if not updated:
+            return 0
+
+        uik_ids = old_uik_ids | {uik_id}
+        VoterAggregate.rebuild(uik_ids)
+        if old_uik_ids != {uik_id}:
+            UIKResultsDaily.recalculate_uiks(uik_ids)
+        bump_data_version()
+
+        fact_changes = [
+            ((old_uik_id, old_agitator_id, voting_date),
+             (uik_id, old_agitator_id if agitator_id is None else agitator_id, voting_date))
+            for old_uik_id, old_agitator_id, voting_date, total in confirmed
+            for _ in range(total)
+        ]
+        if fact_changes:
+            transaction.on_commit(lambda: publish_fact_changes(fact_changes))
+    return updated
+
+
+def bulk_confirm_voters(voter_ids, voting_date=None, voting_method=None, confirmed_by_brigadier=False, user=None):
+    """Массовое подтверждение избирателей с правилами действия админки.
+
+    Для каждого избирателя: дата и способ голосования заполняются, только если
+    они пусты и голос не подтвержден, подтверждение ставится или снимается
+    (снять нельзя, если дата заблокирована). Причины пропуска и ошибки
+    валидации — те же, что при поштучном сохранении.
+
+    Возвращает счетчики и полные списки строк результата:
+    {'updated', 'skipped', 'errors', 'updated_list', 'skipped_list', 'error_list', 'rows'},
+    где rows — [{'voter_id', 'name', 'status': 'updated'|'skipped'|'error', 'messages'}].
+    """
+    voters = load_voters(voter_ids)
+
+    result = {
+        'updated': 0, 'skipped': 0, 'errors': 0,
+        'updated_list': [], 'skipped_list': [], 'error_list': [], 'rows': [],
+    }
+    to_save = []
+
+    for voter in voters:
+        label = f"ID {voter.id} ({voter.get_full_name()})"
+        changes = []
+        skip_reasons = []
+        original = voter._tracked_values()
+
+        # Дата голосования
+        if not voter.voting_date and voting_date:
+            # Блокируем установку дат для подтвержденных голосований
+            if voter.confirmed_by_brigadier:
+                skip_reasons.append("нельзя установить дату для подтвержденного голосования")
+            else:
+                voter.voting_date = voting_date
+                changes.append("дата голосования")
+        elif voter.voting_date:
+            if voter.confirmed_by_brigadier:
+                skip_reasons.append(f"дата голосования {voter.voting_date.strftime('%d.%m.%Y')} заблокирована (подтверждено)")
+            elif voting_date and voting_date != voter.voting_date:
+                skip_reasons.append(f"дата голосования уже заполнена ({voter.voting_date.strftime('%d.%m.%Y')})")
+
+        # Способ голосования
+        if not voter.voting_method and voting_method:
+            # Блокируем установку способа голосования для подтвержденных голосований
+            if voter.confirmed_by_brigadier:
+                skip_reasons.append("нельзя установить способ голосования для подтвержденного голосования")
+            else:
+                voter.voting_method = voting_method
+                changes.append("способ голосования")
+        elif voter.voting_method:
+            if voter.confirmed_by_brigadier:
+                skip_reasons.append("способ голосования заблокирован (подтверждено)")
+            elif voting_method and voting_method != voter.voting_method:
+                skip_reasons.append(f"способ голосования уже заполнен ({voter.get_voting_method_display()})")
+
+        # Подтверждение бригадиром
+        if confirmed_by_brigadier and not voter.confirmed_by_brigadier:
+            voter.confirmed_by_brigadier = True
+            changes.append("подтверждение бригадиром")
+        elif voter.confirmed_by_brigadier and not confirmed_by_brigadier:
+            # Снять подтверждение нельзя, если дата заблокирована
+            if voter.voting_date and VotingDateBlock.is_date_blocked(voter.voting_date):
+                skip_reasons.append(f"нельзя снять подтверждение, дата {voter.voting_date.strftime('%d.%m.%Y')} заблокирована")
+            else:
+                voter.confirmed_by_brigadier = False
+                changes.append("снятие подтверждения бригадиром")
+        elif voter.confirmed_by_brigadier:
+            skip_reasons.append("уже подтверждено бригадиром")
+
+        result['skipped_list'].extend(f"{label} - {reason}" for reason in skip_reasons)
+
+        if not changes:
+            result['skipped'] += 1
+            result['rows'].append({'voter_id': voter.id, 'name': voter.get_full_name(),
+                                   'status': 'skipped', 'messages': skip_reasons})
+            continue
+
+        # Как в Voter.save(): УИК избирателя берется из УИК агитатора
+        voter.assign_agitator_uik()
+
+        try:
+            voter.clean()
+        except ValidationError as e:
+            errors = [f"{field}: {error}" for field, field_errors in e.message_dict.items() for error in field_errors]
+            result['errors'] += 1
+            result['error_list'].extend(f"{label}: {error}" for error in errors)
+            result['rows'].append({'voter_id': voter.id, 'name': voter.get_full_name(),
+                                   'status': 'error', 'messages': errors})
+            # Возвращаем значения, чтобы избиратель не попал в сохранение
+            for field, value in original.items():
+                setattr(voter, field, value)
+            continue
+
+        to_save.append(voter)
+        result['updated'] += 1
+        result['updated_list'].append(f"{label} - обновлено: {', '.join(changes)}")
+        result['rows'].append({'voter_id': voter.id, 'name': voter.get_full_name(),
+                               'status': 'updated', 'messages': changes + skip_reasons})
+
+    bulk_save_voters(to_save, ['voting_date', 'voting_method', 'confirmed_by_brigadier', 'uik'], user=user)
+    return result
@@ -0,0 +1,184 @@
+"""Кэш дашбордов с версионированием данных.
+
+Ключ записи — (дашборд, нормализованные фильтры, роль пользователя), а внутри
+записи хранится версия данных, на которой она посчитана. Версия — значение в
+кэше, которое заменяется новым после коммита любой записи в Voter, UIK,
+UIKResultsDaily и UIKAnalysis (см. сигналы в models.py). Новая версия - время
+в микросекундах (не меньше прежней версии + 1, точно представимо числом в
+JavaScript), а не инкремент счетчика: incr файлового кэша - неатомарные
+чтение и запись, и два одновременных коммита записали бы одну и ту же версию,
+а дашборд, посчитанный между ними, остался бы в кэше с устаревшими данными.
+
+Если версия устарела, пересчитывает только тот запрос, который первым взял
+блокировку; остальные в это время получают предыдущий результат
+(stale-while-revalidate). Так сто наблюдателей одного дашборда стоят
+один пересчет на изменение данных, а не один пересчет на запрос. Блокировка
+(cache.add) на файловом кэше неатомарна и только снижает число повторных
+пересчетов: изредка дашборд посчитают два запроса сразу, что безопасно.
+
+Для JSON-эндпоинтов дашбордов (/dashboard/<name>/data/) запоминаются
+отпечатки строк по версиям, чтобы отдавать только изменившиеся строки.
+"""
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+DATA_VERSION_KEY = 'dashboard:data_version'
+
+# Время жизни записи дашборда и блокировки пересчета (в секундах)
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60 * 60 * 24)
+DASHBOARD_LOCK_TIMEOUT = getattr(settings, 'DASHBOARD_LOCK_TIMEOUT', 30)
+# Сколько хранить отпечатки строк для запросов since=<версия>
+DASHBOARD_ROW_HISTORY_TIMEOUT = getattr(settings, 'DASHBOARD_ROW_HISTORY_TIMEOUT', 60 * 30)
+
+
+def get_data_version():
+    """Текущая версия данных дашбордов.
+
+    Если версия потеряна (перезапуск или вытеснение из кэша), начинаем с
+    текущего времени, чтобы не совпасть со старыми версиями.
+    """
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, _now_version(), timeout=None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    """Меняет версию данных сразу (вне транзакции) или после коммита."""
+    transaction.on_commit(_set_new_data_version)
+
+
+def _now_version():
+    return time.time_ns() // 1000
+
+
+def _set_new_data_version():
+    current = cache.get(DATA_VERSION_KEY) or 0
+    cache.set(DATA_VERSION_KEY, max(_now_version(), current + 1), timeout=None)
+
+
+def normalize_filters(raw_filters):
+    """Приводит JSON фильтров из GET к каноническому виду для ключа кэша."""
+    try:
+        filters_data = json.loads(raw_filters or '{}')
+    except (TypeError, ValueError):
+        return '{}'
+    if not isinstance(filters_data, dict):
+        return '{}'
+    normalized = {
+        key: sorted(value, key=str) if isinstance(value, list) else value
+        for key, value in filters_data.items()
+    }
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+
+
+def role_scope(user):
+    """Область видимости пользователя для ключа кэша."""
+    if not getattr(user, 'is_authenticated', False):
+        return 'anonymous'
+    if user.is_superuser:
+        return 'superuser'
+    return getattr(user, 'role', '') or 'user'
+
+
+def dashboard_cache_key(name, request, use_filters=False):
+    filters = normalize_filters(request.GET.get('filters')) if use_filters else '{}'
+    scope = role_scope(getattr(request, 'user', None))
+    filters_hash = hashlib.md5(filters.encode('utf-8')).hexdigest()
+    return f'dashboard:{name}:{scope}:{filters_hash}'
+
+
+def get_cached_dashboard_entry(name, request, compute, use_filters=False):
+    """Возвращает (версия данных, данные дашборда) из кэша или пересчитывает их.
+
+    compute() должна вернуть словарь для контекста шаблона. Если отдан
+    предыдущий результат (пересчет идет в другом запросе), версия будет
+    старше текущей.
+    """
+    key = dashboard_cache_key(name, request, use_filters)
+    version = get_data_version()
+    entry = cache.get(key)
+    if entry is not None and entry['version'] == version:
+        return entry['version'], entry['data']
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, version, timeout=DASHBOARD_LOCK_TIMEOUT):
+        # Пересчет уже идет в другом запросе — отдаем предыдущий результат
+        if entry is not None:
+            return entry['version'], entry['data']
+        return version, compute()
+
+    try:
+        data = compute()
+        cache.set(key, {'version': version, 'data': data}, timeout=DASHBOARD_CACHE_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+    return version, data
+
+
+def get_cached_dashboard(name, request, compute, use_filters=False):
+    """Данные дашборда из кэша (см. get_cached_dashboard_entry)."""
+    return get_cached_dashboard_entry(name, request, compute, use_filters)[1]
+
+
+def _row_fingerprints(rows, row_key):
+    return {
+        str(row_key(row)): hashlib.md5(
+            json.dumps(row, sort_keys=True, cls=DjangoJSONEncoder).encode('utf-8')
+        ).hexdigest()
+        for row in rows
+    }
+
+
+def changed_dashboard_rows(name, request, version, rows, row_key, since=None, use_filters=False):
+    """Строки дашборда, изменившиеся с версии since.
+
+    Отпечатки строк запоминаются для каждой отданной версии на
+    DASHBOARD_ROW_HISTORY_TIMEOUT. Возвращает (измененные строки, ключи
+    удаленных строк) или None, если отпечатков версии since уже нет и
+    клиенту нужно отдать все строки.
+    """
+    base_key = dashboard_cache_key(name, request, use_filters)
+    rows_key = f'{base_key}:rows:{version}'
+    current = cache.get(rows_key)
+    if current is None:
+        current = _row_fingerprints(rows, row_key)
+        cache.set(rows_key, current, timeout=DASHBOARD_ROW_HISTORY_TIMEOUT)
+
+    if since is None:
+        return None
+    previous = cache.get(f'{base_key}:rows:{since}')
+    if previous is None:
+        return None
+
+    changed = [row for row in rows if previous.get(str(row_key(row))) != current[str(row_key(row))]]
+    removed = [key for key in previous if key not in current]
+    return changed, removed
+
+
+def cached_dashboard(name, use_filters=False):
+    """Декоратор для callback дашборда вида callback(request, context).
+
+    Кэшируется только то, что callback добавляет в контекст; сам контекст
+    (например, контекст админки Unfold) берется из текущего запроса.
+    """
+    def decorator(callback):
+        @wraps(callback)
+        def wrapper(request, context):
+            data = get_cached_dashboard(
+                name, request, lambda: callback(request, {}), use_filters=use_filters
+            )
+            context.update(data)
+            return context
+        wrapper.dashboard_name = name
+        wrapper.use_filters = use_filters
+        return wrapper
+    return decorator
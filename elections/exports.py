@@ -0,0 +1,127 @@
+"""Выгрузка избирателей большими выборками.
+
+Избиратели читаются пачками (iterator) вместе со связанными УИК, бригадиром,
+агитатором и местом работы, поэтому запросов столько же, сколько пачек, а не
+строк. Excel пишется xlsxwriter в режиме constant_memory во временный файл и
+отдается потоком (FileResponse), так что память не растет с числом строк.
+CSV собирается из values_list со связанными именами и отдается по мере
+чтения строк (StreamingHttpResponse).
+"""
+import csv
+import tempfile
+
+import xlsxwriter
+from django.http import FileResponse, StreamingHttpResponse
+
+from .models import Voter
+
+# Размер пачки при чтении избирателей
+CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Столбцы CSV (как в выгрузке в Excel) и поля values_list для них
+CSV_HEADERS = (
+    'ID', 'Фамилия', 'Имя', 'Отчество', 'Дата рождения', 'Адрес регистрации', 'Телефон',
+    'Место работы', 'Номер УИК', 'Адрес УИК', 'Бригадир', 'Агитатор',
+    'Планируемая дата голосования', 'Дата голосования', 'Способ голосования',
+    'Подтверждено бригадиром', 'Является агитатором', 'Голосование на дому',
+    'Дата создания', 'Дата обновления',
+)
+CSV_FIELDS = (
+    'id', 'last_name', 'first_name', 'middle_name', 'birth_date', 'registration_address', 'phone_number',
+    'workplace__name', 'uik__number', 'uik__address',
+    'uik__brigadier__last_name', 'uik__brigadier__first_name', 'uik__brigadier__middle_name',
+    'agitator__last_name', 'agitator__first_name', 'agitator__middle_name',
+    'planned_date', 'voting_date', 'voting_method',
+    'confirmed_by_brigadier', 'is_agitator', 'is_home_voting', 'created_at', 'updated_at',
+)
+
+
+def iter_voters(queryset, chunk_size=CHUNK_SIZE):
+    """Избиратели выборки пачками со связанными объектами выгрузки"""
+    return (
+        queryset
+        .select_related('workplace', 'uik__brigadier', 'agitator')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def write_xlsx(output, headers, rows, title='Избиратели'):
+    """Записывает строки rows в книгу XLSX output построчно (constant_memory)"""
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet(title)
+    worksheet.freeze_panes(1, 0)
+    worksheet.write_row(0, 0, headers, workbook.add_format({'bold': True}))
+    for number, row in enumerate(rows, start=1):
+        worksheet.write_row(number, 0, row)
+    workbook.close()
+
+
+def xlsx_response(filename, headers, rows, title='Избиратели'):
+    """Потоковый ответ с книгой XLSX, собранной во временном файле"""
+    output = tempfile.TemporaryFile()
+    try:
+        write_xlsx(output, headers, rows, title=title)
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+def short_name(last_name, first_name, middle_name):
+    """Фамилия И.О. по частям имени (как User.get_short_name); '-' - нет пользователя"""
+    if last_name is None:
+        return '-'
+    first_initial = first_name[0] + '.' if first_name else ''
+    middle_initial = middle_name[0] + '.' if middle_name else ''
+    return f"{last_name} {first_initial}{middle_initial}".strip()
+
+
+def csv_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Строки CSV выгрузки (с заголовком) по выборке избирателей; значения
+    форматируются как в выгрузке в Excel"""
+    methods = dict(Voter._meta.get_field('voting_method').choices)
+
+    def day(value):
+        return value.strftime('%d.%m.%Y') if value else '-'
+
+    def moment(value):
+        return value.strftime('%d.%m.%Y %H:%M') if value else '-'
+
+    def yes_no(value):
+        return 'Да' if value else 'Нет'
+
+    yield CSV_HEADERS
+    for (voter_id, last_name, first_name, middle_name, birth_date, address, phone,
+         workplace, uik_number, uik_address, b_last, b_first, b_middle, a_last, a_first, a_middle,
+         planned_date, voting_date, voting_method, confirmed, is_agitator, is_home_voting,
+         created_at, updated_at) in queryset.values_list(*CSV_FIELDS).iterator(chunk_size=chunk_size):
+        yield (
+            voter_id, last_name, first_name, middle_name, day(birth_date), address, phone,
+            workplace, uik_number, uik_address, short_name(b_last, b_first, b_middle), short_name(a_last, a_first, a_middle),
+            day(planned_date), day(voting_date), methods.get(voting_method, voting_method) if voting_method else '-',
+            yes_no(confirmed), yes_no(is_agitator), yes_no(is_home_voting), moment(created_at), moment(updated_at),
+        )
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает записанную строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def csv_response(filename, queryset, chunk_size=CHUNK_SIZE):
+    """Потоковый ответ CSV (UTF-8 с BOM для Excel): строки отдаются по мере чтения пачек"""
+    writer = csv.writer(Echo())
+
+    def content():
+        yield '\ufeff'
+        for row in csv_rows(queryset, chunk_size=chunk_size):
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(content(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,416 @@
+"""Потоковый импорт избирателей из XLSX (команда import_voters и фоновая задача).
+
+Книга читается openpyxl в режиме read_only построчно, строки обрабатываются
+пачками: разбор и проверки по тем же правилам, что у VoterResource и
+Voter.clean(), затем одна выборка существующих избирателей и
+bulk_create/bulk_update на пачку. Каждая пачка фиксируется своей короткой
+транзакцией, чтобы импорт не держал блокировку записи SQLite и сохранения из
+админки шли параллельно с ним. Сигналы при этом не срабатывают, поэтому
+агрегат избирателей, факты затронутых УИК и версия дашбордов обновляются
+один раз в конце, отдельной короткой транзакцией (и после ошибки - для уже
+зафиксированных пачек). Проверка (dry_run) идет в одной транзакции, которая
+откатывается.
+
+Даты и булевы флаги разбираются для всей пачки сразу (normalize_columns,
+столбцы pandas), в цикле по строкам остаются поиск по справочникам и проверки.
+
+Заголовки столбцов — имена полей, как в шаблоне импорта VoterResource.
+Существующий избиратель ищется по ФИО и дате рождения (import_id_fields),
+столбцы, которых нет в файле, не меняются, неизмененные строки пропускаются.
+"""
+from datetime import date
+
+import pandas as pd
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from .dashboard_cache import bump_data_version
+from .models import UIK, User, Voter, VoterAggregate, UIKResultsDaily, Workplace, VOTING_DATES
+
+# Размер пачки строк
+CHUNK_SIZE = 1000
+
+# Форматы дат в текстовых ячейках
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y')
+
+TRUE_VALUES = {'true', '1', 'да', 'yes'}
+FALSE_VALUES = {'false', '0', 'нет', 'no'}
+
+# Ключ избирателя (import_id_fields VoterResource)
+KEY_FIELDS = ('last_name', 'first_name', 'middle_name', 'birth_date')
+TEXT_FIELDS = ('last_name', 'first_name', 'middle_name', 'registration_address', 'phone_number', 'voting_method')
+BOOLEAN_FIELDS = ('is_agitator', 'is_home_voting', 'confirmed_by_brigadier')
+DATE_FIELDS = ('birth_date', 'planned_date', 'voting_date')
+FOREIGN_KEY_FIELDS = ('workplace', 'uik', 'agitator')
+IMPORT_FIELDS = TEXT_FIELDS + BOOLEAN_FIELDS + DATE_FIELDS + FOREIGN_KEY_FIELDS
+
+DATE_LABELS = {'birth_date': 'даты рождения', 'planned_date': 'даты планирования', 'voting_date': 'даты голосования'}
+# Даты, которые должны попадать в дни голосования
+VOTING_DATE_ERRORS = {
+    'planned_date': "Планируемая дата должна быть 12, 13 или 14 сентября 2025 года, получена: {}",
+    'voting_date': "Дата голосования должна быть 12, 13 или 14 сентября 2025 года, получена: {}",
+}
+
+
+def empty_mask(column):
+    """Маска пустых ячеек столбца (None, NaN или пробелы)"""
+    return column.isna() | (column.astype(str).str.strip() == '')
+
+
+def parse_dates(column):
+    """Столбец ячеек -> (даты date/None, маска непустых ячеек, не похожих на дату).
+
+    Ячейки с датой/временем берутся как есть, текст разбирается по DATE_FORMATS:
+    каждый формат применяется ко всем еще не разобранным ячейкам сразу.
+    """
+    empty = empty_mask(column)
+    is_date = column.map(lambda value: isinstance(value, date))
+    parsed = pd.Series(pd.NaT, index=column.index, dtype='datetime64[ns]')
+    if is_date.any():
+        parsed[is_date] = pd.to_datetime(column[is_date], errors='coerce')
+    text = column.astype(str).str.strip()
+    for date_format in DATE_FORMATS:
+        pending = parsed.isna() & ~empty & ~is_date
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(text[pending], format=date_format, errors='coerce')
+    dates = parsed.dt.date.astype(object).where(parsed.notna(), None)
+    return dates, parsed.isna() & ~empty
+
+
+def parse_bools(column):
+    """Столбец ячеек -> булевы значения (да/нет, true/false, 1/0); пусто - False"""
+    text = column.astype(str).str.strip().str.lower()
+    values = column.astype(bool)
+    values[text.isin(FALSE_VALUES)] = False
+    values[text.isin(TRUE_VALUES)] = True
+    values[empty_mask(column)] = False
+    return values
+
+
+def normalize_columns(records):
+    """Пред-проход пачки строк: даты и булевы флаги разбираются столбцами.
+
+    records - список строк {поле: значение}. Возвращает (values, errors):
+    для каждой строки - разобранные даты и флаги из DATE_FIELDS/BOOLEAN_FIELDS
+    (только столбцы, которые есть в строках) и список ошибок: нераспознанные
+    даты и даты голосования вне VOTING_DATES (пустой - ошибок нет).
+    """
+    errors = [[] for _ in records]
+    if not records:
+        return [], errors
+
+    frame = pd.DataFrame(records, dtype=object)
+    columns = {}
+    for field in DATE_FIELDS:
+        if field not in frame:
+            continue
+        columns[field], invalid = parse_dates(frame[field])
+        for index in invalid[invalid].index:
+            errors[index].append(f"Некорректный формат {DATE_LABELS[field]}: {records[index][field]}")
+    for field, message in VOTING_DATE_ERRORS.items():
+        if field not in columns:
+            continue
+        dates = columns[field]
+        outside = dates.notna() & ~dates.isin(VOTING_DATES)
+        for index in outside[outside].index:
+            errors[index].append(message.format(dates[index]))
+    for field in BOOLEAN_FIELDS:
+        if field in frame:
+            columns[field] = parse_bools(frame[field])
+
+    if not columns:
+        return [{} for _ in records], errors
+    return pd.DataFrame(columns).to_dict('records'), errors
+
+
+def parse_text(value):
+    """Текст ячейки; целые числа (телефоны) без дробной части"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def parse_id(value):
+    """ID из ячейки; None - пусто. ValueError, если это не число"""
+    if value in (None, ''):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return int(str(value).strip())
+
+
+class ImportLookups:
+    """Справочники для ссылок в строках импорта: места работы, пользователи и УИК.
+
+    Загружаются одним запросом на таблицу один раз на импорт и общие для всех
+    ресурсов импорта, поэтому разрешение ссылки в строке не обращается к БД.
+    Ссылка в ячейке - ID (число) или название места работы/логин пользователя.
+    """
+
+    def __init__(self):
+        workplaces = list(Workplace.objects.all())
+        self.workplaces_by_id = {workplace.pk: workplace for workplace in workplaces}
+        self.workplaces_by_name = {workplace.name: workplace for workplace in workplaces}
+        users = list(User.objects.all())
+        self.users_by_id = {user.pk: user for user in users}
+        self.users_by_username = {user.username: user for user in users}
+        self.uiks_by_id = {uik.pk: uik for uik in UIK.objects.all()}
+
+    @staticmethod
+    def _lookup(value, by_id, by_name=None):
+        text = parse_text(value)
+        if not text:
+            return None
+        if text.isdigit():
+            return by_id.get(int(text))
+        return by_name.get(text) if by_name is not None else None
+
+    def workplace(self, value):
+        """Место работы по ID или названию (None - не найдено)"""
+        return self._lookup(value, self.workplaces_by_id, self.workplaces_by_name)
+
+    def user(self, value, role=None, **flags):
+        """Пользователь по ID или логину с ролью role и значениями флагов flags (None - не найден)"""
+        user = self._lookup(value, self.users_by_id, self.users_by_username)
+        if user is None or (role and user.role != role):
+            return None
+        if any(getattr(user, flag) != expected for flag, expected in flags.items()):
+            return None
+        return user
+
+    def uik(self, value):
+        """УИК по ID (None - не найден)"""
+        return self._lookup(value, self.uiks_by_id)
+
+
+def read_rows(path):
+    """(номер строки, {поле: значение}) по листу книги в режиме read_only"""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name).strip().lower() if name is not None else '' for name in header]
+        for number, values in enumerate(rows, start=2):
+            if not any(value not in (None, '') for value in values):
+                continue
+            yield number, {column: value for column, value in zip(columns, values) if column in IMPORT_FIELDS}
+    finally:
+        workbook.close()
+
+
+def count_rows(path):
+    """Примерное число строк данных по размерам листа (для хода выполнения)"""
+    workbook = load_workbook(path, read_only=True)
+    try:
+        max_row = workbook.active.max_row
+    finally:
+        workbook.close()
+    return max(max_row - 1, 0) if max_row else None
+
+
+def clean_row(raw, normalized, normalize_errors):
+    """Значения полей строки и ошибки по правилам VoterResource.before_import_row.
+
+    normalized и normalize_errors - результат normalize_columns для этой строки.
+    """
+    errors = []
+    values = {}
+
+    for field in TEXT_FIELDS:
+        if field in raw:
+            values[field] = parse_text(raw[field])
+    values.update(normalized)
+
+    # Обязательные поля
+    if not values.get('last_name'):
+        errors.append("Фамилия обязательна")
+    if not values.get('first_name'):
+        errors.append("Имя обязательно")
+    if raw.get('birth_date') in (None, ''):
+        errors.append("Дата рождения обязательна")
+    if raw.get('uik') in (None, ''):
+        errors.append("УИК обязателен")
+    errors += normalize_errors
+
+    for field in FOREIGN_KEY_FIELDS:
+        if field not in raw:
+            continue
+        try:
+            values[f'{field}_id'] = parse_id(raw[field])
+        except ValueError:
+            errors.append(f"{field}: некорректный ID {raw[field]}")
+
+    if values.get('confirmed_by_brigadier') and not values.get('voting_date'):
+        errors.append("Нельзя подтвердить голосование без указания даты голосования")
+    if values.get('voting_date') and not values.get('voting_method'):
+        errors.append("При указании даты голосования необходимо указать способ голосования")
+
+    # Как VoterResource.before_save_instance: планируемая дата по умолчанию
+    if not values.get('planned_date'):
+        values.pop('planned_date', None)
+
+    return values, errors
+
+
+class VoterImport:
+    """Импорт одной книги: пачки строк, отчет по строкам и пересчет в конце"""
+
+    def __init__(self, user=None, chunk_size=CHUNK_SIZE, progress=None, lookups=None):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.report = {'total': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'errors': []}
+        self.affected_uik_ids = set()
+        # Справочники для проверки ссылок (одна выборка на импорт)
+        self.lookups = lookups or ImportLookups()
+
+    def run(self, path, dry_run=False):
+        """Импортировать книгу path. При dry_run изменения откатываются"""
+        if dry_run:
+            with transaction.atomic():
+                self.import_rows(path)
+                self.recalculate()
+                transaction.set_rollback(True)
+        else:
+            try:
+                self.import_rows(path)
+            finally:
+                self.recalculate()
+
+        if self.progress:
+            self.progress(self.report['total'], self.report['total'])
+        return self.report
+
+    def import_rows(self, path):
+        """Импорт строк книги пачками, каждая пачка - в своей транзакции"""
+        total = count_rows(path) if self.progress else None
+        chunk = []
+        for row in read_rows(path):
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                with transaction.atomic():
+                    self.import_chunk(chunk)
+                chunk = []
+                # Ход выполнения пишется между транзакциями пачек и виден сразу
+                if self.progress:
+                    self.progress(self.report['total'], total)
+        if chunk:
+            with transaction.atomic():
+                self.import_chunk(chunk)
+
+    def recalculate(self):
+        """Агрегат и факты затронутых УИК по зафиксированным избирателям"""
+        if not self.affected_uik_ids:
+            return
+        with transaction.atomic():
+            VoterAggregate.rebuild(self.affected_uik_ids)
+            UIKResultsDaily.recalculate_uiks(self.affected_uik_ids)
+            bump_data_version()
+
+    def add_error(self, number, messages):
+        self.report['errors'].append({'row': number, 'messages': messages})
+
+    def check_references(self, values):
+        """Ошибки ссылок на несуществующие УИК, места работы и пользователей"""
+        errors = []
+        for field, known in (('uik_id', self.lookups.uiks_by_id), ('workplace_id', self.lookups.workplaces_by_id),
+                             ('agitator_id', self.lookups.users_by_id)):
+            if values.get(field) is not None and values[field] not in known:
+                errors.append(f"{field.removesuffix('_id')}: запись с ID {values[field]} не найдена")
+        return errors
+
+    def import_chunk(self, rows):
+        normalized, normalize_errors = normalize_columns([raw for _, raw in rows])
+        parsed = []
+        for (number, raw), row_values, row_errors in zip(rows, normalized, normalize_errors):
+            self.report['total'] += 1
+            values, errors = clean_row(raw, row_values, row_errors)
+            errors += self.check_references(values)
+            if errors:
+                self.add_error(number, errors)
+                continue
+            values.setdefault('middle_name', '')
+            parsed.append((number, values))
+
+        # Существующие избиратели пачки одним запросом
+        existing = {}
+        if parsed:
+            voters = Voter.objects.filter(
+                last_name__in={values['last_name'] for _, values in parsed},
+                birth_date__in={values['birth_date'] for _, values in parsed},
+            )
+            for voter in voters:
+                existing[tuple(getattr(voter, field) for field in KEY_FIELDS)] = voter
+
+        now = timezone.now()
+        to_create = {}
+        to_update = {}
+        for number, values in parsed:
+            key = tuple(values[field] for field in KEY_FIELDS)
+            voter = existing.get(key) or to_create.get(key)
+            is_new = voter is None
+            if is_new:
+                voter = Voter(created_by=self.user)
+            before = voter._field_values()
+
+            for field, value in values.items():
+                setattr(voter, field, value)
+            # Как в Voter.save(): УИК избирателя берется из УИК агитатора
+            voter.assign_agitator_uik()
+
+            if not is_new and voter._field_values() == before:
+                self.report['skipped'] += 1
+                continue
+
+            try:
+                voter.clean()
+            except ValidationError as e:
+                self.add_error(number, [
+                    f"{field}: {error}" for field, field_errors in e.message_dict.items() for error in field_errors
+                ])
+                # Возвращаем значения, чтобы ошибка строки не попала в другие строки
+                for field, value in before.items():
+                    setattr(voter, field, value)
+                continue
+
+            voter.updated_at = now
+            if self.user is not None:
+                voter.updated_by = self.user
+            if voter.pk is None:
+                to_create[key] = voter
+            else:
+                to_update[voter.pk] = voter
+                self.affected_uik_ids.add(voter.get_stored_values()['uik_id'])
+            self.affected_uik_ids.add(voter.uik_id)
+
+        if to_create:
+            Voter.objects.bulk_create(list(to_create.values()), batch_size=self.chunk_size)
+            self.report['created'] += len(to_create)
+        if to_update:
+            Voter.objects.bulk_update(
+                list(to_update.values()),
+                list(IMPORT_FIELDS) + ['updated_at', 'updated_by'],
+                batch_size=self.chunk_size,
+            )
+            self.report['updated'] += len(to_update)
+
+
+def import_voters(path, user=None, chunk_size=CHUNK_SIZE, dry_run=False, progress=None, lookups=None):
+    """Импортировать избирателей из XLSX path; возвращает отчет VoterImport.report:
+    {'total', 'created', 'updated', 'skipped', 'errors': [{'row', 'messages'}]}"""
+    return VoterImport(user=user, chunk_size=chunk_size, progress=progress, lookups=lookups).run(path, dry_run=dry_run)
+
+
+def summary(report):
+    """Итог импорта одной строкой"""
+    return (
+        f"Строк: {report['total']}, создано: {report['created']}, обновлено: {report['updated']}, "
+        f"без изменений: {report['skipped']}, с ошибками: {len(report['errors'])}"
+    )
@@ -0,0 +1,49 @@
+"""Реестр фоновых задач (см. BackgroundJob и команду run_jobs).
+
+Функция задачи получает запись BackgroundJob и параметры задачи, может
+сообщать ход выполнения через job.set_progress() (между своими короткими
+транзакциями, иначе ход не виден до конца задачи) и возвращает результат,
+который сохраняется в JSON (строка попадает и в сообщение задачи).
+"""
+from collections import namedtuple
+from io import StringIO
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+
+from . import imports
+
+JobSpec = namedtuple('JobSpec', ['title', 'func'])
+
+# Имя задачи -> JobSpec
+JOBS = {}
+
+
+def register_job(name, title):
+    """Декоратор: зарегистрировать функцию как фоновую задачу name"""
+    def decorator(func):
+        JOBS[name] = JobSpec(title, func)
+        return func
+    return decorator
+
+
+@register_job('recalculate_all_daily_facts', 'Пересчет всех фактов')
+def recalculate_all_daily_facts(job):
+    """Команда recalculate_all_daily_facts с выводом в буфер задачи"""
+    output = StringIO()
+    call_command('recalculate_all_daily_facts', stdout=output, progress=job.set_progress)
+    lines = output.getvalue().strip().splitlines()
+    return lines[-1] if lines else 'Пересчет завершен'
+
+
+@register_job('import_voters', 'Импорт избирателей')
+def import_voters(job, path, dry_run=False):
+    """Потоковый импорт загруженной книги (см. elections.imports); файл удаляется после импорта"""
+    try:
+        report = imports.import_voters(
+            default_storage.path(path), user=job.created_by, dry_run=dry_run, progress=job.set_progress,
+        )
+    finally:
+        default_storage.delete(path)
+    job.message = ('[Проверка] ' if dry_run else '') + imports.summary(report)
+    return report
@@ -0,0 +1,177 @@
+"""Рассылка изменений фактов открытым дашбордам (Server-Sent Events).
+
+Сигналы Voter публикуют дельты фактов (+1/-1 по УИК и агитатору на дату
+голосования) в брокер, а асинхронный эндпоинт /dashboard/live/ раздает их
+подписчикам. Брокер живет в памяти процесса: поток работает под ASGI
+(uvicorn elections_system.asgi:application) и видит изменения, сохраненные
+этим же процессом. Изменения других процессов (фоновые задачи run_jobs,
+другие воркеры) видны по версии данных дашбордов в общем кэше: ее проверяет
+каждый heartbeat и при смене шлет событие version, по которому страница
+забирает изменения запросом since=<версия>.
+
+Медленный клиент не копит очередь сообщений: дельты подписчика сливаются по
+ключу (УИК/агитатор, дата) до следующей отправки. Если разных ключей
+накопилось больше MAX_PENDING_KEYS, дельты отбрасываются и клиент получает
+событие resync — перечитать данные целиком.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+
+from .dashboard_cache import get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Сколько разных ключей может накопиться у подписчика до resync
+MAX_PENDING_KEYS = 500
+# Пауза для склейки пачки изменений в одно сообщение (в секундах)
+COALESCE_DELAY = 0.5
+# Интервал пустых сообщений, чтобы прокси не закрывали соединение, и проверки
+# версии данных (в секундах)
+HEARTBEAT_INTERVAL = 15
+
+
+class Subscription:
+    """Подписка одного открытого дашборда"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.event = asyncio.Event()
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.overflow = False
+
+    def push(self, deltas):
+        """Добавляет дельты (вызывается из любого потока)"""
+        with self.lock:
+            if not self.overflow:
+                for key, delta in deltas.items():
+                    self.pending[key] = self.pending.get(key, 0) + delta
+                    if not self.pending[key]:
+                        del self.pending[key]
+                if len(self.pending) > MAX_PENDING_KEYS:
+                    self.pending = {}
+                    self.overflow = True
+        self.loop.call_soon_threadsafe(self.event.set)
+
+    def drain(self):
+        """Забирает накопленные дельты и флаг переполнения"""
+        with self.lock:
+            pending, overflow = self.pending, self.overflow
+            self.pending, self.overflow = {}, False
+            self.event.clear()
+        return pending, overflow
+
+
+class FactBroadcaster:
+    """Брокер изменений фактов в памяти процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+    def publish(self, deltas):
+        """Рассылает дельты {('uik'|'agitator', id, дата): изменение} всем подписчикам"""
+        if not deltas:
+            return
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.push(deltas)
+            except RuntimeError:
+                # Цикл событий подписчика уже закрыт
+                self.unsubscribe(subscription)
+
+
+broadcaster = FactBroadcaster()
+
+
+def fact_deltas(old_fact, new_fact):
+    """Дельты по УИК и агитатору при переходе голоса из old_fact в new_fact.
+
+    Факт — (uik_id, agitator_id, дата голосования) или None, если голос не
+    подтвержден (см. VoterAggregate.fact_of).
+    """
+    deltas = defaultdict(int)
+    for fact, delta in ((old_fact, -1), (new_fact, 1)):
+        if fact is None:
+            continue
+        uik_id, agitator_id, voting_date = fact
+        deltas[('uik', uik_id, voting_date)] += delta
+        if agitator_id:
+            deltas[('agitator', agitator_id, voting_date)] += delta
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def publish_fact_change(old_fact, new_fact):
+    """Публикует изменение факта голоса (вызывается после коммита)"""
+    if old_fact == new_fact or not broadcaster.subscriber_count:
+        return
+    broadcaster.publish(fact_deltas(old_fact, new_fact))
+
+
+def publish_fact_changes(changes):
+    """Публикует изменения фактов пачки голосов [(old_fact, new_fact), ...] одним сообщением"""
+    if not broadcaster.subscriber_count:
+        return
+    deltas = defaultdict(int)
+    for old_fact, new_fact in changes:
+        for key, delta in fact_deltas(old_fact, new_fact).items():
+            deltas[key] += delta
+    broadcaster.publish({key: delta for key, delta in deltas.items() if delta})
+
+
+def _format_deltas(pending):
+    """{'uiks': {id: {дата: дельта}}, 'agitators': {...}} для JSON"""
+    payload = {'uiks': defaultdict(dict), 'agitators': defaultdict(dict)}
+    for (kind, object_id, voting_date), delta in pending.items():
+        payload[f'{kind}s'][object_id][voting_date.isoformat()] = delta
+    return payload
+
+
+async def event_stream(subscription):
+    """Асинхронный генератор SSE-сообщений для подписчика"""
+    try:
+        yield 'retry: 5000\n\n'
+        version = await sync_to_async(get_data_version)()
+        while True:
+            try:
+                await asyncio.wait_for(subscription.event.wait(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                # Данные могли измениться в другом процессе, без дельт в этот брокер
+                current = await sync_to_async(get_data_version)()
+                if current != version:
+                    version = current
+                    yield f'event: version\ndata: {json.dumps({"version": version})}\n\n'
+                else:
+                    yield ': ping\n\n'
+                continue
+
+            # Даем пачке изменений (массовое подтверждение) склеиться
+            await asyncio.sleep(COALESCE_DELAY)
+            pending, overflow = subscription.drain()
+            if overflow:
+                yield 'event: resync\ndata: {}\n\n'
+            elif pending:
+                yield f'event: facts\ndata: {json.dumps(_format_deltas(pending))}\n\n'
+    finally:
+        broadcaster.unsubscribe(subscription)
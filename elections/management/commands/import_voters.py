@@ -0,0 +1,61 @@
+import csv
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from elections.imports import CHUNK_SIZE, import_voters, summary
+
+
+class Command(BaseCommand):
+    help = 'Потоковый импорт избирателей из XLSX пачками с пересчетом фактов в конце'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл XLSX (заголовки - имена полей, как в шаблоне импорта)')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Размер пачки строк (по умолчанию {CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--user',
+            help='Имя пользователя, от имени которого создаются и изменяются записи',
+        )
+        parser.add_argument(
+            '--report',
+            help='Записать ошибки по строкам в CSV-файл',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Проверить файл без сохранения',
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(username=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'Пользователь {options["user"]} не найден')
+
+        report = import_voters(
+            options['path'],
+            user=user,
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+        )
+
+        if options['report']:
+            with open(options['report'], 'w', newline='', encoding='utf-8') as report_file:
+                writer = csv.writer(report_file)
+                writer.writerow(['Строка', 'Ошибки'])
+                for error in report['errors']:
+                    writer.writerow([error['row'], '; '.join(error['messages'])])
+        else:
+            for error in report['errors']:
+                self.stdout.write(self.style.ERROR(f'Строка {error["row"]}: {"; ".join(error["messages"])}'))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'[DRY RUN] {summary(report)}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary(report)))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from elections.models import UIK, VoterAggregate
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает агрегат избирателей (VoterAggregate) с нуля по таблице избирателей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uik',
+            type=int,
+            help='Пересобрать только для указанного УИК',
+        )
+
+    def handle(self, *args, **options):
+        uik_number = options['uik']
+
+        if uik_number:
+            uik_ids = list(UIK.objects.filter(number=uik_number).values_list('id', flat=True))
+            if not uik_ids:
+                self.stdout.write(self.style.WARNING(f'УИК №{uik_number} не найден'))
+                return
+            self.stdout.write(f'Пересборка агрегата для УИК {uik_number}...')
+        else:
+            uik_ids = None
+            self.stdout.write('Пересборка агрегата для всех УИК...')
+
+        created = VoterAggregate.rebuild(uik_ids)
+
+        self.stdout.write(self.style.SUCCESS(f'Пересборка завершена. Создано строк агрегата: {created}'))
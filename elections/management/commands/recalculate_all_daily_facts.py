@@ -1,11 +1,16 @@
 from django.core.management.base import BaseCommand
-from elections.models import UIKResultsDaily
+from django.db import transaction
+from elections.dashboard_cache import bump_data_version
+from elections.models import UIKResultsDaily, VoterAggregate
 from datetime import date
 
 
 class Command(BaseCommand):
     help = 'Пересчитывает все расчетные факты в UIKResultsDaily на основе подтвержденных голосований'
 
+    # progress(выполнено, всего) - ход выполнения для фоновой задачи (только call_command)
+    stealth_options = ('progress',)
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--uik',
@@ -27,6 +32,7 @@ class Command(BaseCommand):
         uik_number = options['uik']
         force = options['force']
         dry_run = options['dry_run']
+        progress = options.get('progress')
         
         if uik_number:
             self.stdout.write(f'Пересчет для УИК {uik_number}...')
@@ -41,43 +47,60 @@ class Command(BaseCommand):
 
         total_processed = 0
         total_updated = 0
-        
+        total = queryset.count() if progress else None
+
         for instance in queryset:
             self.stdout.write(f'Обработка УИК {instance.uik.number}...')
-            
-            # Сохраняем старые значения для сравнения
-            old_values = {
-                'fact_12_sep_calculated': instance.fact_12_sep_calculated,
-                'fact_13_sep_calculated': instance.fact_13_sep_calculated,
-                'fact_14_sep_calculated': instance.fact_14_sep_calculated,
-            }
-            
-            # Пересчитываем
-            instance.calculate_daily_facts()
-            
-            # Проверяем изменения
-            has_changes = (
-                old_values['fact_12_sep_calculated'] != instance.fact_12_sep_calculated or
-                old_values['fact_13_sep_calculated'] != instance.fact_13_sep_calculated or
-                old_values['fact_14_sep_calculated'] != instance.fact_14_sep_calculated
-            )
-            
-            if has_changes:
-                self.stdout.write(f'  Изменения: 12.09: {old_values["fact_12_sep_calculated"]} → {instance.fact_12_sep_calculated}')
-                self.stdout.write(f'             13.09: {old_values["fact_13_sep_calculated"]} → {instance.fact_13_sep_calculated}')
-                self.stdout.write(f'             14.09: {old_values["fact_14_sep_calculated"]} → {instance.fact_14_sep_calculated}')
-                
-                if not dry_run:
-                    # Обновляем эффективные факты
-                    instance.update_effective_facts()
-                    instance.save()
-                    total_updated += 1
+
+            # Каждый УИК пересчитывается своей короткой транзакцией (при --dry-run
+            # она откатывается), поэтому пересчет не держит блокировку записи, а
+            # ход выполнения пишется между транзакциями и виден сразу. Факты
+            # считаются по агрегату избирателей: сначала пересобираем его для УИК
+            # по таблице избирателей, чтобы пересчет исправлял и расхождения агрегата
+            with transaction.atomic():
+                VoterAggregate.rebuild([instance.uik_id])
+
+                # Сохраняем старые значения для сравнения
+                old_values = {
+                    'fact_12_sep_calculated': instance.fact_12_sep_calculated,
+                    'fact_13_sep_calculated': instance.fact_13_sep_calculated,
+                    'fact_14_sep_calculated': instance.fact_14_sep_calculated,
+                }
+
+                # Пересчитываем
+                instance.calculate_daily_facts()
+
+                # Проверяем изменения
+                has_changes = (
+                    old_values['fact_12_sep_calculated'] != instance.fact_12_sep_calculated or
+                    old_values['fact_13_sep_calculated'] != instance.fact_13_sep_calculated or
+                    old_values['fact_14_sep_calculated'] != instance.fact_14_sep_calculated
+                )
+
+                if has_changes:
+                    self.stdout.write(f'  Изменения: 12.09: {old_values["fact_12_sep_calculated"]} → {instance.fact_12_sep_calculated}')
+                    self.stdout.write(f'             13.09: {old_values["fact_13_sep_calculated"]} → {instance.fact_13_sep_calculated}')
+                    self.stdout.write(f'             14.09: {old_values["fact_14_sep_calculated"]} → {instance.fact_14_sep_calculated}')
+
+                    if not dry_run:
+                        # Обновляем эффективные факты
+                        instance.update_effective_facts()
+                        instance.save()
+                        total_updated += 1
+                    else:
+                        self.stdout.write('  [DRY RUN] Изменения не сохранены')
                 else:
-                    self.stdout.write('  [DRY RUN] Изменения не сохранены')
-            else:
-                self.stdout.write('  Изменений нет')
-            
+                    self.stdout.write('  Изменений нет')
+
+                if dry_run:
+                    transaction.set_rollback(True)
+
             total_processed += 1
+            if progress:
+                progress(total_processed, total)
+
+        if not dry_run:
+            bump_data_version()
 
         if dry_run:
             self.stdout.write(self.style.WARNING(f'[DRY RUN] Обработано {total_processed} записей, изменений: {total_updated}'))
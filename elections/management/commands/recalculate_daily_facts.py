@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from elections.models import UIKResultsDaily
+from elections.dashboard_cache import bump_data_version
+from elections.models import UIKResultsDaily, VoterAggregate
 
 
 class Command(BaseCommand):
@@ -24,6 +25,7 @@ class Command(BaseCommand):
         if uik_number:
             try:
                 daily_result = UIKResultsDaily.objects.get(uik__number=uik_number)
+                self.rebuild_aggregate([daily_result.uik_id])
                 self.recalculate_single(daily_result, force)
                 self.stdout.write(
                     self.style.SUCCESS(f'Успешно пересчитан УИК №{uik_number}')
@@ -35,6 +37,7 @@ class Command(BaseCommand):
         else:
             # Пересчитываем все УИК
             daily_results = UIKResultsDaily.objects.all()
+            self.rebuild_aggregate()
             count = 0
             
             for daily_result in daily_results:
@@ -45,6 +48,12 @@ class Command(BaseCommand):
                 self.style.SUCCESS(f'Успешно пересчитано {count} УИК')
             )
 
+    def rebuild_aggregate(self, uik_ids=None):
+        """Факты считаются по агрегату избирателей: пересобираем его по таблице
+        избирателей, чтобы пересчет исправлял и расхождения агрегата"""
+        VoterAggregate.rebuild(uik_ids)
+        bump_data_version()
+
     def recalculate_single(self, daily_result, force=False):
         """Пересчитать один УИК"""
         if not force and (daily_result.fact_12_sep_locked or 
@@ -0,0 +1,65 @@
+import os
+import socket
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from elections.models import BackgroundJob
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи админки из очереди в БД (пересчеты, импорты и т.п.)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить задачи, которые уже в очереди, и завершиться',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2,
+            help='Пауза между проверками пустой очереди в секундах (по умолчанию 2)',
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(caches['default'], LocMemCache):
+            # Версия данных дашбордов и сброс кэшей агитаторов и блокировок
+            # остались бы в памяти этого процесса, и веб-процессы их не увидели бы
+            raise CommandError(
+                'Кэш LocMemCache не общий для процессов: задайте CACHE_BACKEND '
+                '(файловый кэш, Redis или Memcached), общий с веб-процессами'
+            )
+
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+
+        if options['once']:
+            while self.run_next(worker):
+                pass
+            return
+
+        self.stdout.write(f'Обработчик задач {worker} запущен (Ctrl+C для остановки)')
+        try:
+            while True:
+                close_old_connections()
+                if not self.run_next(worker):
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Остановлено')
+
+    def run_next(self, worker):
+        """Выполнить одну задачу из очереди. Возвращает False, если очередь пуста"""
+        job = BackgroundJob.claim_next(worker)
+        if job is None:
+            return False
+
+        self.stdout.write(f'Задача {job}...')
+        job.run()
+        if job.status == 'done':
+            self.stdout.write(self.style.SUCCESS(f'Задача {job} выполнена: {job.message}'))
+        else:
+            self.stdout.write(self.style.ERROR(f'Задача {job} завершилась ошибкой'))
+        return True
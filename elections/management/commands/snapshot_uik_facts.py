@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from elections.models import UIKFactSnapshot
+
+
+class Command(BaseCommand):
+    help = 'Снимает эффективные факты всех УИК для кривых явки и прореживает старые снимки'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Снимать факты в цикле (для запуска как отдельного сервиса)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=getattr(settings, 'FACT_SNAPSHOT_INTERVAL', 600),
+            help='Интервал между снимками в секундах (по умолчанию FACT_SNAPSHOT_INTERVAL)',
+        )
+        parser.add_argument(
+            '--no-downsample',
+            action='store_true',
+            help='Не применять политику хранения к старым снимкам',
+        )
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self.snapshot(options['no_downsample'])
+            return
+
+        self.stdout.write(f'Снимки фактов каждые {options["interval"]} с (Ctrl+C для остановки)')
+        try:
+            while True:
+                started = time.monotonic()
+                close_old_connections()
+                try:
+                    self.snapshot(options['no_downsample'])
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'Ошибка при снятии фактов: {e}'))
+                time.sleep(max(0, options['interval'] - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            self.stdout.write('Остановлено')
+
+    def snapshot(self, no_downsample=False):
+        created = UIKFactSnapshot.take()
+        message = f'Снято фактов УИК: {created}'
+        if not no_downsample:
+            message += f', удалено старых строк: {UIKFactSnapshot.downsample()}'
+        self.stdout.write(self.style.SUCCESS(message))
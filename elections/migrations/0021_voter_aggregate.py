@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_voter_aggregates(apps, schema_editor):
+    """Заполняем агрегат по уже существующим избирателям"""
+    Voter = apps.get_model('elections', 'Voter')
+    VoterAggregate = apps.get_model('elections', 'VoterAggregate')
+    rows = (
+        Voter.objects
+        .values('uik_id', 'agitator_id', 'workplace__group', 'is_agitator', 'is_home_voting',
+                'planned_date', 'voting_date', 'voting_method', 'confirmed_by_brigadier')
+        .annotate(total=models.Count('id'))
+        .order_by()
+    )
+    VoterAggregate.objects.bulk_create([
+        VoterAggregate(
+            uik_id=row['uik_id'],
+            agitator_id=row['agitator_id'],
+            workplace_group=row['workplace__group'],
+            is_agitator=row['is_agitator'],
+            is_home_voting=row['is_home_voting'],
+            planned_date=row['planned_date'],
+            voting_date=row['voting_date'],
+            voting_method=row['voting_method'],
+            confirmed_by_brigadier=row['confirmed_by_brigadier'],
+            count=row['total'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0020_add_voting_date_block'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoterAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('workplace_group', models.CharField(blank=True, choices=[('medicine', 'Медицина'), ('education', 'Образование'), ('social_protection', 'Соцзащита'), ('other', 'Прочие')], help_text='Пусто, если место работы не указано', max_length=20, null=True, verbose_name='Группа места работы')),
+                ('is_agitator', models.BooleanField(default=False, verbose_name='Агитатор')),
+                ('is_home_voting', models.BooleanField(default=False, verbose_name='На дому')),
+                ('planned_date', models.DateField(verbose_name='Планируемая дата')),
+                ('voting_date', models.DateField(blank=True, null=True, verbose_name='Дата голосования')),
+                ('voting_method', models.CharField(blank=True, max_length=20, verbose_name='Способ голосования')),
+                ('confirmed_by_brigadier', models.BooleanField(default=False, verbose_name='Подтверждено')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+                ('agitator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='voter_aggregates', to=settings.AUTH_USER_MODEL, verbose_name='Агитатор')),
+                ('uik', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='voter_aggregates', to='elections.uik', verbose_name='УИК')),
+            ],
+            options={
+                'verbose_name': 'Агрегат избирателей',
+                'verbose_name_plural': 'Агрегаты избирателей',
+                'indexes': [models.Index(fields=['uik', 'confirmed_by_brigadier', 'voting_date'], name='voter_agg_uik_fact_idx')],
+            },
+        ),
+        migrations.RunPython(populate_voter_aggregates, migrations.RunPython.noop),
+    ]
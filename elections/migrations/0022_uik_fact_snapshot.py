@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0021_voter_aggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UIKFactSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(db_index=True, verbose_name='Время снимка')),
+                ('fact_12_sep', models.PositiveIntegerField(default=0, verbose_name='Факт 12.09')),
+                ('fact_13_sep', models.PositiveIntegerField(default=0, verbose_name='Факт 13.09')),
+                ('fact_14_sep', models.PositiveIntegerField(default=0, verbose_name='Факт 14.09')),
+                ('uik', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fact_snapshots', to='elections.uik', verbose_name='УИК')),
+            ],
+            options={
+                'verbose_name': 'Снимок фактов УИК',
+                'verbose_name_plural': 'Снимки фактов УИК',
+                'constraints': [models.UniqueConstraint(fields=('uik', 'taken_at'), name='uik_fact_snapshot_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:19
+
+import datetime
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+def rebuild_voter_aggregates(apps, schema_editor):
+    """Пересобираем агрегат по избирателям: убираем дубли строк до уникального индекса"""
+    Voter = apps.get_model('elections', 'Voter')
+    VoterAggregate = apps.get_model('elections', 'VoterAggregate')
+    VoterAggregate.objects.all().delete()
+    rows = (
+        Voter.objects
+        .values('uik_id', 'agitator_id', 'workplace__group', 'is_agitator', 'is_home_voting',
+                'planned_date', 'voting_date', 'voting_method', 'confirmed_by_brigadier')
+        .annotate(total=models.Count('id'))
+        .order_by()
+    )
+    VoterAggregate.objects.bulk_create([
+        VoterAggregate(
+            uik_id=row['uik_id'],
+            agitator_id=row['agitator_id'],
+            workplace_group=row['workplace__group'],
+            is_agitator=row['is_agitator'],
+            is_home_voting=row['is_home_voting'],
+            planned_date=row['planned_date'],
+            voting_date=row['voting_date'],
+            voting_method=row['voting_method'],
+            confirmed_by_brigadier=row['confirmed_by_brigadier'],
+            count=row['total'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0023_background_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='voteraggregate',
+            name='agitator',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='voter_aggregates', to=settings.AUTH_USER_MODEL, verbose_name='Агитатор'),
+        ),
+        migrations.RunPython(rebuild_voter_aggregates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='voteraggregate',
+            constraint=models.UniqueConstraint(models.F('uik'), django.db.models.functions.comparison.Coalesce(models.F('agitator'), models.Value(0), output_field=models.BigIntegerField()), django.db.models.functions.comparison.Coalesce(models.F('workplace_group'), models.Value(''), output_field=models.CharField()), models.F('is_agitator'), models.F('is_home_voting'), models.F('planned_date'), django.db.models.functions.comparison.Coalesce(models.F('voting_date'), models.Value(datetime.date(1, 1, 1)), output_field=models.DateField()), models.F('voting_method'), models.F('confirmed_by_brigadier'), name='voter_agg_key_unique'),
+        ),
+    ]
@@ -1,10 +1,25 @@
+import logging
+import threading
+import time
+import traceback
+import uuid
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce, Greatest, Round
 from django.core.validators import RegexValidator
 from django.utils import timezone
 from decimal import Decimal
 from django.core.exceptions import ValidationError
-from datetime import date
+from datetime import date, timedelta
+
+
+logger = logging.getLogger(__name__)
+
+# Дни голосования (12, 13 и 14 сентября 2025)
+VOTING_DATES = (date(2025, 9, 12), date(2025, 9, 13), date(2025, 9, 14))
 
 
 class User(AbstractUser):
@@ -188,6 +203,14 @@ class UIK(models.Model):
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Изменил',
                                    related_name='updated_uiks')
 
+    # Метка версии назначений агитаторов в общем кэше: меняется при изменении
+    # агитаторов или номеров УИК, и каждый процесс понимает, что его копия устарела
+    AGITATORS_CACHE_VERSION_KEY = 'uik_agitators:version'
+
+    # Назначения агитаторов в памяти процесса: (версия, {агитатор: (ID УИК, номер)})
+    _agitator_uiks = None
+    _agitator_uiks_lock = threading.Lock()
+
     class Meta:
         verbose_name = 'УИК'
         verbose_name_plural = 'УИК'
@@ -196,6 +219,61 @@ class UIK(models.Model):
     def __str__(self):
         return f"УИК №{self.number}"
 
+    @classmethod
+    def agitator_uiks(cls):
+        """{ID агитатора: (ID УИК, номер УИК)}. Запрос к БД — только после изменения назначений.
+
+        Если агитатор назначен в несколько УИК, берется первый по номеру
+        (как assigned_uiks_as_agitator.first()).
+
+        Метка версии читается до загрузки: изменение, зафиксированное во время
+        загрузки, сменит метку, и карта перечитается. Пока метки нет (ее снял
+        незафиксированный invalidate_agitators_cache), карта внутри транзакции
+        загружается без кэширования: она может содержать изменения, которые
+        еще откатятся.
+        """
+        version = cache.get(cls.AGITATORS_CACHE_VERSION_KEY)
+        if version is None and not transaction.get_connection().in_atomic_block:
+            cache.add(cls.AGITATORS_CACHE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(cls.AGITATORS_CACHE_VERSION_KEY)
+
+        loaded = cls._agitator_uiks
+        if version is None or loaded is None or loaded[0] != version:
+            with cls._agitator_uiks_lock:
+                assignments = (
+                    cls.agitators.through.objects
+                    .order_by('uik__number')
+                    .values_list('user_id', 'uik_id', 'uik__number')
+                )
+                agitator_uiks = {}
+                for agitator_id, uik_id, number in assignments:
+                    agitator_uiks.setdefault(agitator_id, (uik_id, number))
+                loaded = (version, agitator_uiks)
+                if version is not None:
+                    cls._agitator_uiks = loaded
+        return loaded[1]
+
+    @classmethod
+    def get_agitator_uik(cls, agitator_id):
+        """(ID УИК, номер УИК) агитатора или None, если агитатор не назначен"""
+        if not agitator_id:
+            return None
+        return cls.agitator_uiks().get(agitator_id)
+
+    @classmethod
+    def invalidate_agitators_cache(cls):
+        """Сбросить кэш назначений агитаторов во всех процессах.
+
+        Метка снимается сразу, а новая ставится после коммита: если транзакция
+        откатится, метки не будет, и ни один процесс не оставит у себя карту,
+        прочитанную во время изменения.
+        """
+        cls._agitator_uiks = None
+        cache.delete(cls.AGITATORS_CACHE_VERSION_KEY)
+        transaction.on_commit(
+            lambda: cache.set(cls.AGITATORS_CACHE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        )
+
     @property
     def actual_voters_count(self):
         """Фактическое количество избирателей"""
@@ -234,22 +312,31 @@ class UIK(models.Model):
         return voters.exists()
 
     def transfer_agitator_voters(self, old_agitator, new_agitator, user=None):
-        """Переносит всех избирателей от старого агитатора к новому"""
+        """Переносит всех избирателей от старого агитатора к новому.
+
+        Перенос выполняется одним UPDATE (см. elections.bulk.reassign_voters):
+        как и Voter.save(), избиратели получают УИК нового агитатора.
+        """
+        from .bulk import reassign_voters
+
+        if old_agitator.pk == new_agitator.pk:
+            return False, "Выберите разных агитаторов"
         if not self.can_change_agitator(old_agitator, new_agitator):
             return False, "У агитатора нет избирателей"
 
-        # Переносим всех избирателей
-        voters = Voter.objects.filter(agitator=old_agitator, uik=self)
-        transferred_count = 0
+        # Проверка из Voter.clean(): у нового агитатора должен быть УИК
+        new_uik = UIK.get_agitator_uik(new_agitator.pk)
+        if not new_uik:
+            return False, f"У агитатора {new_agitator.get_full_name()} не назначен УИК"
+        new_uik_id, new_uik_number = new_uik
 
-        for voter in voters:
-            voter.agitator = new_agitator
-            if user:
-                voter.updated_by = user
-            voter.save()
-            transferred_count += 1
+        voters = Voter.objects.filter(agitator=old_agitator, uik=self)
+        transferred_count = reassign_voters(voters, new_uik_id, new_agitator.pk, user)
 
-        return True, f"Перенесено {transferred_count} избирателей"
+        message = f"Перенесено {transferred_count} избирателей"
+        if new_uik_id != self.pk:
+            message += f" в УИК №{new_uik_number}"
+        return True, message
 
     def remove_agitator_safely(self, agitator, user=None):
         """Безопасно удаляет агитатора, перенося его избирателей к другому агитатору"""
@@ -261,12 +348,13 @@ class UIK(models.Model):
 
         # Переносим к первому доступному агитатору
         new_agitator = other_agitators.first()
-        success, message = self.transfer_agitator_voters(agitator, new_agitator, user)
+        with transaction.atomic():
+            success, message = self.transfer_agitator_voters(agitator, new_agitator, user)
 
-        if success:
-            # Удаляем агитатора из УИК
-            self.agitators.remove(agitator)
-            return True, f"{message}. Агитатор удален из УИК."
+            if success:
+                # Удаляем агитатора из УИК
+                self.agitators.remove(agitator)
+                return True, f"{message}. Агитатор удален из УИК."
 
         return False, message
 
@@ -365,6 +453,12 @@ class Voter(models.Model):
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Изменил',
                                    related_name='updated_voters')
 
+    # Поля, прежние значения которых нужны валидации и агрегату избирателей
+    TRACKED_FIELDS = (
+        'uik_id', 'agitator_id', 'workplace_id', 'is_agitator', 'is_home_voting',
+        'planned_date', 'voting_date', 'voting_method', 'confirmed_by_brigadier',
+    )
+
     class Meta:
         verbose_name = 'Избиратель'
         verbose_name_plural = 'Избиратели'
@@ -421,58 +515,29 @@ class Voter(models.Model):
                 'first_name': 'Имя обязательно'
             })
         
-        # Проверяем, не заблокирована ли дата голосования (только если дата изменилась)
-        if self.voting_date and self.pk:  # Только для существующих записей
-            try:
-                old_voter = Voter.objects.get(pk=self.pk)
-                # Проверяем блокировку только если дата изменилась
-                if self.voting_date != old_voter.voting_date:
-                    try:
-                        date_block = VotingDateBlock.objects.get(voting_date=self.voting_date)
-                        if date_block.is_blocked:
-                            raise ValidationError({
-                                'voting_date': f'Дата {self.voting_date.strftime("%d.%m.%Y")} заблокирована для голосования'
-                            })
-                    except VotingDateBlock.DoesNotExist:
-                        pass  # Дата не заблокирована
-            except Voter.DoesNotExist:
-                pass  # Новая запись, проверку не делаем
-        elif self.voting_date and not self.pk:  # Для новых записей
-            try:
-                date_block = VotingDateBlock.objects.get(voting_date=self.voting_date)
-                if date_block.is_blocked:
-                    raise ValidationError({
-                        'voting_date': f'Дата {self.voting_date.strftime("%d.%m.%Y")} заблокирована для голосования'
-                    })
-            except VotingDateBlock.DoesNotExist:
-                pass  # Дата не заблокирована
+        # Сохраненные значения полей берутся из снимка при загрузке (без запроса)
+        stored = self.get_stored_values()
+
+        # Проверяем, не заблокирована ли дата голосования (для существующих записей -
+        # только если дата изменилась)
+        if self.voting_date and (stored is None or self.voting_date != stored['voting_date']):
+            if VotingDateBlock.is_date_blocked(self.voting_date):
+                raise ValidationError({
+                    'voting_date': f'Дата {self.voting_date.strftime("%d.%m.%Y")} заблокирована для голосования'
+                })
 
         # Проверяем обязательные поля
-        if not self.agitator:
+        if not self.agitator_id:
             raise ValidationError({
                 'agitator': 'Поле "Агитатор" является обязательным'
             })
 
-        # Проверяем, что агитатор работает в этом УИК
-        if self.agitator:
-            # Получаем УИК агитатора
-            agitator_uik = self.agitator.assigned_uiks_as_agitator.first()
-            
-            if not agitator_uik:
-                raise ValidationError({
-                    'agitator': f'У агитатора {self.agitator.get_full_name()} не назначен УИК'
-                })
-            
-            # Проверяем, что агитатор работает в указанном УИК (если УИК уже указан)
-            # Проверяем только если УИК уже заполнен (не None)
-            try:
-                if self.uik and not self.uik.agitators.filter(id=self.agitator.id).exists():
-                    # Если УИК не соответствует УИК агитатора, автоматически обновляем УИК
-                    # Это происходит в методе save(), поэтому здесь просто предупреждаем
-                    pass
-            except:
-                # Если УИК еще не заполнен, пропускаем проверку
-                pass
+        # Проверяем, что у агитатора есть УИК. Если УИК избирателя не совпадает
+        # с УИК агитатора, он обновляется в методе save()
+        if not UIK.get_agitator_uik(self.agitator_id):
+            raise ValidationError({
+                'agitator': f'У агитатора {self.agitator.get_full_name()} не назначен УИК'
+            })
 
         # Валидация дат - только 12, 13, 14 сентября 2025
         allowed_dates = [
@@ -504,53 +569,110 @@ class Voter(models.Model):
             })
         
         # Блокировка изменения дат голосования для подтвержденных голосований
-        if self.pk:  # Только для существующих записей
-            try:
-                old_voter = Voter.objects.get(pk=self.pk)
-                # Если есть подтверждение и пытаемся изменить дату голосования (но не снимаем подтверждение)
-                if (old_voter.confirmed_by_brigadier and 
-                    self.confirmed_by_brigadier and  # Подтверждение остается
-                    self.voting_date != old_voter.voting_date):
-                    raise ValidationError({
-                        'voting_date': f'Нельзя изменить дату голосования {old_voter.voting_date.strftime("%d.%m.%Y")} - голосование уже подтверждено. Сначала снимите подтверждение.'
-                    })
-                # Если есть подтверждение и пытаемся изменить способ голосования (но не снимаем подтверждение)
-                if (old_voter.confirmed_by_brigadier and 
-                    self.confirmed_by_brigadier and  # Подтверждение остается
-                    self.voting_method != old_voter.voting_method):
-                    raise ValidationError({
-                        'voting_method': f'Нельзя изменить способ голосования для подтвержденного голосования {old_voter.voting_date.strftime("%d.%m.%Y")}. Сначала снимите подтверждение.'
-                    })
-                # Если пытаемся снять подтверждение, но дата заблокирована
-                if (old_voter.confirmed_by_brigadier and 
-                    not self.confirmed_by_brigadier and 
-                    old_voter.voting_date):
-                    try:
-                        date_block = VotingDateBlock.objects.get(voting_date=old_voter.voting_date)
-                        if date_block.is_blocked:
-                            raise ValidationError({
-                                'confirmed_by_brigadier': f'Нельзя снять подтверждение - дата {old_voter.voting_date.strftime("%d.%m.%Y")} заблокирована'
-                            })
-                    except VotingDateBlock.DoesNotExist:
-                        pass  # Дата не заблокирована
-            except Voter.DoesNotExist:
-                pass  # Новая запись, проверку не делаем
+        if stored is not None:  # Только для существующих записей
+            old_voting_date = stored['voting_date']
+            # Если есть подтверждение и пытаемся изменить дату голосования (но не снимаем подтверждение)
+            if (stored['confirmed_by_brigadier'] and
+                self.confirmed_by_brigadier and  # Подтверждение остается
+                self.voting_date != old_voting_date):
+                raise ValidationError({
+                    'voting_date': f'Нельзя изменить дату голосования {old_voting_date.strftime("%d.%m.%Y")} - голосование уже подтверждено. Сначала снимите подтверждение.'
+                })
+            # Если есть подтверждение и пытаемся изменить способ голосования (но не снимаем подтверждение)
+            if (stored['confirmed_by_brigadier'] and
+                self.confirmed_by_brigadier and  # Подтверждение остается
+                self.voting_method != stored['voting_method']):
+                raise ValidationError({
+                    'voting_method': f'Нельзя изменить способ голосования для подтвержденного голосования {old_voting_date.strftime("%d.%m.%Y")}. Сначала снимите подтверждение.'
+                })
+            # Если пытаемся снять подтверждение, но дата заблокирована
+            if (stored['confirmed_by_brigadier'] and
+                not self.confirmed_by_brigadier and
+                old_voting_date and
+                VotingDateBlock.is_date_blocked(old_voting_date)):
+                raise ValidationError({
+                    'confirmed_by_brigadier': f'Нельзя снять подтверждение - дата {old_voting_date.strftime("%d.%m.%Y")} заблокирована'
+                })
+
+        # Запоминаем проверенное состояние, чтобы save() не повторял проверку
+        self._validated_values = self._field_values()
 
     def save(self, *args, **kwargs):
         """Переопределяем save для валидации и автоматического заполнения УИК"""
         # Автоматически заполняем/обновляем УИК из агитатора ПЕРЕД валидацией
-        if self.agitator:
-            # Получаем УИК агитатора через связь assigned_uiks_as_agitator
-            agitator_uik = self.agitator.assigned_uiks_as_agitator.first()
-            if agitator_uik:
-                # Обновляем УИК избирателя на УИК агитатора
-                self.uik = agitator_uik
+        self.assign_agitator_uik()
         
-        # Валидируем модель
-        self.clean()
+        # Валидируем модель, если clean() еще не вызывался для этих значений
+        if getattr(self, '_validated_values', None) != self._field_values():
+            self.clean()
         
         super().save(*args, **kwargs)
 
+        # Сохраненные значения становятся новым снимком
+        update_fields = kwargs.get('update_fields')
+        self._remember_stored_values(
+            self._tracked_values() if update_fields is None
+            else {field: value for field, value in self._tracked_values().items()
+                  if field.removesuffix('_id') in update_fields or field in update_fields}
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминаем значения полей при загрузке, чтобы clean() и сигналы
+        сравнивали изменения без повторного чтения записи"""
+        instance = super().from_db(db, field_names, values)
+        instance._remember_stored_values(dict(zip(field_names, values)))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        values = self._tracked_values()
+        if fields is not None:
+            values = {field: value for field, value in values.items()
+                      if field in fields or field.removesuffix('_id') in fields}
+        self._remember_stored_values(values)
+
+    def _tracked_values(self):
+        return {field: getattr(self, field) for field in self.TRACKED_FIELDS}
+
+    def _field_values(self):
+        return {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
+
+    def _remember_stored_values(self, values):
+        stored = getattr(self, '_stored_values', None) or {}
+        stored.update((field, value) for field, value in values.items() if field in self.TRACKED_FIELDS)
+        self._stored_values = stored
+
+    def get_stored_values(self):
+        """Значения TRACKED_FIELDS в том виде, как они сохранены в БД.
+
+        Берутся из снимка при загрузке (from_db) или после save(); если
+        снимка нет (объект создан с pk вручную или загружен через only()),
+        читаются одним запросом. None - записи в БД нет.
+        """
+        if self.pk is None:
+            return None
+        stored = getattr(self, '_stored_values', None)
+        if stored is None or len(stored) < len(self.TRACKED_FIELDS):
+            row = Voter.objects.filter(pk=self.pk).values(*self.TRACKED_FIELDS).first()
+            if row is None:
+                return None
+            self._remember_stored_values(row)
+            stored = self._stored_values
+        return stored
+
+    def assign_agitator_uik(self):
+        """Ставит избирателю УИК его агитатора (из кэша UIK.agitator_uiks(), без запроса).
+
+        Возвращает True, если УИК изменился.
+        """
+        agitator_uik = UIK.get_agitator_uik(self.agitator_id)
+        if agitator_uik and agitator_uik[0] != self.uik_id:
+            # Обновляем УИК избирателя на УИК агитатора
+            self.uik_id = agitator_uik[0]
+            return True
+        return False
+
 
 class UIKResults(models.Model):
     """Результаты голосования по УИК"""
@@ -663,6 +785,45 @@ class UIKAnalysis(models.Model):
         return round(Decimal(self.site_fact) / Decimal(self.site_plan) * 100, 2)
 
 
+class UIKResultsDailyQuerySet(models.QuerySet):
+    """QuerySet результатов по дням с расчетом итогов на стороне БД"""
+
+    def with_totals(self):
+        """Аннотирует эффективные факты, итоги и проценты выполнения.
+
+        effective_fact_<день>_sep — как get_effective_fact_<день>_sep(),
+        plan_total/fact_total — как total_plan/total_fact,
+        execution_percentage — как plan_execution_percentage,
+        plan_<день>_percentage — эффективный факт дня к плану дня (до десятых).
+        По аннотациям можно сортировать, фильтровать и агрегировать.
+        """
+        effective = {
+            f'effective_fact_{day}_sep': self.model.effective_fact_expression(day)
+            for day in ('12', '13', '14')
+        }
+        queryset = self.annotate(
+            **effective,
+            plan_total=models.F('plan_12_sep') + models.F('plan_13_sep') + models.F('plan_14_sep'),
+            fact_total=models.F('fact_12_sep') + models.F('fact_13_sep') + models.F('fact_14_sep'),
+        )
+        return queryset.annotate(
+            execution_percentage=_percentage_expression('fact_total', 'plan_total', 2),
+            **{
+                f'plan_{day}_percentage': _percentage_expression(f'effective_fact_{day}_sep', f'plan_{day}_sep', 1)
+                for day in ('12', '13', '14')
+            },
+        )
+
+
+def _percentage_expression(fact, plan, digits):
+    """fact / plan * 100 с округлением; 0 при нулевом плане"""
+    return models.Case(
+        models.When(**{plan: 0}, then=models.Value(0.0)),
+        default=Round(models.F(fact) * 100.0 / models.F(plan), digits),
+        output_field=models.FloatField(),
+    )
+
+
 class UIKResultsDaily(models.Model):
     """Результаты голосования по УИК по дням"""
 
@@ -715,11 +876,16 @@ class UIKResultsDaily(models.Model):
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Изменил',
                                    related_name='updated_uik_results_daily')
 
+    objects = UIKResultsDailyQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Результаты по дням УИК'
         verbose_name_plural = 'Результаты по дням УИК'
         ordering = ['uik__number']
 
+    # Поле факта для каждого дня голосования
+    FACT_FIELDS = dict(zip(VOTING_DATES, ('fact_12_sep', 'fact_13_sep', 'fact_14_sep')))
+
     def __str__(self):
         return f"Результаты по дням УИК №{self.uik.number}"
 
@@ -740,6 +906,19 @@ class UIKResultsDaily(models.Model):
             return Decimal('0.00')
         return round(Decimal(self.total_fact) / Decimal(self.total_plan) * 100, 2)
 
+    @staticmethod
+    def effective_fact_expression(day):
+        """Выражение ORM для эффективного факта дня (как get_effective_fact_<day>_sep).
+
+        Заблокированный день — ручное значение, иначе максимум из ручного и расчетного.
+        """
+        fact = f'fact_{day}_sep'
+        return models.Case(
+            models.When(**{f'{fact}_locked': True}, then=models.F(fact)),
+            default=Greatest(fact, f'{fact}_calculated'),
+            output_field=models.PositiveIntegerField(),
+        )
+
     def get_effective_fact_12_sep(self):
         """Получить эффективное значение факта за 12.09 с учетом блокировки"""
         if self.fact_12_sep_locked:
@@ -799,24 +978,19 @@ class UIKResultsDaily(models.Model):
 
     def calculate_daily_facts(self):
         """Рассчитать факты по дням на основе подтвержденных голосований"""
-        from datetime import date
-
-        # Получаем все подтвержденные голосования для этого УИК
-        confirmed_votings = Voter.objects.filter(
-            uik=self.uik,
-            confirmed_by_brigadier=True,
-            voting_date__isnull=False
+        # Подтвержденные голосования этого УИК берем из агрегата избирателей
+        counts = dict(
+            VoterAggregate.objects
+            .filter(uik_id=self.uik_id, confirmed_by_brigadier=True, voting_date__in=VOTING_DATES)
+            .values_list('voting_date')
+            .annotate(total=models.Sum('count'))
+            .order_by()
         )
 
-        # Считаем голосования по дням
-        fact_12_count = confirmed_votings.filter(voting_date=date(2025, 9, 12)).count()
-        fact_13_count = confirmed_votings.filter(voting_date=date(2025, 9, 13)).count()
-        fact_14_count = confirmed_votings.filter(voting_date=date(2025, 9, 14)).count()
-
         # Обновляем расчетные значения
-        self.fact_12_sep_calculated = fact_12_count
-        self.fact_13_sep_calculated = fact_13_count
-        self.fact_14_sep_calculated = fact_14_count
+        self.fact_12_sep_calculated = counts.get(VOTING_DATES[0], 0)
+        self.fact_13_sep_calculated = counts.get(VOTING_DATES[1], 0)
+        self.fact_14_sep_calculated = counts.get(VOTING_DATES[2], 0)
 
     def recalculate_all(self):
         """Пересчитать все расчетные значения и обновить эффективные факты"""
@@ -830,6 +1004,70 @@ class UIKResultsDaily(models.Model):
             'updated_at'
         ])
 
+    @classmethod
+    def apply_fact_delta(cls, uik_id, voting_date, delta):
+        """Изменить расчетный факт УИК за день голосования на delta (+1/-1) одним UPDATE.
+
+        Если записи нет или факт ушел бы ниже нуля (расчетные факты разошлись с
+        избирателями), факт не меняется: расхождение пишется в лог, и после
+        коммита УИК пересчитывается целиком (recount_uik).
+        """
+        field = cls.FACT_FIELDS.get(voting_date)
+        if field is None:
+            return
+        column = f'{field}_calculated'
+        results = cls.objects.filter(uik_id=uik_id)
+        if delta < 0:
+            results = results.filter(**{f'{column}__gte': -delta})
+        if not results.update(**{column: models.F(column) + delta}):
+            logger.warning(
+                'Расчетный факт %s УИК %s не изменен на %+d: нет записи или факт ушел бы ниже нуля; '
+                'УИК будет пересчитан целиком', column, uik_id, delta,
+            )
+            transaction.on_commit(lambda: cls.recount_uik(uik_id))
+
+    @classmethod
+    def recount_uik(cls, uik_id):
+        """Полный пересчет УИК по таблице избирателей: агрегат и факты"""
+        with transaction.atomic():
+            VoterAggregate.rebuild([uik_id])
+            cls.recalculate_uiks([uik_id])
+            bump_data_version()
+
+    @classmethod
+    def refresh_effective_facts(cls, uik_ids):
+        """Применить правила update_effective_facts к текущим расчетным фактам УИК.
+
+        Расчетные факты не пересчитываются (их поддерживает apply_fact_delta) и
+        не перезаписываются, поэтому параллельные дельты не теряются. Записи,
+        которых еще нет, создаются и считаются по агрегату.
+        """
+        uik_ids = set(uik_ids)
+        results = list(cls.objects.filter(uik_id__in=uik_ids))
+        missing = uik_ids - {result.uik_id for result in results}
+        if missing:
+            cls.recalculate_uiks(missing)
+
+        fields = [
+            'fact_12_sep', 'fact_13_sep', 'fact_14_sep',
+            'fact_12_sep_source', 'fact_13_sep_source', 'fact_14_sep_source',
+        ]
+        for result in results:
+            before = [getattr(result, field) for field in fields]
+            result.update_effective_facts()
+            if [getattr(result, field) for field in fields] != before:
+                result.save(update_fields=fields + ['updated_at'])
+
+    @classmethod
+    def recalculate_uiks(cls, uik_ids):
+        """Пересчитать факты указанных УИК (недостающие записи создаются)"""
+        uik_ids = set(uik_ids)
+        results = {result.uik_id: result for result in cls.objects.filter(uik_id__in=uik_ids)}
+        for uik_id in UIK.objects.filter(id__in=uik_ids - results.keys()).values_list('id', flat=True):
+            results[uik_id] = cls.objects.create(uik_id=uik_id)
+        for result in results.values():
+            result.recalculate_all()
+
     def save(self, *args, **kwargs):
         """Переопределяем save для автоматического обновления логики"""
         # Обновляем эффективные факты перед сохранением
@@ -837,6 +1075,265 @@ class UIKResultsDaily(models.Model):
         super().save(*args, **kwargs)
 
 
+class VoterAggregate(models.Model):
+    """Агрегат избирателей (куб фактов): количество избирателей по набору измерений.
+
+    Поддерживается сигналами Voter (+1/-1 при изменении измерений) и
+    пересобирается командой rebuild_voter_aggregates.
+    """
+
+    # Поля Voter, соответствующие измерениям агрегата (в том же порядке, что KEY_FIELDS)
+    VOTER_LOOKUPS = (
+        'uik_id', 'agitator_id', 'workplace__group', 'is_agitator', 'is_home_voting',
+        'planned_date', 'voting_date', 'voting_method', 'confirmed_by_brigadier',
+    )
+    KEY_FIELDS = (
+        'uik_id', 'agitator_id', 'workplace_group', 'is_agitator', 'is_home_voting',
+        'planned_date', 'voting_date', 'voting_method', 'confirmed_by_brigadier',
+    )
+
+    uik = models.ForeignKey(UIK, on_delete=models.CASCADE, verbose_name='УИК', related_name='voter_aggregates')
+    # CASCADE, а не SET_NULL: строки удаленного агитатора совпали бы с уже
+    # существующими строками без агитатора; УИК пересобираются после удаления
+    agitator = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, verbose_name='Агитатор',
+                                 related_name='voter_aggregates')
+    workplace_group = models.CharField('Группа места работы', max_length=20, choices=Workplace.GROUP_CHOICES,
+                                       null=True, blank=True, help_text='Пусто, если место работы не указано')
+    is_agitator = models.BooleanField('Агитатор', default=False)
+    is_home_voting = models.BooleanField('На дому', default=False)
+    planned_date = models.DateField('Планируемая дата')
+    voting_date = models.DateField('Дата голосования', null=True, blank=True)
+    voting_method = models.CharField('Способ голосования', max_length=20, blank=True)
+    confirmed_by_brigadier = models.BooleanField('Подтверждено', default=False)
+    count = models.PositiveIntegerField('Количество', default=0)
+
+    class Meta:
+        verbose_name = 'Агрегат избирателей'
+        verbose_name_plural = 'Агрегаты избирателей'
+        indexes = [
+            models.Index(fields=['uik', 'confirmed_by_brigadier', 'voting_date'], name='voter_agg_uik_fact_idx'),
+        ]
+        constraints = [
+            # Одна строка на набор измерений. Пустые измерения приводятся к
+            # значениям-заменителям, иначе NULL в уникальном индексе не совпадают
+            models.UniqueConstraint(
+                models.F('uik'),
+                Coalesce(models.F('agitator'), models.Value(0), output_field=models.BigIntegerField()),
+                Coalesce(models.F('workplace_group'), models.Value(''), output_field=models.CharField()),
+                models.F('is_agitator'),
+                models.F('is_home_voting'),
+                models.F('planned_date'),
+                Coalesce(models.F('voting_date'), models.Value(date(1, 1, 1)), output_field=models.DateField()),
+                models.F('voting_method'),
+                models.F('confirmed_by_brigadier'),
+                name='voter_agg_key_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"УИК №{self.uik.number}: {self.count}"
+
+    @classmethod
+    def key_for_voter(cls, voter):
+        """Измерения агрегата для экземпляра Voter в его текущем состоянии"""
+        return (
+            voter.uik_id,
+            voter.agitator_id,
+            voter.workplace.group if voter.workplace_id else None,
+            voter.is_agitator,
+            voter.is_home_voting,
+            voter.planned_date,
+            voter.voting_date,
+            voter.voting_method,
+            voter.confirmed_by_brigadier,
+        )
+
+    @classmethod
+    def stored_key_for_voter(cls, voter):
+        """Измерения агрегата для избирателя в том виде, как он сохранен в БД.
+
+        Поля берутся из снимка Voter.get_stored_values(); группа места работы
+        читается отдельно, только если место работы изменилось.
+        """
+        stored = voter.get_stored_values()
+        if stored is None:
+            return None
+        workplace_id = stored['workplace_id']
+        if not workplace_id:
+            workplace_group = None
+        elif workplace_id == voter.workplace_id:
+            workplace_group = voter.workplace.group
+        else:
+            workplace_group = Workplace.objects.filter(pk=workplace_id).values_list('group', flat=True).first()
+        return (
+            stored['uik_id'],
+            stored['agitator_id'],
+            workplace_group,
+            stored['is_agitator'],
+            stored['is_home_voting'],
+            stored['planned_date'],
+            stored['voting_date'],
+            stored['voting_method'],
+            stored['confirmed_by_brigadier'],
+        )
+
+    @classmethod
+    def fact_of(cls, key):
+        """(УИК, агитатор, дата голосования) для подтвержденного голоса или None"""
+        if key is None:
+            return None
+        values = dict(zip(cls.KEY_FIELDS, key))
+        if not values['confirmed_by_brigadier'] or values['voting_date'] is None:
+            return None
+        return values['uik_id'], values['agitator_id'], values['voting_date']
+
+    @classmethod
+    def apply_delta(cls, key, delta):
+        """Изменить счетчик строки с измерениями key на delta (+1/-1).
+
+        Строка блокируется (select_for_update) и меняется по pk. Если строки нет,
+        она создается; при одновременном создании той же строки другой
+        транзакцией срабатывает уникальный индекс, и дельта применяется к ней.
+        """
+        lookup = dict(zip(cls.KEY_FIELDS, key))
+        rows = cls.objects.select_for_update().filter(**lookup).values_list('pk', flat=True)
+        with transaction.atomic():
+            pk = rows.first()
+            if pk is None:
+                if delta < 0:
+                    return
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(count=delta, **lookup)
+                    return
+                except IntegrityError:
+                    pk = rows.get()
+            cls.objects.filter(pk=pk).update(count=models.F('count') + delta)
+            if delta < 0:
+                cls.objects.filter(pk=pk, count__lte=0).delete()
+
+    @classmethod
+    def rebuild(cls, uik_ids=None):
+        """Пересобрать агрегат с нуля (целиком или для указанных УИК)"""
+        voters = Voter.objects.all()
+        aggregates = cls.objects.all()
+        if uik_ids is not None:
+            voters = voters.filter(uik_id__in=uik_ids)
+            aggregates = aggregates.filter(uik_id__in=uik_ids)
+
+        rows = (
+            voters
+            .values_list(*cls.VOTER_LOOKUPS)
+            .annotate(total=models.Count('id'))
+            .order_by()
+        )
+        with transaction.atomic():
+            aggregates.delete()
+            created = cls.objects.bulk_create(
+                [cls(count=row[-1], **dict(zip(cls.KEY_FIELDS, row[:-1]))) for row in rows],
+                batch_size=500,
+            )
+        return len(created)
+
+
+class UIKFactSnapshotQuerySet(models.QuerySet):
+    def turnout_curve(self, voting_date=None):
+        """Точки кривой явки: [{'taken_at': время снимка, 'fact': сумма фактов}].
+
+        Факты суммируются по УИК в выборке: за день voting_date (одна из
+        VOTING_DATES) или за все дни голосования, если дата не указана.
+        """
+        if voting_date is None:
+            fact = models.F('fact_12_sep') + models.F('fact_13_sep') + models.F('fact_14_sep')
+        else:
+            fact = models.F(UIKFactSnapshot.FACT_FIELDS[voting_date])
+        return list(
+            self.values('taken_at')
+            .annotate(fact=models.Sum(fact))
+            .order_by('taken_at')
+        )
+
+
+class UIKFactSnapshot(models.Model):
+    """Снимок эффективных фактов УИК на момент времени (для кривых явки).
+
+    Снимки пишет команда snapshot_uik_facts: одна строка на УИК с общим
+    временем снимка для всех УИК. Свежие снимки хранятся целиком, старше
+    FACT_SNAPSHOT_RAW_RETENTION прореживаются до одного за
+    FACT_SNAPSHOT_DOWNSAMPLE_STEP, старше FACT_SNAPSHOT_RETENTION удаляются.
+    """
+
+    FACT_FIELDS = UIKResultsDaily.FACT_FIELDS
+
+    uik = models.ForeignKey(UIK, on_delete=models.CASCADE, verbose_name='УИК', related_name='fact_snapshots')
+    taken_at = models.DateTimeField('Время снимка', db_index=True)
+    fact_12_sep = models.PositiveIntegerField('Факт 12.09', default=0)
+    fact_13_sep = models.PositiveIntegerField('Факт 13.09', default=0)
+    fact_14_sep = models.PositiveIntegerField('Факт 14.09', default=0)
+
+    objects = UIKFactSnapshotQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Снимок фактов УИК'
+        verbose_name_plural = 'Снимки фактов УИК'
+        constraints = [
+            models.UniqueConstraint(fields=['uik', 'taken_at'], name='uik_fact_snapshot_unique'),
+        ]
+
+    def __str__(self):
+        return f"УИК №{self.uik.number} на {self.taken_at:%d.%m.%Y %H:%M}"
+
+    @classmethod
+    def take(cls, taken_at=None):
+        """Снять эффективные факты всех УИК одним запросом и одной вставкой"""
+        taken_at = taken_at or timezone.now()
+        rows = UIKResultsDaily.objects.annotate(**{
+            f'effective_fact_{day}_sep': UIKResultsDaily.effective_fact_expression(day)
+            for day in ('12', '13', '14')
+        }).values_list('uik_id', 'effective_fact_12_sep', 'effective_fact_13_sep', 'effective_fact_14_sep')
+        created = cls.objects.bulk_create([
+            cls(uik_id=uik_id, taken_at=taken_at, fact_12_sep=fact_12, fact_13_sep=fact_13, fact_14_sep=fact_14)
+            for uik_id, fact_12, fact_13, fact_14 in rows
+        ], batch_size=500)
+        return len(created)
+
+    @classmethod
+    def downsample(cls, now=None):
+        """Применить политику хранения. Возвращает количество удаленных строк.
+
+        Из снимков старше FACT_SNAPSHOT_RAW_RETENTION в каждом интервале
+        FACT_SNAPSHOT_DOWNSAMPLE_STEP остается последний: факты только растут,
+        поэтому кривая сохраняет форму. Настройки читаются при каждом вызове.
+        """
+        now = now or timezone.now()
+        raw_retention = getattr(settings, 'FACT_SNAPSHOT_RAW_RETENTION', timedelta(days=2))
+        downsample_step = getattr(settings, 'FACT_SNAPSHOT_DOWNSAMPLE_STEP', timedelta(hours=1))
+        retention = getattr(settings, 'FACT_SNAPSHOT_RETENTION', timedelta(days=365))
+
+        deleted, _ = cls.objects.filter(taken_at__lt=now - retention).delete()
+
+        step = downsample_step.total_seconds()
+        times = (
+            cls.objects
+            .filter(taken_at__lt=now - raw_retention)
+            .values_list('taken_at', flat=True)
+            .distinct()
+            .order_by('-taken_at')
+        )
+        kept_buckets = set()
+        redundant = []
+        for taken_at in times:
+            bucket = int(taken_at.timestamp() // step)
+            if bucket in kept_buckets:
+                redundant.append(taken_at)
+            else:
+                kept_buckets.add(bucket)
+
+        for start in range(0, len(redundant), 500):
+            deleted += cls.objects.filter(taken_at__in=redundant[start:start + 500]).delete()[0]
+        return deleted
+
+
 class Analytics(models.Model):
     """Модель для аналитических данных"""
 
@@ -858,23 +1355,151 @@ class Analytics(models.Model):
 
 
 # Сигналы для автоматического обновления данных
-from django.db.models.signals import post_save, m2m_changed
+from contextlib import contextmanager
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
+from .dashboard_cache import bump_data_version
+from .live import publish_fact_change
 
 
-@receiver(post_save, sender=Voter)
-def update_uik_results_daily(sender, instance, created, **kwargs):
-    """Автоматически пересчитываем UIKResultsDaily при изменении избирателя"""
-    # Пересчитываем UIKResultsDaily при любом изменении подтверждения или даты голосования
-    # Это включает как подтверждение, так и снятие подтверждения
+# Реестр УИК, эффективные факты которых нужно обновить. Сигналы меняют
+# расчетные факты дельтами и помечают УИК, а правила update_effective_facts
+# применяются после коммита транзакции, по одному разу на УИК.
+class _DirtyUIKs(threading.local):
+    def __init__(self):
+        self.ids = set()
+        self.deferred = 0
+
+
+_dirty_uiks = _DirtyUIKs()
+
+
+def mark_uik_facts_dirty(*uik_ids):
+    """Пометить УИК для обновления эффективных фактов UIKResultsDaily после коммита"""
+    uik_ids = {uik_id for uik_id in uik_ids if uik_id}
+    if not uik_ids:
+        return
+    _dirty_uiks.ids.update(uik_ids)
+    if not _dirty_uiks.deferred:
+        # Вне транзакции обновление выполняется сразу; повторные вызовы
+        # flush_dirty_uik_facts в одной транзакции находят реестр пустым
+        transaction.on_commit(flush_dirty_uik_facts)
+
+
+def flush_dirty_uik_facts():
+    """Обновить эффективные факты всех помеченных УИК"""
+    uik_ids, _dirty_uiks.ids = _dirty_uiks.ids, set()
+    if uik_ids:
+        UIKResultsDaily.refresh_effective_facts(uik_ids)
+
+
+def apply_uik_fact_change(old_fact, new_fact):
+    """Переносит голос между расчетными фактами УИК и помечает УИК.
+
+    Факты — (УИК, агитатор, дата голосования) или None (см. VoterAggregate.fact_of).
+    Расчетные факты меняются сразу, в транзакции сохранения избирателя,
+    а эффективные обновляются после коммита.
+    """
+    for fact, delta in ((old_fact, -1), (new_fact, 1)):
+        if fact is not None:
+            UIKResultsDaily.apply_fact_delta(fact[0], fact[2], delta)
+    mark_uik_facts_dirty(old_fact and old_fact[0], new_fact and new_fact[0])
+
+
+@contextmanager
+def deferred_fact_recalculation():
+    """Откладывает обновление помеченных УИК до выхода из блока.
+
+    Для циклов сохранений вне транзакции: каждый УИК обновляется один раз
+    после цикла, а не после каждого save().
+    """
+    _dirty_uiks.deferred += 1
     try:
-        uik_results_daily = UIKResultsDaily.objects.get(uik=instance.uik)
-        uik_results_daily.recalculate_all()
-    except UIKResultsDaily.DoesNotExist:
-        # Создаем запись если её нет
-        UIKResultsDaily.objects.create(uik=instance.uik)
-        uik_results_daily = UIKResultsDaily.objects.get(uik=instance.uik)
-        uik_results_daily.recalculate_all()
+        yield
+    finally:
+        _dirty_uiks.deferred -= 1
+        if not _dirty_uiks.deferred and _dirty_uiks.ids:
+            transaction.on_commit(flush_dirty_uik_facts)
+
+
+# Поддержка агрегата избирателей и расчетных фактов UIKResultsDaily: оба
+# меняются дельтами и только когда изменился факт голоса.
+@receiver(pre_save, sender=Voter)
+@receiver(pre_delete, sender=Voter)
+def remember_voter_aggregate_key(sender, instance, **kwargs):
+    """Запоминаем измерения избирателя, как он сохранен в БД, до сохранения или удаления"""
+    instance._aggregate_key = VoterAggregate.stored_key_for_voter(instance)
+
+
+@receiver(post_save, sender=Voter)
+def update_voter_aggregate(sender, instance, created, **kwargs):
+    """Переносим избирателя в агрегате из старой ячейки в новую"""
+    old_key = getattr(instance, '_aggregate_key', None)
+    new_key = VoterAggregate.key_for_voter(instance)
+    if old_key == new_key:
+        return
+    if old_key is not None:
+        VoterAggregate.apply_delta(old_key, -1)
+    VoterAggregate.apply_delta(new_key, 1)
+    instance._aggregate_key = new_key
+
+    # Факты УИК и живые дашборды обновляются после коммита. Изменения, не
+    # затрагивающие подтверждение, дату голосования и УИК, их не касаются
+    old_fact, new_fact = VoterAggregate.fact_of(old_key), VoterAggregate.fact_of(new_key)
+    if old_fact != new_fact:
+        # Смена агитатора при том же УИК и дате факты УИК не меняет
+        if (old_fact and (old_fact[0], old_fact[2])) != (new_fact and (new_fact[0], new_fact[2])):
+            apply_uik_fact_change(old_fact, new_fact)
+        transaction.on_commit(lambda: publish_fact_change(old_fact, new_fact))
+
+
+@receiver(post_delete, sender=Voter)
+def remove_voter_from_aggregate(sender, instance, **kwargs):
+    """Убираем удаленного избирателя из агрегата (из ячейки, где он был в БД,
+    даже если экземпляр изменили в памяти перед delete())"""
+    key = getattr(instance, '_aggregate_key', None)
+    if key is None:
+        return
+    VoterAggregate.apply_delta(key, -1)
+    old_fact = VoterAggregate.fact_of(key)
+    if old_fact is not None:
+        apply_uik_fact_change(old_fact, None)
+        transaction.on_commit(lambda: publish_fact_change(old_fact, None))
+
+
+@receiver(pre_save, sender=Workplace)
+def remember_workplace_group(sender, instance, **kwargs):
+    """Запоминаем группу места работы до сохранения"""
+    instance._old_group = (
+        Workplace.objects.filter(pk=instance.pk).values_list('group', flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Workplace)
+def rebuild_aggregate_on_workplace_group_change(sender, instance, created, **kwargs):
+    """Смена группы места работы меняет измерение у всех его сотрудников"""
+    if created or instance._old_group == instance.group:
+        return
+    uik_ids = set(Voter.objects.filter(workplace=instance).values_list('uik_id', flat=True))
+    if uik_ids:
+        VoterAggregate.rebuild(uik_ids)
+
+
+@receiver(pre_delete, sender=Workplace)
+@receiver(pre_delete, sender=User)
+def remember_aggregate_uiks_before_delete(sender, instance, **kwargs):
+    """Запоминаем УИК избирателей, у которых обнулится место работы или агитатор"""
+    field = 'workplace' if sender is Workplace else 'agitator'
+    instance._aggregate_uik_ids = set(Voter.objects.filter(**{field: instance}).values_list('uik_id', flat=True))
+
+
+@receiver(post_delete, sender=Workplace)
+@receiver(post_delete, sender=User)
+def rebuild_aggregate_after_delete(sender, instance, **kwargs):
+    """SET_NULL обновляет избирателей без сигналов - пересобираем затронутые УИК"""
+    uik_ids = getattr(instance, '_aggregate_uik_ids', None)
+    if uik_ids:
+        VoterAggregate.rebuild(uik_ids)
 
 
 @receiver(post_save, sender=UIK)
@@ -886,33 +1511,78 @@ def create_uik_analysis(sender, instance, created, **kwargs):
 
 
 @receiver(m2m_changed, sender=UIK.agitators.through)
-def update_voters_uik_on_agitator_change(sender, instance, action, pk_set, **kwargs):
-    """Обновляет УИК избирателей при изменении УИК агитатора"""
-    
+@receiver(post_save, sender=UIK)
+@receiver(post_delete, sender=UIK)
+def invalidate_agitator_uiks(sender, action=None, **kwargs):
+    """Изменение агитаторов или номеров УИК сбрасывает кэш назначений во всех процессах"""
+    if action is None or action.startswith('post_'):
+        UIK.invalidate_agitators_cache()
+
+
+@receiver(m2m_changed, sender=UIK.agitators.through)
+def update_voters_uik_on_agitator_change(sender, instance, action, pk_set, reverse=False, **kwargs):
+    """Обновляет УИК избирателей при изменении УИК агитатора
+
+    Избиратели добавленных агитаторов переводятся одним UPDATE на каждый
+    целевой УИК (см. elections.bulk.reassign_voters), факты пересчитываются
+    один раз для старых и нового УИК.
+    """
+    from .bulk import reassign_voters
+
     # Срабатывает только при добавлении агитатора к УИК (не при удалении)
-    if action == 'post_add' and pk_set:
-        # instance - это UIK, pk_set - это ID агитаторов, которые были добавлены
-        for agitator_id in pk_set:
-            try:
-                agitator = User.objects.get(id=agitator_id, role='agitator')
-                new_uik = instance
-                
-                # Обновляем УИК всех избирателей этого агитатора
-                voters_to_update = Voter.objects.filter(agitator=agitator)
-                updated_count = 0
-                
-                for voter in voters_to_update:
-                    # Обновляем УИК избирателя на новый УИК агитатора
-                    voter.uik = new_uik
-                    voter.save()
-                    updated_count += 1
-                
-                if updated_count > 0:
-                    print(f"Обновлено {updated_count} избирателей агитатора {agitator.get_full_name()} на УИК {new_uik.number}")
-                    
-            except User.DoesNotExist:
-                continue
+    if action != 'post_add' or not pk_set:
+        return
+
+    # instance - УИК, pk_set - ID добавленных агитаторов (или наоборот при
+    # добавлении УИК со стороны агитатора)
+    agitator_ids = {instance.pk} if reverse else set(pk_set)
+    agitator_ids = set(
+        User.objects.filter(pk__in=agitator_ids, role='agitator').values_list('pk', flat=True)
+    )
+    if not agitator_ids:
+        return
+
+    # УИК агитатора - первый по номеру (см. UIK.agitator_uiks())
+    agitators_by_uik = {}
+    for agitator_id in agitator_ids:
+        agitator_uik = UIK.get_agitator_uik(agitator_id)
+        if agitator_uik:
+            agitators_by_uik.setdefault(agitator_uik, set()).add(agitator_id)
+
+    for (uik_id, uik_number), uik_agitator_ids in agitators_by_uik.items():
+        voters = Voter.objects.filter(agitator_id__in=uik_agitator_ids).exclude(uik_id=uik_id)
+        updated_count = reassign_voters(voters, uik_id)
+        if updated_count > 0:
+            logger.info(
+                'Обновлено %s избирателей агитаторов %s на УИК %s',
+                updated_count, sorted(uik_agitator_ids), uik_number,
+            )
+
+
+# Версия данных дашбордов увеличивается после коммита любой записи,
+# от которой зависят их цифры (см. elections.dashboard_cache)
+@receiver(post_save, sender=Voter)
+@receiver(post_delete, sender=Voter)
+@receiver(post_save, sender=UIK)
+@receiver(post_delete, sender=UIK)
+@receiver(post_save, sender=UIKResultsDaily)
+@receiver(post_delete, sender=UIKResultsDaily)
+@receiver(post_save, sender=UIKAnalysis)
+@receiver(post_delete, sender=UIKAnalysis)
+@receiver(post_save, sender=Workplace)
+@receiver(post_delete, sender=Workplace)
+def bump_dashboard_data_version(sender, **kwargs):
+    """Инвалидирует кэш дашбордов"""
+    bump_data_version()
+
 
+@receiver(m2m_changed, sender=UIK.agitators.through)
+@receiver(m2m_changed, sender=UIK.additional_brigadiers.through)
+@receiver(m2m_changed, sender=User.assigned_agitators.through)
+def bump_dashboard_data_version_on_assignment(sender, action, **kwargs):
+    """Назначения агитаторов и бригадиров меняют разбивку дашбордов"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_data_version()
 
 class VotingDateBlock(models.Model):
     """Модель для блокировки дат голосования"""
@@ -927,6 +1597,50 @@ class VotingDateBlock(models.Model):
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, 
                                  verbose_name='Обновил', related_name='updated_voting_date_blocks')
     
+    # Метка версии блокировок в общем кэше: меняется при любом изменении
+    # записей, и каждый процесс по ней понимает, что его копия устарела
+    CACHE_VERSION_KEY = 'voting_date_blocks:version'
+
+    # Заблокированные даты в памяти процесса: (версия, frozenset дат)
+    _blocked_dates = None
+    _blocked_dates_lock = threading.Lock()
+
+    @classmethod
+    def blocked_dates(cls):
+        """Множество заблокированных дат. Запрос к БД — только после изменения блокировок.
+
+        Пока метки версии нет (ее снял незафиксированный invalidate_cache),
+        внутри транзакции даты загружаются без кэширования (как UIK.agitator_uiks).
+        """
+        version = cache.get(cls.CACHE_VERSION_KEY)
+        if version is None and not transaction.get_connection().in_atomic_block:
+            cache.add(cls.CACHE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(cls.CACHE_VERSION_KEY)
+
+        loaded = cls._blocked_dates
+        if version is None or loaded is None or loaded[0] != version:
+            with cls._blocked_dates_lock:
+                dates = frozenset(cls.objects.filter(is_blocked=True).values_list('voting_date', flat=True))
+                loaded = (version, dates)
+                if version is not None:
+                    cls._blocked_dates = loaded
+        return loaded[1]
+
+    @classmethod
+    def is_date_blocked(cls, voting_date):
+        """Заблокирована ли дата голосования (нет записи - не заблокирована)"""
+        return voting_date in cls.blocked_dates()
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Сбросить кэш блокировок во всех процессах: метка снимается сразу,
+        новая ставится после коммита"""
+        cls._blocked_dates = None
+        cache.delete(cls.CACHE_VERSION_KEY)
+        transaction.on_commit(
+            lambda: cache.set(cls.CACHE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        )
+
     def __str__(self):
         status = "🔒 Заблокирована" if self.is_blocked else "✅ Доступна"
         return f"{self.voting_date.strftime('%d.%m.%Y')} - {status}"
@@ -936,3 +1650,143 @@ class VotingDateBlock(models.Model):
         verbose_name = 'Блокировка даты голосования'
         verbose_name_plural = 'Блокировки дат голосования'
         ordering = ['voting_date']
+
+
+@receiver(post_save, sender=VotingDateBlock)
+@receiver(post_delete, sender=VotingDateBlock)
+def invalidate_voting_date_blocks(sender, **kwargs):
+    """Изменение блокировок сбрасывает их кэш во всех процессах"""
+    VotingDateBlock.invalidate_cache()
+
+
+class BackgroundJob(models.Model):
+    """Фоновая задача для тяжелых операций админки.
+
+    Запрос только ставит задачу в очередь (BackgroundJob.enqueue), а выполняет
+    ее команда run_jobs в отдельном процессе. Ход выполнения, результат и
+    ошибка записываются в эту же запись. Функции задач регистрируются в
+    elections.jobs.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('done', 'Выполнена'),
+        ('failed', 'Ошибка'),
+    ]
+
+    # Ход выполнения пишется в БД не чаще, чем раз в столько секунд
+    PROGRESS_INTERVAL = 1
+
+    name = models.CharField('Задача', max_length=100)
+    params = models.JSONField('Параметры', default=dict, blank=True)
+    status = models.CharField('Статус', max_length=20, choices=STATUS_CHOICES, default='pending')
+    progress_current = models.PositiveIntegerField('Выполнено', default=0)
+    progress_total = models.PositiveIntegerField('Всего', null=True, blank=True)
+    message = models.CharField('Сообщение', max_length=255, blank=True)
+    result = models.JSONField('Результат', null=True, blank=True)
+    error = models.TextField('Ошибка', blank=True)
+    worker = models.CharField('Обработчик', max_length=100, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                   verbose_name='Создал', related_name='background_jobs')
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    started_at = models.DateTimeField('Начата', null=True, blank=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='background_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} #{self.pk}"
+
+    @property
+    def title(self):
+        """Название задачи из реестра elections.jobs"""
+        from .jobs import JOBS
+
+        spec = JOBS.get(self.name)
+        return spec.title if spec else self.name
+
+    @property
+    def progress_percent(self):
+        """Процент выполнения или None, если объем работы неизвестен"""
+        if self.status == 'done':
+            return 100
+        if not self.progress_total:
+            return None
+        return min(100, round(self.progress_current * 100 / self.progress_total))
+
+    @classmethod
+    def enqueue(cls, name, params=None, user=None):
+        """Поставить задачу name (из elections.jobs) в очередь"""
+        from .jobs import JOBS
+
+        if name not in JOBS:
+            raise ValueError(f'Неизвестная задача: {name}')
+        return cls.objects.create(name=name, params=params or {}, created_by=user)
+
+    @classmethod
+    def claim_next(cls, worker):
+        """Забрать самую старую задачу из очереди (или None).
+
+        Статус меняется условным UPDATE, поэтому одну задачу не заберут два
+        обработчика одновременно.
+        """
+        while True:
+            job = cls.objects.filter(status='pending').order_by('created_at', 'pk').first()
+            if job is None:
+                return None
+            claimed = cls.objects.filter(pk=job.pk, status='pending').update(
+                status='running', worker=worker, started_at=timezone.now(),
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+
+    def set_progress(self, current, total=None, message=None):
+        """Записать ход выполнения (не чаще PROGRESS_INTERVAL, последний шаг - всегда).
+
+        Вызывается между транзакциями задачи: запись внутри незафиксированной
+        транзакции не видна странице задач до ее конца.
+        """
+        self.progress_current = current
+        if total is not None:
+            self.progress_total = total
+        if message is not None:
+            self.message = message[:255]
+
+        now = time.monotonic()
+        finished = self.progress_total is not None and current >= self.progress_total
+        if not finished and now - getattr(self, '_progress_written_at', 0) < self.PROGRESS_INTERVAL:
+            return
+        self._progress_written_at = now
+        BackgroundJob.objects.filter(pk=self.pk).update(
+            progress_current=self.progress_current,
+            progress_total=self.progress_total,
+            message=self.message,
+        )
+
+    def run(self):
+        """Выполнить задачу и записать результат или ошибку"""
+        from .jobs import JOBS
+
+        try:
+            result = JOBS[self.name].func(self, **self.params)
+        except Exception:
+            logger.exception('Фоновая задача %s #%s завершилась ошибкой', self.name, self.pk)
+            self.status = 'failed'
+            self.error = traceback.format_exc()
+        else:
+            self.status = 'done'
+            self.result = result
+            if isinstance(result, str):
+                self.message = result[:255]
+
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'result', 'error', 'progress_current', 'progress_total',
+                                 'message', 'finished_at'])
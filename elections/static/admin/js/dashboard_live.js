@@ -0,0 +1,217 @@
+// Обновление дашбордов без перезагрузки страницы.
+//
+// Каждые interval мс запрашивает /dashboard/<name>/data/ с If-None-Match
+// (304, если данные не менялись) и since=<версия> (только изменившиеся строки)
+// и обновляет страницу на месте:
+//   [data-live="ключ"]           - текст из итогов (summary)
+//   [data-live-color="ключ"]     - цвет текста по проценту выполнения
+//   [data-live-progress="ключ"]  - ширина и цвет прогресс-бара по проценту
+//   [data-live-width="ключ"]     - только ширина прогресс-бара
+//   tr[data-row="ключ"] td[data-field="поле"] - ячейки строк таблицы
+// Формат значения задает data-format: percent (12.5%), round (13) или
+// round-percent (13%); datetime - дата обновления в формате дд.мм.гггг чч:мм:сс.
+// Если у строки нет места на странице (появились или пропали УИК, агитаторы),
+// страница перезагружается целиком.
+//
+// С параметром streamUrl страница подписывается на SSE-поток изменений фактов
+// (/dashboard/live/) и запрашивает данные сразу по событию, а плановый опрос
+// редеет до streamInterval.
+
+(function() {
+    const COLORS = {success: '#059669', warning: '#d97706', danger: '#dc2626'};
+    const GRADIENTS = {
+        success: 'linear-gradient(90deg, #10b981 0%, #059669 100%)',
+        warning: 'linear-gradient(90deg, #f59e0b 0%, #d97706 100%)',
+        danger: 'linear-gradient(90deg, #ef4444 0%, #dc2626 100%)'
+    };
+    const ROW_COLORS = ['row-success', 'row-warning', 'row-danger-light', 'row-danger', 'row-yellow'];
+
+    function level(percent) {
+        if (percent >= 100) return 'success';
+        if (percent >= 80) return 'warning';
+        return 'danger';
+    }
+
+    function pad(number) {
+        return String(number).padStart(2, '0');
+    }
+
+    function formatValue(value, format) {
+        if (value === null || value === undefined) return '';
+        switch (format) {
+            case 'percent':
+                return value + '%';
+            case 'round':
+                return String(Math.round(value));
+            case 'round-percent':
+                return Math.round(value) + '%';
+            case 'datetime': {
+                const d = new Date(value);
+                if (isNaN(d)) return '';
+                return pad(d.getDate()) + '.' + pad(d.getMonth() + 1) + '.' + d.getFullYear() + ' ' +
+                    pad(d.getHours()) + ':' + pad(d.getMinutes()) + ':' + pad(d.getSeconds());
+            }
+            default:
+                return String(value);
+        }
+    }
+
+    function setText(element, value) {
+        // Обновляем самый вложенный элемент с текстом (strong, span.badge) или саму ячейку
+        const target = element.querySelector('.badge, .percentage-badge, strong, span') || element;
+        const text = formatValue(value, element.dataset.format);
+        if (target.textContent.trim() !== text) {
+            target.textContent = text;
+        }
+        // Бейджи процентов меняют цвет вместе со значением
+        if (target.classList.contains('badge')) {
+            target.classList.remove('success', 'warning', 'danger');
+            target.classList.add(level(value));
+        } else if (target.classList.contains('percentage-badge')) {
+            target.classList.remove('percentage-success', 'percentage-warning', 'percentage-danger');
+            target.classList.add('percentage-' + level(value));
+        }
+    }
+
+    function applySummary(summary) {
+        document.querySelectorAll('[data-live]').forEach(function(element) {
+            if (element.dataset.live in summary) {
+                setText(element, summary[element.dataset.live]);
+            }
+        });
+        document.querySelectorAll('[data-live-color]').forEach(function(element) {
+            if (element.dataset.liveColor in summary) {
+                element.style.color = COLORS[level(summary[element.dataset.liveColor])];
+            }
+        });
+        document.querySelectorAll('[data-live-progress]').forEach(function(element) {
+            if (element.dataset.liveProgress in summary) {
+                const percent = summary[element.dataset.liveProgress];
+                const width = percent > 100 ? 100 : (percent > 0 ? Math.max(1, Math.round(percent)) : 0);
+                element.style.width = width + '%';
+                element.style.background = GRADIENTS[level(percent)];
+            }
+        });
+        document.querySelectorAll('[data-live-width]').forEach(function(element) {
+            if (element.dataset.liveWidth in summary) {
+                element.style.width = Math.min(100, summary[element.dataset.liveWidth]) + '%';
+            }
+        });
+    }
+
+    // Возвращает false, если строку некуда поставить и нужна перезагрузка
+    function applyRow(row, rowKey) {
+        const tr = document.querySelector('tr[data-row="' + CSS.escape(String(rowKey(row))) + '"]');
+        if (!tr) return false;
+        tr.querySelectorAll('td[data-field]').forEach(function(td) {
+            if (td.dataset.field in row) {
+                setText(td, row[td.dataset.field]);
+            }
+        });
+        if (row.row_color && ROW_COLORS.some(function(cls) { return tr.classList.contains(cls); })) {
+            tr.classList.remove.apply(tr.classList, ROW_COLORS);
+            tr.classList.add('row-' + row.row_color);
+        }
+        return true;
+    }
+
+    function start(options) {
+        const interval = options.interval || 30000;
+        // При открытом SSE-потоке опрос нужен только как страховка
+        const streamInterval = options.streamInterval || 300000;
+        const rowKey = options.rowKey || function(row) { return row.row_key || row.uik_number; };
+        let version = null;
+        let etag = null;
+        let timer = null;
+        let polling = false;
+        let pollAgain = false;
+        let streamOpen = false;
+
+        function schedule(delay) {
+            clearTimeout(timer);
+            timer = setTimeout(poll, delay);
+        }
+
+        function poll() {
+            if (polling) {
+                pollAgain = true;
+                return;
+            }
+            polling = true;
+
+            const url = new URL(options.url, window.location.origin);
+            // Фильтры страницы (дашборд результатов) передаем как есть
+            const filters = new URLSearchParams(window.location.search).get('filters');
+            if (filters) url.searchParams.set('filters', filters);
+            if (version !== null) url.searchParams.set('since', version);
+
+            const headers = {'Accept': 'application/json'};
+            if (etag) headers['If-None-Match'] = etag;
+
+            fetch(url, {headers: headers, credentials: 'same-origin'})
+                .then(function(response) {
+                    if (response.status === 304) return null;
+                    if (!response.ok) throw new Error('HTTP ' + response.status);
+                    etag = response.headers.get('ETag');
+                    return response.json();
+                })
+                .then(function(payload) {
+                    if (!payload) return;
+                    if (payload.removed.length) {
+                        window.location.reload();
+                        return;
+                    }
+                    if (payload.full &&
+                        payload.rows.length !== document.querySelectorAll('tr[data-row]').length) {
+                        window.location.reload();
+                        return;
+                    }
+                    for (const row of payload.rows) {
+                        if (!applyRow(row, rowKey)) {
+                            window.location.reload();
+                            return;
+                        }
+                    }
+                    applySummary(payload.summary);
+                    if (options.onSummary) options.onSummary(payload.summary);
+                    version = payload.version;
+                })
+                .catch(function(error) {
+                    console.error('Ошибка обновления дашборда:', error);
+                })
+                .finally(function() {
+                    polling = false;
+                    if (pollAgain) {
+                        pollAgain = false;
+                        schedule(0);
+                    } else {
+                        schedule(streamOpen ? streamInterval : interval);
+                    }
+                });
+        }
+
+        // События потока только сообщают, что данные изменились: сами строки
+        // забираем запросом since=<версия>, общим для всех открытых дашбордов
+        if (options.streamUrl && window.EventSource) {
+            const source = new EventSource(options.streamUrl);
+            source.onopen = function() {
+                streamOpen = true;
+            };
+            source.onerror = function() {
+                streamOpen = source.readyState === EventSource.OPEN;
+            };
+            source.addEventListener('facts', function() { schedule(0); });
+            // Данные изменил другой процесс (фоновая задача)
+            source.addEventListener('version', function() { schedule(0); });
+            source.addEventListener('resync', function() {
+                version = null;
+                etag = null;
+                schedule(0);
+            });
+        }
+
+        schedule(options.initialDelay === undefined ? interval : options.initialDelay);
+    }
+
+    window.DashboardLive = {start: start, formatValue: formatValue};
+})();
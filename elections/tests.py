@@ -1,3 +1,870 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from itertools import count
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Count
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from import_export import resources
+from openpyxl import Workbook
+from tablib import Dataset
+
+from . import bulk
+from .admin import VoterResource
+from .dashboard_cache import bump_data_version, get_data_version
+from .imports import ImportLookups, VoterImport, import_voters
+from .models import (
+    User, UIK, Workplace, Voter, VoterAggregate, UIKResultsDaily, UIKFactSnapshot, VotingDateBlock, BackgroundJob,
+    deferred_fact_recalculation, flush_dirty_uik_facts,
+)
+
+PHONE_NUMBERS = count(79000000000)
+
+
+class ElectionsDataMixin:
+    """Общие данные: бригадир, два УИК с агитатором в каждом и место работы"""
+
+    @classmethod
+    def create_test_data(cls):
+        cls.workplace = Workplace.objects.create(name='Поликлиника', group='medicine')
+        cls.brigadier = cls.create_user('brigadier', 'brigadier')
+        cls.uik_1 = UIK.objects.create(number=1, address='ул. Первая', brigadier=cls.brigadier)
+        cls.uik_2 = UIK.objects.create(number=2, address='ул. Вторая', brigadier=cls.brigadier)
+        cls.agitator_1 = cls.create_user('agitator1', 'agitator')
+        cls.agitator_2 = cls.create_user('agitator2', 'agitator')
+        cls.uik_1.agitators.add(cls.agitator_1)
+        cls.uik_2.agitators.add(cls.agitator_2)
+
+    @classmethod
+    def create_user(cls, username, role):
+        return User.objects.create(
+            username=username, last_name=username.title(), first_name='Имя', middle_name='Отчество',
+            phone_number=str(next(PHONE_NUMBERS)), role=role,
+        )
+
+    def assertAggregateMatchesVoters(self):
+        """Агрегат совпадает с прямым подсчетом избирателей (и без дублей строк)"""
+        aggregate = VoterAggregate.objects.values_list(*VoterAggregate.KEY_FIELDS, 'count')
+        voters = Voter.objects.values_list(*VoterAggregate.VOTER_LOOKUPS).annotate(total=Count('id')).order_by()
+        self.assertEqual(sorted(aggregate, key=str), sorted(voters, key=str))
+
+    def assertFactsMatchRecount(self):
+        """Агрегат и факты УИК совпадают с полным пересчетом"""
+        self.assertAggregateMatchesVoters()
+        facts = list(UIKResultsDaily.objects.order_by('uik_id').values_list(
+            'fact_12_sep_calculated', 'fact_13_sep_calculated', 'fact_14_sep_calculated', 'fact_12_sep'))
+        for result in UIKResultsDaily.objects.all():
+            result.recalculate_all()
+        recount = list(UIKResultsDaily.objects.order_by('uik_id').values_list(
+            'fact_12_sep_calculated', 'fact_13_sep_calculated', 'fact_14_sep_calculated', 'fact_12_sep'))
+        self.assertEqual(facts, recount)
+
+
+class ElectionsTestCase(ElectionsDataMixin, TestCase):
+    """Тесты на общих данных внутри транзакции теста"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_test_data()
+
+    def create_voter(self, last_name, agitator=None, **fields):
+        """Избиратель, сохраненный через save() (с сигналами и действиями после коммита)"""
+        agitator = agitator or self.agitator_1
+        voter = Voter(
+            last_name=last_name, first_name='Иван', middle_name='Иванович', birth_date=date(1980, 1, 1),
+            registration_address='ул. Тестовая', workplace=self.workplace, agitator=agitator,
+            **fields,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            voter.save()
+        return voter
+
+
+class AgitatorUIKCacheTests(ElectionsTestCase):
+    """Карта агитатор -> УИК в памяти процесса (UIK.agitator_uiks)"""
+
+    def test_reassigned_agitator_gets_new_uik(self):
+        self.assertEqual(UIK.get_agitator_uik(self.agitator_1.id), (self.uik_1.id, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uik_1.agitators.remove(self.agitator_1)
+            self.uik_2.agitators.add(self.agitator_1)
+
+        self.assertEqual(UIK.get_agitator_uik(self.agitator_1.id), (self.uik_2.id, 2))
+
+    def test_removed_agitator_has_no_uik(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uik_2.agitators.remove(self.agitator_2)
+
+        self.assertIsNone(UIK.get_agitator_uik(self.agitator_2.id))
+
+    def test_map_read_in_rolled_back_transaction_is_not_kept(self):
+        agitator = self.create_user('agitator3', 'agitator')
+        try:
+            with transaction.atomic():
+                self.uik_1.agitators.add(agitator)
+                self.assertEqual(UIK.get_agitator_uik(agitator.id), (self.uik_1.id, 1))
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertIsNone(UIK.get_agitator_uik(agitator.id))
+
+
+class VoterAggregateTests(ElectionsTestCase):
+    """Дельты агрегата избирателей при сохранении, удалении и массовых изменениях"""
+
+    VOTING_DAY = date(2025, 9, 12)
+
+    def test_create(self):
+        self.create_voter('Первый')
+        self.create_voter('Второй')
+        self.create_voter('Третий', agitator=self.agitator_2, is_home_voting=True)
+
+        self.assertAggregateMatchesVoters()
+        self.assertEqual(VoterAggregate.objects.get(uik=self.uik_1).count, 2)
+
+    def test_update_voting_date_and_confirmation(self):
+        voter = self.create_voter('Первый')
+        self.create_voter('Второй')
+
+        voter.voting_date = self.VOTING_DAY
+        voter.voting_method = 'at_uik'
+        voter.save()
+        self.assertAggregateMatchesVoters()
+
+        voter.confirmed_by_brigadier = True
+        voter.save()
+        self.assertAggregateMatchesVoters()
+
+        voter.confirmed_by_brigadier = False
+        voter.voting_date = None
+        voter.voting_method = ''
+        voter.save()
+        self.assertAggregateMatchesVoters()
+
+    def test_update_uik_through_agitator(self):
+        voter = self.create_voter('Первый', voting_date=self.VOTING_DAY, voting_method='at_uik',
+                                   confirmed_by_brigadier=True)
+
+        voter.agitator = self.agitator_2
+        voter.save()
+
+        self.assertEqual(voter.uik_id, self.uik_2.id)
+        self.assertAggregateMatchesVoters()
+        self.assertFalse(VoterAggregate.objects.filter(uik=self.uik_1).exists())
+
+    def test_delete(self):
+        voter = self.create_voter('Первый')
+        self.create_voter('Второй')
+
+        voter.delete()
+        self.assertAggregateMatchesVoters()
+
+        Voter.objects.get().delete()
+        self.assertAggregateMatchesVoters()
+        self.assertFalse(VoterAggregate.objects.exists())
+
+    def test_delete_after_change_in_memory(self):
+        voter = self.create_voter('Первый', voting_date=self.VOTING_DAY, voting_method='at_uik',
+                                  confirmed_by_brigadier=True)
+        self.create_voter('Второй')
+
+        voter.agitator = self.agitator_2
+        voter.voting_date = None
+        voter.confirmed_by_brigadier = False
+        with self.captureOnCommitCallbacks(execute=True):
+            voter.delete()
+
+        self.assertAggregateMatchesVoters()
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep, 0)
+
+    def test_fact_drift_below_zero_triggers_recount(self):
+        voter = self.create_voter('Первый', voting_date=self.VOTING_DAY, voting_method='at_uik',
+                                  confirmed_by_brigadier=True)
+        self.create_voter('Второй', voting_date=self.VOTING_DAY, voting_method='at_uik', confirmed_by_brigadier=True)
+        UIKResultsDaily.objects.filter(uik=self.uik_1).update(fact_12_sep_calculated=0)
+
+        voter.confirmed_by_brigadier = False
+        with self.assertLogs('elections.models', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            voter.save()
+
+        self.assertAggregateMatchesVoters()
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep_calculated, 1)
+
+    def test_bulk_save_voters(self):
+        for name in ('Первый', 'Второй', 'Третий'):
+            self.create_voter(name)
+
+        voters = list(Voter.objects.select_related('workplace'))
+        for voter in voters[:2]:
+            voter.voting_date = self.VOTING_DAY
+            voter.voting_method = 'at_home'
+            voter.confirmed_by_brigadier = True
+        voters[2].agitator = self.agitator_2
+        voters[2].assign_agitator_uik()
+        bulk.bulk_save_voters(voters, ['voting_date', 'voting_method', 'confirmed_by_brigadier', 'agitator', 'uik'])
+
+        self.assertAggregateMatchesVoters()
+
+    def test_reassign_voters(self):
+        self.create_voter('Первый', voting_date=self.VOTING_DAY, voting_method='at_uik', confirmed_by_brigadier=True)
+        self.create_voter('Второй')
+        self.create_voter('Третий', agitator=self.agitator_2)
+
+        moved = bulk.reassign_voters(Voter.objects.filter(agitator=self.agitator_1), self.uik_2.id, self.agitator_2.id)
+
+        self.assertEqual(moved, 2)
+        self.assertAggregateMatchesVoters()
+        self.assertFalse(VoterAggregate.objects.filter(uik=self.uik_1).exists())
+
+    def test_key_is_unique_with_empty_dimensions(self):
+        key = dict(uik=self.uik_1, agitator=None, workplace_group=None, planned_date=self.VOTING_DAY, voting_date=None)
+        VoterAggregate.objects.create(count=1, **key)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            VoterAggregate.objects.create(count=1, **key)
+
+    def test_rebuild_merges_drifted_rows(self):
+        self.create_voter('Первый')
+        self.create_voter('Второй', agitator=self.agitator_2)
+        VoterAggregate.objects.filter(uik=self.uik_1).update(count=5)
+
+        VoterAggregate.rebuild([self.uik_1.id])
+
+        self.assertAggregateMatchesVoters()
+
+
+class RecalculateFactsTests(ElectionsTestCase):
+    """Полный пересчет фактов исправляет расхождения агрегата с избирателями"""
+
+    VOTING_DAY = date(2025, 9, 12)
+
+    def setUp(self):
+        self.create_voter('Первый', voting_date=self.VOTING_DAY, voting_method='at_uik', confirmed_by_brigadier=True)
+        self.create_voter('Второй', voting_date=self.VOTING_DAY, voting_method='at_home', confirmed_by_brigadier=True)
+        self.create_voter('Третий', agitator=self.agitator_2, voting_date=self.VOTING_DAY, voting_method='at_uik',
+                          confirmed_by_brigadier=True)
+        VoterAggregate.objects.update(count=10)
+        UIKResultsDaily.objects.update(fact_12_sep_calculated=10, fact_12_sep=10)
+
+    def assertFactsMatchVoters(self):
+        self.assertAggregateMatchesVoters()
+        facts = dict(UIKResultsDaily.objects.values_list('uik_id', 'fact_12_sep_calculated'))
+        self.assertEqual(facts, {self.uik_1.id: 2, self.uik_2.id: 1})
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep, 2)
+
+    def test_recalculate_all_daily_facts(self):
+        call_command('recalculate_all_daily_facts', stdout=StringIO())
+        self.assertFactsMatchVoters()
+
+    def test_recalculate_daily_facts(self):
+        call_command('recalculate_daily_facts', stdout=StringIO())
+        self.assertFactsMatchVoters()
+
+    def test_dry_run_keeps_data(self):
+        call_command('recalculate_all_daily_facts', dry_run=True, stdout=StringIO())
+
+        self.assertEqual(set(VoterAggregate.objects.values_list('count', flat=True)), {10})
+        self.assertEqual(set(UIKResultsDaily.objects.values_list('fact_12_sep_calculated', flat=True)), {10})
+
+
+class BulkConfirmVotersTests(ElectionsTestCase):
+    """Массовое подтверждение: факты и агрегат, блокировки дат, отложенный пересчет"""
+
+    VOTING_DAY = date(2025, 9, 12)
+
+    def block_date(self, voting_date):
+        with self.captureOnCommitCallbacks(execute=True):
+            VotingDateBlock.objects.create(voting_date=voting_date, is_blocked=True)
+        # Блокировки кэшируются в памяти процесса, а откат теста их не сбрасывает
+        self.addCleanup(self.reset_blocked_dates)
+
+    def reset_blocked_dates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            VotingDateBlock.invalidate_cache()
+
+    def test_confirm_matches_recount(self):
+        voters = [self.create_voter('Первый'), self.create_voter('Второй'),
+                  self.create_voter('Третий', agitator=self.agitator_2)]
+        already_confirmed = self.create_voter('Четвертый', voting_date=date(2025, 9, 13), voting_method='at_uik',
+                                              confirmed_by_brigadier=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = bulk.bulk_confirm_voters(
+                [voter.id for voter in voters + [already_confirmed]],
+                voting_date=self.VOTING_DAY, voting_method='at_uik', confirmed_by_brigadier=True,
+            )
+
+        self.assertEqual((result['updated'], result['skipped'], result['errors']), (3, 1, 0))
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep, 2)
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_2).fact_12_sep, 1)
+        self.assertFactsMatchRecount()
+
+    def test_unconfirm_matches_recount(self):
+        voter = self.create_voter('Первый', voting_date=self.VOTING_DAY, voting_method='at_uik',
+                                  confirmed_by_brigadier=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = bulk.bulk_confirm_voters([voter.id], confirmed_by_brigadier=False)
+
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep, 0)
+        self.assertFactsMatchRecount()
+
+    def test_blocked_date_cannot_be_unconfirmed(self):
+        voter = self.create_voter('Первый', voting_date=self.VOTING_DAY, voting_method='at_uik',
+                                  confirmed_by_brigadier=True)
+        self.block_date(self.VOTING_DAY)
+
+        result = bulk.bulk_confirm_voters([voter.id], confirmed_by_brigadier=False)
+
+        self.assertEqual(result['skipped'], 1)
+        self.assertIn('заблокирована', result['skipped_list'][0])
+        voter.refresh_from_db()
+        self.assertTrue(voter.confirmed_by_brigadier)
+        self.assertFactsMatchRecount()
+
+    def test_blocked_date_cannot_be_set(self):
+        voter = self.create_voter('Первый')
+        self.block_date(self.VOTING_DAY)
+
+        result = bulk.bulk_confirm_voters([voter.id], voting_date=self.VOTING_DAY, voting_method='at_uik',
+                                          confirmed_by_brigadier=True)
+
+        self.assertEqual(result['errors'], 1)
+        self.assertIn('voting_date', result['error_list'][0])
+        voter.refresh_from_db()
+        self.assertEqual((voter.voting_date, voter.confirmed_by_brigadier), (None, False))
+        self.assertFactsMatchRecount()
+
+
+class VoterChangelistSaveTests(ElectionsTestCase):
+    """Сохранение строк списка избирателей (list_editable) одним пакетом"""
+
+    URL = '/admin/elections/voter/'
+
+    def setUp(self):
+        self.admin = self.create_user('admin', 'admin')
+        self.admin.is_superuser = True
+        self.admin.is_staff = True
+        self.admin.save()
+        self.client.force_login(self.admin)
+
+    def row(self, index, voter, **changes):
+        values = {
+            'planned_date': voter.planned_date.isoformat(),
+            'voting_date': voter.voting_date.isoformat() if voter.voting_date else '',
+            'voting_method': voter.voting_method or '',
+            'confirmed_by_brigadier': voter.confirmed_by_brigadier,
+            'is_agitator': voter.is_agitator,
+            'is_home_voting': voter.is_home_voting,
+        }
+        values.update(changes)
+        data = {f'form-{index}-id': str(voter.pk)}
+        for field, value in values.items():
+            # Снятый флажок в форме не отправляется
+            if value is True:
+                data[f'form-{index}-{field}'] = 'on'
+            elif value is not False:
+                data[f'form-{index}-{field}'] = value
+        return data
+
+    def post_rows(self, *rows):
+        data = {
+            '_save': 'Сохранить', 'action': '',
+            'form-TOTAL_FORMS': str(len(rows)), 'form-INITIAL_FORMS': str(len(rows)),
+            'form-MIN_NUM_FORMS': '0', 'form-MAX_NUM_FORMS': '1000',
+        }
+        for row in rows:
+            data.update(row)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.URL, data, follow=True)
+
+    def test_valid_row_saved_and_invalid_row_reported(self):
+        self.create_voter('Фоновый', voting_date=date(2025, 9, 12), voting_method='at_uik',
+                          confirmed_by_brigadier=True)
+        valid = self.create_voter('Верный', agitator=self.agitator_2)
+        invalid = self.create_voter('Неверный')
+
+        response = self.post_rows(
+            self.row(0, valid, voting_date='2025-09-13', voting_method='at_uik', confirmed_by_brigadier=True),
+            # Дата голосования без способа не проходит Voter.clean()
+            self.row(1, invalid, voting_date='2025-09-12', confirmed_by_brigadier=True),
+        )
+
+        valid.refresh_from_db()
+        invalid.refresh_from_db()
+        self.assertEqual((valid.voting_date, valid.voting_method, valid.confirmed_by_brigadier),
+                         (date(2025, 9, 13), 'at_uik', True))
+        self.assertEqual((invalid.voting_date, invalid.confirmed_by_brigadier), (None, False))
+
+        errors = [str(message) for message in response.context['messages'] if message.level_tag == 'error']
+        self.assertEqual(len(errors), 1)
+        self.assertIn(invalid.get_full_name(), errors[0])
+
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep, 1)
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_2).fact_13_sep, 1)
+        self.assertFactsMatchRecount()
+
+
+class TransferAgitatorVotersTests(ElectionsTestCase):
+    """Перенос избирателей между агитаторами одним UPDATE"""
+
+    def test_transfer_matches_recount(self):
+        new_agitator = self.create_user('agitator3', 'agitator')
+        self.uik_1.agitators.add(new_agitator)
+        self.create_voter('Первый', voting_date=date(2025, 9, 12), voting_method='at_uik',
+                          confirmed_by_brigadier=True)
+        self.create_voter('Второй', voting_date=date(2025, 9, 13), voting_method='at_home')
+        self.create_voter('Третий', agitator=new_agitator, voting_date=date(2025, 9, 12), voting_method='at_uik',
+                          confirmed_by_brigadier=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            success, message = self.uik_1.transfer_agitator_voters(self.agitator_1, new_agitator, self.brigadier)
+
+        self.assertTrue(success, message)
+        self.assertFalse(Voter.objects.filter(agitator=self.agitator_1).exists())
+        self.assertEqual(Voter.objects.filter(agitator=new_agitator, uik=self.uik_1).count(), 3)
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep, 2)
+        self.assertFactsMatchRecount()
+
+    def test_transfer_to_other_uik_matches_recount(self):
+        self.create_voter('Первый', voting_date=date(2025, 9, 12), voting_method='at_uik',
+                          confirmed_by_brigadier=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            success, message = self.uik_1.transfer_agitator_voters(self.agitator_1, self.agitator_2, self.brigadier)
+
+        self.assertTrue(success, message)
+        self.assertEqual(Voter.objects.get().uik, self.uik_2)
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep, 0)
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_2).fact_12_sep, 1)
+        self.assertFactsMatchRecount()
+
+
+class AgitatorUIKChangeTests(ElectionsTestCase):
+    """Перевод избирателей при смене УИК агитатора (сигнал m2m_changed)"""
+
+    def create_confirmed_voters(self):
+        self.create_voter('Первый', voting_date=date(2025, 9, 12), voting_method='at_uik',
+                          confirmed_by_brigadier=True)
+        self.create_voter('Второй', voting_date=date(2025, 9, 14), voting_method='at_home',
+                          confirmed_by_brigadier=True)
+        self.create_voter('Третий')
+
+    def test_add_to_uik_matches_recount(self):
+        self.create_confirmed_voters()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uik_1.agitators.remove(self.agitator_1)
+            self.uik_2.agitators.add(self.agitator_1)
+
+        self.assertEqual(Voter.objects.filter(uik=self.uik_2).count(), 3)
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep, 0)
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_2).fact_12_sep, 1)
+        self.assertFactsMatchRecount()
+
+    def test_add_from_agitator_side_matches_recount(self):
+        self.create_confirmed_voters()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.agitator_1.assigned_uiks_as_agitator.remove(self.uik_1)
+            self.agitator_1.assigned_uiks_as_agitator.add(self.uik_2)
+
+        self.assertEqual(Voter.objects.filter(uik=self.uik_2).count(), 3)
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_2).fact_14_sep, 1)
+        self.assertFactsMatchRecount()
+
+
+class DeferredFactRecalculationTests(ElectionsTestCase):
+    """Помеченные УИК обновляются один раз после коммита и не обновляются при откате"""
+
+    VOTING_DAY = date(2025, 9, 12)
+
+    def confirm(self, voter):
+        voter.voting_date = self.VOTING_DAY
+        voter.voting_method = 'at_uik'
+        voter.confirmed_by_brigadier = True
+        voter.save()
+
+    def test_flushes_once_on_commit(self):
+        voters = [self.create_voter('Первый'), self.create_voter('Второй')]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with deferred_fact_recalculation():
+                for voter in voters:
+                    self.confirm(voter)
+
+        self.assertEqual(callbacks.count(flush_dirty_uik_facts), 1)
+        result = UIKResultsDaily.objects.get(uik=self.uik_1)
+        self.assertEqual((result.fact_12_sep_calculated, result.fact_12_sep), (2, 0))
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep, 2)
+
+    def test_rollback_does_not_flush(self):
+        voter = self.create_voter('Первый')
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic(), deferred_fact_recalculation():
+                    self.confirm(voter)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertNotIn(flush_dirty_uik_facts, callbacks)
+        result = UIKResultsDaily.objects.get(uik=self.uik_1)
+        self.assertEqual((result.fact_12_sep_calculated, result.fact_12_sep), (0, 0))
+
+
+class VoterBookMixin:
+    """Книги XLSX со строками избирателей для импорта"""
+
+    HEADER = ('last_name', 'first_name', 'middle_name', 'birth_date', 'registration_address', 'workplace',
+              'uik', 'agitator', 'voting_date', 'voting_method', 'confirmed_by_brigadier')
+
+    def row(self, last_name, uik=None, agitator=None, voting_date=None, voting_method='', confirmed='Нет'):
+        uik, agitator = uik or self.uik_1, agitator or self.agitator_1
+        return (last_name, 'Иван', 'Иванович', '01.01.1980', 'ул. Тестовая', self.workplace.id,
+                uik.id, agitator.id, voting_date, voting_method, confirmed)
+
+    def write_book(self, rows):
+        workbook = Workbook()
+        workbook.active.append(self.HEADER)
+        for row in rows:
+            workbook.active.append(row)
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        workbook.save(path)
+        return path
+
+
+class VoterImportTests(VoterBookMixin, ElectionsTestCase):
+    """Потоковый импорт избирателей из XLSX (elections.imports)"""
+
+    VOTING_DAY = date(2025, 9, 12)
+
+    def run_import(self, rows, **kwargs):
+        path = self.write_book(rows)
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_voters(path, **kwargs)
+
+    def test_chunk_boundaries(self):
+        rows = [self.row(f'Избиратель{number}') for number in range(5)]
+        # Тот же избиратель в следующей пачке и дважды в одной пачке
+        rows.append(self.row('Избиратель1', voting_date='12.09.2025', voting_method='at_uik', confirmed='Да'))
+        rows.append(self.row('Избиратель4', agitator=self.agitator_2, uik=self.uik_2))
+        rows.append(self.row('Избиратель4', agitator=self.agitator_2, uik=self.uik_2))
+
+        report = import_voters(self.write_book(rows), chunk_size=2)
+
+        self.assertEqual((report['total'], report['created'], report['updated'], report['skipped']), (8, 5, 2, 1))
+        self.assertEqual(report['errors'], [])
+        self.assertEqual(Voter.objects.count(), 5)
+        voter = Voter.objects.get(last_name='Избиратель1')
+        self.assertEqual((voter.voting_date, voter.confirmed_by_brigadier), (self.VOTING_DAY, True))
+        self.assertEqual(Voter.objects.get(last_name='Избиратель4').uik, self.uik_2)
+        self.assertAggregateMatchesVoters()
+
+    def test_row_numbers_in_errors(self):
+        rows = [
+            self.row('Первый'),
+            self.row(''),
+            self.row('Третий', voting_date='01.01.2025', voting_method='at_uik'),
+            self.row('Четвертый'),
+        ]
+        rows[3] = rows[3][:6] + (999,) + rows[3][7:]
+
+        report = import_voters(self.write_book(rows), chunk_size=2)
+
+        self.assertEqual([error['row'] for error in report['errors']], [3, 4, 5])
+        self.assertIn('Фамилия обязательна', report['errors'][0]['messages'])
+        self.assertIn('uik: запись с ID 999 не найдена', report['errors'][2]['messages'])
+        self.assertEqual(list(Voter.objects.values_list('last_name', flat=True)), ['Первый'])
+
+    def test_dry_run_keeps_database(self):
+        existing = self.create_voter('Первый')
+        aggregate = list(VoterAggregate.objects.values_list(*VoterAggregate.KEY_FIELDS, 'count'))
+        version = get_data_version()
+        rows = [self.row('Первый', voting_date='12.09.2025', voting_method='at_uik', confirmed='Да'),
+                self.row('Второй', voting_date='12.09.2025', voting_method='at_uik', confirmed='Да')]
+
+        report = self.run_import(rows, dry_run=True)
+
+        self.assertEqual((report['created'], report['updated']), (1, 1))
+        self.assertEqual(list(Voter.objects.all()), [existing])
+        existing.refresh_from_db()
+        self.assertIsNone(existing.voting_date)
+        self.assertEqual(list(VoterAggregate.objects.values_list(*VoterAggregate.KEY_FIELDS, 'count')), aggregate)
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep_calculated, 0)
+        self.assertEqual(get_data_version(), version)
+
+    def test_updates_existing_voters(self):
+        moved = self.create_voter('Первый')
+        unchanged = self.create_voter('Второй')
+        rows = [self.row('Первый', agitator=self.agitator_2, uik=self.uik_2), self.row('Второй')]
+
+        report = self.run_import(rows)
+
+        self.assertEqual((report['created'], report['updated'], report['skipped']), (0, 1, 1))
+        moved.refresh_from_db()
+        self.assertEqual((moved.agitator, moved.uik), (self.agitator_2, self.uik_2))
+        self.assertEqual(Voter.objects.get(pk=unchanged.pk).updated_at, unchanged.updated_at)
+        self.assertAggregateMatchesVoters()
+
+    def test_failed_chunk_keeps_committed_chunks_consistent(self):
+        rows = [self.row(f'Избиратель{number}', voting_date='12.09.2025', voting_method='at_uik', confirmed='Да')
+                for number in range(5)]
+        import_chunk = VoterImport.import_chunk
+        calls = count()
+
+        def failing_chunk(voter_import, chunk):
+            if next(calls) == 1:
+                raise RuntimeError('ошибка пачки')
+            import_chunk(voter_import, chunk)
+
+        with mock.patch.object(VoterImport, 'import_chunk', failing_chunk), self.assertRaises(RuntimeError):
+            self.run_import(rows, chunk_size=2)
+
+        self.assertEqual(Voter.objects.count(), 2)
+        self.assertAggregateMatchesVoters()
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_1).fact_12_sep_calculated, 2)
+
+    def test_rebuilds_aggregate_and_recalculates_uiks(self):
+        self.create_voter('Первый', voting_date=self.VOTING_DAY, voting_method='at_uik', confirmed_by_brigadier=True)
+        version = get_data_version()
+        rows = [
+            self.row('Первый', agitator=self.agitator_2, uik=self.uik_2, voting_date='12.09.2025',
+                     voting_method='at_uik', confirmed='Да'),
+            self.row('Второй', voting_date='12.09.2025', voting_method='at_home', confirmed='Да'),
+            self.row('Третий', agitator=self.agitator_2, uik=self.uik_2, voting_date='12.09.2025',
+                     voting_method='at_uik', confirmed='Да'),
+        ]
+
+        self.run_import(rows, chunk_size=2)
+
+        self.assertAggregateMatchesVoters()
+        facts = dict(UIKResultsDaily.objects.values_list('uik_id', 'fact_12_sep_calculated'))
+        self.assertEqual(facts, {self.uik_1.id: 1, self.uik_2.id: 2})
+        self.assertEqual(UIKResultsDaily.objects.get(uik=self.uik_2).fact_12_sep, 2)
+        self.assertGreater(get_data_version(), version)
+
+
+class PlainVoterResource(resources.ModelResource):
+    """VoterResource без справочников: связи ищет стандартный ForeignKeyWidget"""
+
+    class Meta:
+        model = Voter
+        fields = VoterResource._meta.fields
+        import_id_fields = VoterResource._meta.import_id_fields
+
+
+class ImportLookupsTests(ElectionsTestCase):
+    """Ссылки VoterResource по справочникам импорта (ImportLookupsMixin)"""
+
+    HEADER = ('last_name', 'first_name', 'middle_name', 'birth_date', 'registration_address', 'planned_date',
+              'workplace', 'uik', 'agitator')
+    REFERENCE_TABLES = ('elections_workplace', 'elections_user', 'elections_uik')
+
+    def row(self, last_name, workplace='', uik=None, agitator=None):
+        return (last_name, 'Иван', 'Иванович', '1980-01-01', 'ул. Тестовая', '2025-09-12', workplace,
+                self.uik_1.id if uik is None else uik, self.agitator_1.id if agitator is None else agitator)
+
+    def import_rows(self, resource, rows, **kwargs):
+        dataset = Dataset(headers=self.HEADER)
+        for row in rows:
+            dataset.append(row)
+        return resource.import_data(dataset, dry_run=True, **kwargs)
+
+    @staticmethod
+    def row_errors(result):
+        """{номер строки: ошибки} по ошибкам строк и ошибкам валидации"""
+        errors = {number: [(type(error.error), str(error.error)) for error in row_errors]
+                  for number, row_errors in result.row_errors()}
+        errors.update((row.number, row.error_dict) for row in result.invalid_rows)
+        return errors
+
+    def reference_queries(self, queries):
+        return [query['sql'] for query in queries
+                if any(f'FROM "{table}"' in query['sql'] for table in self.REFERENCE_TABLES)]
+
+    def test_unknown_references_match_foreign_key_widget(self):
+        rows = [
+            self.row('Первый', uik=999),
+            self.row('Второй', agitator=999),
+            self.row('Третий', agitator='nobody'),
+            self.row('Четвертый', workplace=999),
+            self.row('Пятый', workplace=self.workplace.id),
+        ]
+
+        errors = self.row_errors(self.import_rows(VoterResource(), rows))
+
+        self.assertEqual(errors, self.row_errors(self.import_rows(PlainVoterResource(), rows)))
+        self.assertEqual(sorted(errors), [1, 2, 3, 4])
+
+    def test_lookups_load_once_per_import(self):
+        with self.assertNumQueries(3):
+            lookups = ImportLookups()
+
+        rows = [self.row(f'Избиратель{number}', workplace=self.workplace.name,
+                         agitator=self.agitator_1.username if number % 2 else self.agitator_1.id)
+                for number in range(6)]
+        with CaptureQueriesContext(connection) as queries:
+            result = self.import_rows(VoterResource(), rows, lookups=lookups)
+
+        self.assertFalse(result.has_errors() or result.has_validation_errors())
+        self.maxDiff = None
+        self.assertEqual(self.reference_queries(queries.captured_queries), [])
+
+
+class JobProgressTests(VoterBookMixin, ElectionsDataMixin, TransactionTestCase):
+    """Ход фоновой задачи виден другим соединениям (странице задач), пока задача идет"""
+
+    def setUp(self):
+        self.create_test_data()
+        self.other = connections.create_connection('default')
+        self.addCleanup(self.other.close)
+        self.job = BackgroundJob.enqueue('recalculate_all_daily_facts')
+        self.seen = []
+
+    def read_from_other_connection(self, sql, params=()):
+        with self.other.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+
+    def progress(self, current, total):
+        self.job.set_progress(current, total)
+        self.seen.append((
+            self.read_from_other_connection(
+                'SELECT progress_current, progress_total FROM elections_backgroundjob WHERE id = %s', [self.job.pk],
+            ),
+            self.read_from_other_connection('SELECT COUNT(*) FROM elections_voter')[0],
+        ))
+
+    @mock.patch.object(BackgroundJob, 'PROGRESS_INTERVAL', 0)
+    def test_recalculate_all_daily_facts(self):
+        call_command('recalculate_all_daily_facts', stdout=StringIO(), progress=self.progress)
+
+        self.assertEqual([progress for progress, _ in self.seen], [(1, 2), (2, 2)])
+
+    @mock.patch.object(BackgroundJob, 'PROGRESS_INTERVAL', 0)
+    def test_voter_import(self):
+        path = self.write_book([self.row(f'Избиратель{number}') for number in range(5)])
+
+        VoterImport(chunk_size=2, progress=self.progress).run(path)
+
+        # После каждой пачки и ход, и сами избиратели пачки уже зафиксированы
+        self.assertEqual(self.seen[:2], [((2, 5), 2), ((4, 5), 4)])
+        self.assertEqual(self.seen[-1], ((5, 5), 5))
+        self.assertAggregateMatchesVoters()
+
+
+class DataVersionTests(TestCase):
+    """Версия данных дашбордов (elections.dashboard_cache)"""
+
+    def bump(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_version()
+        return get_data_version()
+
+    def test_bump_sets_new_version(self):
+        version = get_data_version()
+        self.assertGreater(self.bump(), version)
+
+    @mock.patch('elections.dashboard_cache._now_version', return_value=1)
+    def test_versions_differ_within_one_clock_tick(self, now_version):
+        first = self.bump()
+        self.assertNotEqual(self.bump(), first)
+
+
+class DashboardDataETagTests(ElectionsTestCase):
+    """ETag JSON дашборда учитывает фильтры и область видимости пользователя"""
+
+    URL = '/dashboard/results/data/'
+
+    def setUp(self):
+        self.admin = self.create_user('admin', 'admin')
+        self.admin.is_superuser = True
+        self.admin.save()
+        self.client.force_login(self.admin)
+
+    def get(self, etag=None, **params):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(self.URL, params, headers=headers)
+
+    def test_same_user_and_filters_get_304(self):
+        response = self.get(filters='{"uik": [1]}')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Cookie', response['Vary'])
+
+        response = self.get(response['ETag'], filters='{"uik": [1]}')
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_filters_get_200(self):
+        etag = self.get(filters='{"uik": [1]}')['ETag']
+
+        response = self.get(etag, filters='{"uik": [2]}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_other_user_gets_200(self):
+        etag = self.get()['ETag']
+        self.client.force_login(self.brigadier)
+
+        response = self.get(etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class UIKFactSnapshotTests(ElectionsTestCase):
+    """Снимки фактов УИК (команда snapshot_uik_facts) и политика их хранения"""
+
+    NOW = datetime(2025, 9, 13, 12, 0, tzinfo=dt_timezone.utc)
+
+    def snapshot_at(self, *times):
+        for taken_at in times:
+            UIKFactSnapshot.take(taken_at)
+
+    def test_command_writes_one_row_per_uik(self):
+        self.create_voter('Первый', voting_date=date(2025, 9, 12), voting_method='at_uik', confirmed_by_brigadier=True)
+        self.create_voter('Второй', agitator=self.agitator_2, voting_date=date(2025, 9, 13), voting_method='at_home',
+                          confirmed_by_brigadier=True)
+
+        call_command('snapshot_uik_facts', stdout=StringIO())
+        call_command('snapshot_uik_facts', stdout=StringIO())
+
+        self.assertEqual(UIKFactSnapshot.objects.values('taken_at').distinct().count(), 2)
+        rows = UIKFactSnapshot.objects.values_list('uik_id', 'fact_12_sep', 'fact_13_sep', 'fact_14_sep')
+        self.assertEqual(sorted(rows), [(self.uik_1.id, 1, 0, 0)] * 2 + [(self.uik_2.id, 0, 1, 0)] * 2)
+
+    @override_settings(FACT_SNAPSHOT_RAW_RETENTION=timedelta(hours=1),
+                       FACT_SNAPSHOT_DOWNSAMPLE_STEP=timedelta(hours=1),
+                       FACT_SNAPSHOT_RETENTION=timedelta(days=1))
+    def test_downsample_thins_old_snapshots(self):
+        def at(hour, minute=0, day=13):
+            return self.NOW.replace(day=day, hour=hour, minute=minute)
+
+        self.snapshot_at(at(11, 30), at(10, 50), at(9, 10), at(9, 20), at(9, 50), at(9, 0, day=11))
+
+        deleted = UIKFactSnapshot.downsample(now=self.NOW)
+
+        # Свежие снимки целиком, из старых - последний за час, старше суток - удалены
+        kept = sorted(UIKFactSnapshot.objects.values_list('taken_at', flat=True).distinct())
+        self.assertEqual(kept, [at(9, 50), at(10, 50), at(11, 30)])
+        self.assertEqual(deleted, 3 * 2)
+
+    def test_default_policy_keeps_recent_snapshots(self):
+        self.snapshot_at(self.NOW - timedelta(hours=3), self.NOW - timedelta(hours=3, minutes=10))
+
+        self.assertEqual(UIKFactSnapshot.downsample(now=self.NOW), 0)
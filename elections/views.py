@@ -1,13 +1,20 @@
+import hashlib
+
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from .dashboard import (
     analysis_dashboard_callback,
     results_dashboard_callback,
     results_table_dashboard_callback,
     results_by_brigadiers_dashboard_callback,
 )
-from .models import Voter, User, UIK
+from .dashboard_cache import get_data_version, get_cached_dashboard_entry, changed_dashboard_rows, dashboard_cache_key
+from .live import broadcaster, event_stream
+from .models import Voter, User, UIK, UIKFactSnapshot, VOTING_DATES
 
 # Create your views here.
 
@@ -35,6 +42,116 @@ def results_by_brigadiers_dashboard_view(request):
     context = results_by_brigadiers_dashboard_callback(request, {})
     return render(request, 'admin/results_by_brigadiers_dashboard.html', context)
 
+# Источники данных для /dashboard/<name>/data/: callback и ключ списка строк
+DASHBOARD_DATA_SOURCES = {
+    'analysis': (analysis_dashboard_callback, 'uik_table_data'),
+    'results': (results_dashboard_callback, 'uik_table_data'),
+    'results-table': (results_table_dashboard_callback, 'uik_table_rows'),
+    'results-by-brigadiers': (results_by_brigadiers_dashboard_callback, 'brigadier_rows'),
+}
+
+
+def _dashboard_row_key(row):
+    """Ключ строки дашборда: row_key для составных таблиц, иначе номер УИК"""
+    return row.get('row_key') or row.get('uik_number')
+
+
+def _dashboard_etag(cache_key, version):
+    """ETag по ключу кэша дашборда (дашборд, фильтры, область видимости) и версии данных"""
+    return f'"{hashlib.md5(cache_key.encode("utf-8")).hexdigest()}-{version}"'
+
+
+@login_required(login_url='/admin/login/')
+def dashboard_data_view(request, name):
+    """JSON с цифрами дашборда для обновления страницы без перезагрузки.
+
+    ETag — ключ кэша дашборда (фильтры и область видимости пользователя) и
+    версия данных: если они не изменились, отвечаем 304 без расчета.
+    С параметром since=<версия> в rows попадают только строки, изменившиеся
+    с этой версии (full=false); если история версии уже недоступна,
+    отдаются все строки (full=true).
+    """
+    if name not in DASHBOARD_DATA_SOURCES:
+        raise Http404('Неизвестный дашборд')
+    callback, rows_key = DASHBOARD_DATA_SOURCES[name]
+
+    cache_key = dashboard_cache_key(callback.dashboard_name, request, callback.use_filters)
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and _dashboard_etag(cache_key, get_data_version()) in parse_etags(if_none_match):
+        response = HttpResponseNotModified()
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    version, data = get_cached_dashboard_entry(
+        callback.dashboard_name, request,
+        lambda: callback.__wrapped__(request, {}),
+        use_filters=callback.use_filters,
+    )
+    rows = [row for row in data.get(rows_key, []) if row.get('row_type') != 'separator']
+    summary = {key: value for key, value in data.items() if key != rows_key}
+
+    since = request.GET.get('since')
+    changes = changed_dashboard_rows(
+        callback.dashboard_name, request, version, rows, _dashboard_row_key,
+        since=int(since) if since and since.isdigit() else None,
+        use_filters=callback.use_filters,
+    )
+    if changes is None:
+        payload = {'version': version, 'full': True, 'summary': summary, 'rows': rows, 'removed': []}
+    else:
+        changed, removed = changes
+        payload = {'version': version, 'full': False, 'summary': summary, 'rows': changed, 'removed': removed}
+
+    response = JsonResponse(payload)
+    response['ETag'] = _dashboard_etag(cache_key, version)
+    response['Cache-Control'] = 'private, no-cache'
+    # Данные зависят от пользователя сессии: кэш браузера не переносит их между входами
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+@login_required(login_url='/admin/login/')
+async def live_facts_stream(request):
+    """SSE-поток дельт фактов по УИК и агитаторам (см. elections.live).
+
+    Работает только под ASGI: под WSGI (runserver) отвечаем 204, и
+    EventSource на странице не переподключается, оставаясь на опросе
+    /dashboard/<name>/data/.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(event_stream(broadcaster.subscribe()), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx не должен буферизовать поток
+    return response
+
+@login_required(login_url='/admin/login/')
+def turnout_curve_view(request):
+    """JSON кривой явки по снимкам фактов (UIKFactSnapshot).
+
+    Параметры: date=ГГГГ-ММ-ДД — день голосования (без него — сумма за все
+    дни), uik=<номер> — один или несколько УИК (без него — все УИК).
+    """
+    voting_date = request.GET.get('date')
+    if voting_date:
+        voting_date = next((day for day in VOTING_DATES if day.isoformat() == voting_date), None)
+        if voting_date is None:
+            return JsonResponse({'error': 'Неизвестная дата голосования'}, status=400)
+
+    snapshots = UIKFactSnapshot.objects.all()
+    uik_numbers = [number for number in request.GET.getlist('uik') if number.isdigit()]
+    if uik_numbers:
+        snapshots = snapshots.filter(uik__number__in=uik_numbers)
+
+    points = snapshots.turnout_curve(voting_date or None)
+    return JsonResponse({
+        'date': voting_date.isoformat() if voting_date else None,
+        'points': [
+            {'taken_at': point['taken_at'].isoformat(), 'fact': point['fact']}
+            for point in points
+        ],
+    })
+
 @login_required(login_url='/admin/login/')
 def get_uik_agitators(request, voter_id):
     """AJAX endpoint для получения агитаторов УИК выбранного избирателя"""
@@ -78,11 +195,11 @@ def get_agitator_uik(request, user_id):
     try:
         user = User.objects.get(id=user_id, role='agitator')
         
-        # Получаем первый УИК, где работает агитатор
-        uik = user.assigned_uiks_as_agitator.first()
+        # Получаем первый УИК, где работает агитатор (из кэша назначений)
+        uik = UIK.get_agitator_uik(user.pk)
         
         if uik:
-            return JsonResponse({'uik_id': uik.id, 'uik_number': uik.number})
+            return JsonResponse({'uik_id': uik[0], 'uik_number': uik[1]})
         else:
             return JsonResponse({'error': 'Агитатор не назначен ни на один УИК'}, status=404)
             
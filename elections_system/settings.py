@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 from decouple import config
 
@@ -100,6 +101,32 @@ DATABASES = {
     }
 }
 
+# Cache
+# Через кэш процессы (веб-воркеры, run_jobs, snapshot_uik_facts) узнают об
+# изменениях друг друга: версия данных дашбордов (elections.dashboard_cache) и
+# метки версий карты агитаторов и блокировок дат. Поэтому бэкенд должен быть
+# общим для всех процессов: по умолчанию файловый кэш в каталоге проекта, при
+# нескольких серверах - Redis или Memcached. LocMemCache живет в одном процессе
+# и не подходит (run_jobs с ним не запускается).
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache')),
+    }
+}
+
+# Время жизни кэша дашборда и блокировки его пересчета (в секундах)
+DASHBOARD_CACHE_TIMEOUT = 60 * 60 * 24
+DASHBOARD_LOCK_TIMEOUT = 30
+
+# Снимки фактов УИК для кривых явки (команда snapshot_uik_facts):
+# интервал съемки в секундах, срок хранения всех снимков, шаг прореживания
+# более старых и общий срок хранения
+FACT_SNAPSHOT_INTERVAL = 600
+FACT_SNAPSHOT_RAW_RETENTION = timedelta(days=2)
+FACT_SNAPSHOT_DOWNSAMPLE_STEP = timedelta(hours=1)
+FACT_SNAPSHOT_RETENTION = timedelta(days=365)
+
 # Custom User Model
 AUTH_USER_MODEL = 'elections.User'
 
@@ -376,6 +403,11 @@ def get_sidebar_navigation(request):
                     "icon": "block",
                     "link": lambda request: "/admin/elections/votingdateblock/",
                 },
+                {
+                    "title": "Фоновые задачи",
+                    "icon": "pending_actions",
+                    "link": lambda request: "/admin/elections/backgroundjob/",
+                },
             ],
         },
     ]
@@ -11,6 +11,9 @@ from elections.views import (
     results_dashboard_view,
     results_table_dashboard_view,
     results_by_brigadiers_dashboard_view,
+    dashboard_data_view,
+    live_facts_stream,
+    turnout_curve_view,
     get_uik_agitators,
     get_agitator_uik,
 )
@@ -24,6 +27,9 @@ urlpatterns = [
     path('dashboard/results/', results_dashboard_view, name='results_dashboard'),
     path('dashboard/results-table/', results_table_dashboard_view, name='results_table_dashboard'),
     path('dashboard/results-by-brigadiers/', results_by_brigadiers_dashboard_view, name='results_by_brigadiers_dashboard'),
+    path('dashboard/live/', live_facts_stream, name='dashboard_live'),
+    path('dashboard/turnout/', turnout_curve_view, name='turnout_curve'),
+    path('dashboard/<slug:name>/data/', dashboard_data_view, name='dashboard_data'),
     path('admin/elections/voter/<int:voter_id>/get_uik_agitators/', get_uik_agitators, name='get_uik_agitators'),
     path('admin/elections/user/<int:user_id>/uik/', get_agitator_uik, name='get_agitator_uik'),
     path('admin/', admin.site.urls),